@@ -0,0 +1,68 @@
+"""API endpoints for administrative operations."""
+
+import logging
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.config import settings
+from app.schemas.admin import ToolIndexStatsResponse
+from app.services.portia_service import PortiaService
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin_key(
+    x_admin_key: Annotated[str | None, Header()] = None,
+) -> None:
+    """Check the admin API key.
+
+    Admin endpoints are disabled unless an admin API key is configured.
+    """
+    if settings.admin_api_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admin endpoints are disabled, set ADMIN_API_KEY to enable them",
+        )
+    if x_admin_key is None or not secrets.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing admin API key",
+        )
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_key)])
+
+
+@router.get(
+    "/tools/index",
+    status_code=status.HTTP_200_OK,
+    summary="Get tool index stats",
+    description="Get the size and refresh metrics of the cached tool index",
+)
+async def get_tool_index_stats() -> ToolIndexStatsResponse:
+    """Get tool index stats."""
+    return ToolIndexStatsResponse(**PortiaService.get_instance().tool_index.stats())
+
+
+@router.post(
+    "/tools/refresh",
+    status_code=status.HTTP_200_OK,
+    summary="Refresh the tool index",
+    description="Rebuild the cached tool index from the Portia tool registry",
+)
+async def refresh_tool_index() -> ToolIndexStatsResponse:
+    """Refresh the tool index.
+
+    Returns the tool index stats after the refresh.
+    """
+    try:
+        stats = await PortiaService.get_instance().refresh_tool_index()
+    except Exception as e:
+        logger.exception("Failed to refresh the tool index")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to refresh the tool index: {e!s}",
+        ) from e
+    return ToolIndexStatsResponse(**stats)
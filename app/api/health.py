@@ -1,11 +1,12 @@
-"""API endpoints for the /run functionality."""
+"""API endpoints for the /health functionality."""
 
 import logging
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 
 from app.config import settings
-from app.schemas.health import HealthResponse
+from app.schemas.health import HealthResponse, ReadinessResponse
+from app.services.portia_service import PortiaService
 
 logger = logging.getLogger(__name__)
 
@@ -27,3 +28,59 @@ async def health_check() -> HealthResponse:
         status="healthy",
         version=settings.application_version,
     )
+
+
+@router.get(
+    "/health/live",
+    status_code=status.HTTP_200_OK,
+    summary="Liveness check",
+    description="Check that the process is running and serving requests",
+)
+async def liveness_check() -> HealthResponse:
+    """Liveness check endpoint.
+
+    Succeeds as long as the event loop is serving requests, whatever the state of
+    the executor, so that a busy replica is not restarted.
+    """
+    return HealthResponse(
+        status="alive",
+        version=settings.application_version,
+    )
+
+
+@router.get(
+    "/health/ready",
+    status_code=status.HTTP_200_OK,
+    summary="Readiness check",
+    description=(
+        "Check whether the application should receive traffic: startup has finished, the "
+        "tool index is built, the run queue is below its threshold and few recent runs failed"
+    ),
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "The application is not ready",
+            "model": ReadinessResponse,
+        }
+    },
+)
+async def readiness_check(response: Response) -> ReadinessResponse:
+    """Readiness check endpoint.
+
+    Returns 503 when any readiness check fails, so that load balancers stop
+    routing new traffic to a saturated or failing replica.
+    """
+    readiness = PortiaService.get_instance().readiness()
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        logger.warning(f"Readiness check failed: {readiness['checks']}")
+
+    return ReadinessResponse(
+        status="ready" if readiness["ready"] else "not_ready",
+        version=settings.application_version,
+        checks=readiness["checks"],
+        in_flight_runs=readiness["in_flight_runs"],
+        queued_runs=readiness["queued_runs"],
+        queue_threshold=readiness["queue_threshold"],
+        recent_runs=readiness["recent_runs"],
+        error_rate=readiness["error_rate"],
+    )
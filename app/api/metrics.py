@@ -0,0 +1,34 @@
+"""API endpoint exposing metrics to Prometheus."""
+
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from app.logging_config import dropped_records
+from app.services.metrics import registry, render_metrics, snapshot
+from app.services.portia_service import PortiaService
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Prometheus metrics",
+    description="Expose run latency histograms, executor and pool gauges and run counters",
+    response_class=PlainTextResponse,
+)
+async def get_metrics() -> PlainTextResponse:
+    """Get the metrics in the Prometheus text exposition format."""
+    snapshots = [
+        *registry.collect(),
+        *PortiaService.get_instance().collect_metrics(),
+        snapshot(
+            "portia_log_records_dropped",
+            "Log records dropped because the log queue was full",
+            dropped_records(),
+            metric_type="counter",
+        ),
+    ]
+    return PlainTextResponse(render_metrics(snapshots), media_type=PROMETHEUS_CONTENT_TYPE)
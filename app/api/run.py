@@ -1,21 +1,43 @@
 """API endpoints for the /run functionality."""
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator, Coroutine
+from typing import Any, TypeVar
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
-from app.exceptions import InvalidToolsError
-from app.schemas.run import RunRequest, RunResponse
-from app.services.portia_service import PortiaService
+from app.exceptions import (
+    InvalidToolsError,
+    RunTimeoutError,
+    ServiceOverloadedError,
+    TenantOverloadedError,
+)
+from app.logging_config import LoggedQuery
+from app.responses import FastJSONResponse, dumps, run_response_content
+from app.schemas.run import (
+    BatchRunRequest,
+    BatchRunResponse,
+    RunRequest,
+    RunResponse,
+)
+from app.services.admission import RunPriority
+from app.services.portia_service import BatchItem, PortiaService
+from app.services.result_cache import CachePolicy
+from app.services.run_context import RunEvent
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+T = TypeVar("T")
+
 
 @router.post(
     "/run",
     status_code=status.HTTP_200_OK,
+    response_model=RunResponse,
     summary="Execute a query using the Portia SDK",
     description=(
         "Accepts a query and optional tools list, then executes the query using the Portia SDK"
@@ -23,26 +45,44 @@ router = APIRouter()
 )
 async def run_query(
     request: RunRequest,
-) -> RunResponse:
+    http_request: Request,
+) -> FastJSONResponse:
     """Execute a query using the Portia SDK.
 
     - **query**: The query to execute
     - **tools**: List of tool IDs to use
-    Returns the result of the query execution.
+    - **timeout**: Deadline for the execution in seconds
+    - **coalesce**: Share the execution of an identical run already in flight
+    - **priority**: Execution lane of the run, high by default
+    When the result cache is enabled, the `Cache-Control` request header's `no-cache`,
+    `no-store` and `max-age` directives control its use and the `X-Cache` response
+    header reports whether the result was served from it.
+    Returns the result of the query execution. The response is serialized directly
+    from the run result, without validating it against `RunResponse` again.
     """
     try:
-        logger.info(f"Received run request: query='{request.query}', tools={request.tools}")
-
-        # Execute the query using the Portia service
-        result = await PortiaService.get_instance().run_query(
-            query=request.query, tools=request.tools
+        logger.info(
+            "Received run request: query=%s, tools=%s", LoggedQuery(request.query), request.tools
         )
-        return RunResponse(
-            success=result["success"],
-            result=result.get("result"),
-            error=result.get("error"),
-            execution_time=result.get("execution_time"),
+
+        # Execute the query using the Portia service, abandoning it if the client disconnects
+        result = await _run_until_disconnected(
+            http_request,
+            PortiaService.get_instance().run_query(
+                query=request.query,
+                tools=request.tools,
+                deadline=request.timeout,
+                cache_policy=CachePolicy.from_header(http_request.headers.get("cache-control")),
+                coalesce=request.coalesce,
+                priority=request.priority or RunPriority.HIGH,
+            ),
         )
+        headers = {}
+        if "cache_status" in result:
+            headers["X-Cache"] = str(result["cache_status"])
+        if "cache_age" in result:
+            headers["Age"] = str(result["cache_age"])
+        return FastJSONResponse(run_response_content(result), headers=headers)
 
     except InvalidToolsError as e:
         logger.warning(f"Invalid tools requested: {e.invalid_tools}")
@@ -55,6 +95,13 @@ async def run_query(
                 "available_tools": e.available_tools,
             },
         ) from e
+    except ServiceOverloadedError as e:
+        raise _overloaded_error(e) from e
+    except RunTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e),
+        ) from e
     except Exception as e:
         logger.exception("Unexpected error in run_query")
         raise HTTPException(
@@ -63,6 +110,175 @@ async def run_query(
         ) from e
 
 
+def _overloaded_error(e: ServiceOverloadedError) -> HTTPException:
+    """Map a rejected run to 429 if its tenant's queue was full, and 503 otherwise."""
+    if isinstance(e, TenantOverloadedError):
+        logger.warning(f"Rejected run request because the queue of tenant {e.tenant} is full")
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    else:
+        logger.warning("Rejected run request because the run queue is full")
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return HTTPException(
+        status_code=status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def _run_until_disconnected(request: Request, coro: Coroutine[Any, Any, T]) -> T:
+    """Await a coroutine, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(coro)
+
+    async def cancel_on_disconnect() -> None:
+        while not task.done():
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                task.cancel()
+                return
+
+    watcher = asyncio.create_task(cancel_on_disconnect())
+    try:
+        return await task
+    finally:
+        watcher.cancel()
+
+
+@router.post(
+    "/run/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Execute a query and stream its progress",
+    description=(
+        "Accepts a query and optional tools list, then executes the query using the Portia SDK "
+        "and streams plan and step progress as Server-Sent Events "
+        "(only the result with the process execution backend)"
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_run_query(
+    request: RunRequest,
+) -> StreamingResponse:
+    """Execute a query using the Portia SDK and stream its progress.
+
+    - **query**: The query to execute
+    - **tools**: List of tool IDs to use
+    Streams `plan_created`, `step_started` and `step_completed` events, followed by a
+    `result` event with the same shape as the /run response. With
+    `EXECUTION_BACKEND=process`, runs execute in a worker process: only the `result`
+    event is streamed, and a run is not cancelled when its client disconnects.
+    """
+    try:
+        logger.info(
+            "Received streaming run request: query=%s, tools=%s",
+            LoggedQuery(request.query),
+            request.tools,
+        )
+
+        events = await PortiaService.get_instance().stream_query(
+            query=request.query,
+            tools=request.tools,
+            deadline=request.timeout,
+            priority=request.priority or RunPriority.HIGH,
+        )
+
+    except InvalidToolsError as e:
+        logger.warning(f"Invalid tools requested: {e.invalid_tools}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid tools requested",
+                "message": str(e),
+                "invalid_tools": e.invalid_tools,
+                "available_tools": e.available_tools,
+            },
+        ) from e
+    except ServiceOverloadedError as e:
+        raise _overloaded_error(e) from e
+    except Exception as e:
+        logger.exception("Unexpected error in stream_run_query")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {e!s}",
+        ) from e
+
+    return StreamingResponse(
+        _format_server_sent_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _format_server_sent_events(events: AsyncIterator[RunEvent]) -> AsyncIterator[str]:
+    """Format run events as Server-Sent Events."""
+    async for event in events:
+        data = run_response_content(event.data) if event.event == "result" else event.data
+        yield f"event: {event.event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@router.post(
+    "/run/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Execute a batch of queries using the Portia SDK",
+    description=(
+        "Accepts a list of queries with their tools lists and executes them concurrently, "
+        "returning the results in request order or streaming them as NDJSON"
+    ),
+    response_model=BatchRunResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def run_batch(
+    request: BatchRunRequest,
+) -> FastJSONResponse | StreamingResponse:
+    """Execute a batch of queries using the Portia SDK.
+
+    - **items**: The queries to execute, each with a query and list of tool IDs, executed
+      at low priority unless they set one
+    - **max_concurrency**: Maximum number of items executed at the same time
+    - **stream**: Stream results as NDJSON in completion order
+    Returns the results of the items in request order.
+    """
+    logger.info(f"Received batch run request with {len(request.items)} items")
+
+    results = PortiaService.get_instance().run_batch(
+        items=[
+            BatchItem(
+                query=item.query,
+                tools=item.tools,
+                deadline=item.timeout,
+                priority=item.priority or RunPriority.LOW,
+                coalesce=item.coalesce,
+            )
+            for item in request.items
+        ],
+        max_concurrency=request.max_concurrency,
+    )
+
+    if request.stream:
+        return StreamingResponse(
+            _format_ndjson(results),
+            media_type="application/x-ndjson",
+        )
+
+    responses: list[dict[str, Any] | None] = [None] * len(request.items)
+    try:
+        async for index, result in results:
+            responses[index] = run_response_content(result)
+    except Exception as e:
+        logger.exception("Unexpected error in run_batch")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {e!s}",
+        ) from e
+
+    return FastJSONResponse(
+        {"results": [response for response in responses if response is not None]}
+    )
+
+
+async def _format_ndjson(results: AsyncIterator[tuple[int, dict]]) -> AsyncIterator[str]:
+    """Format batch results as newline-delimited JSON."""
+    async for index, result in results:
+        yield dumps({"index": index, **run_response_content(result)}).decode() + "\n"
+
+
 @router.get(
     "/tools",
     status_code=status.HTTP_200_OK,
@@ -0,0 +1,96 @@
+"""API endpoints for the asynchronous /runs job functionality."""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.exceptions import InvalidToolsError, JobNotFoundError, JobStoreFullError
+from app.schemas.run import RunRequest
+from app.schemas.runs import JobResponse
+from app.services.admission import RunPriority
+from app.services.portia_service import PortiaService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/runs")
+
+
+@router.post(
+    "",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a query for asynchronous execution",
+    description=(
+        "Accepts a query and tools list and returns a job ID immediately. "
+        "Poll GET /runs/{job_id} for the status and result."
+    ),
+)
+async def submit_run(request: RunRequest) -> JobResponse:
+    """Submit a query for asynchronous execution.
+
+    - **query**: The query to execute
+    - **tools**: List of tool IDs to use
+    - **timeout**: Deadline for the execution in seconds, counted from when the job starts
+    - **coalesce**: Share the execution of an identical run already in flight
+    - **priority**: Execution lane of the job, low by default
+    Returns the created job.
+    """
+    try:
+        job = await PortiaService.get_instance().submit_job(
+            query=request.query,
+            tools=request.tools,
+            priority=request.priority or RunPriority.LOW,
+            deadline=request.timeout,
+            coalesce=request.coalesce,
+        )
+    except InvalidToolsError as e:
+        logger.warning(f"Invalid tools requested: {e.invalid_tools}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid tools requested",
+                "message": str(e),
+                "invalid_tools": e.invalid_tools,
+                "available_tools": e.available_tools,
+            },
+        ) from e
+    except JobStoreFullError as e:
+        logger.warning("Rejected job submission because the job store is full")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        ) from e
+
+    logger.info(f"Submitted run job {job.id}")
+    return JobResponse.from_job(job)
+
+
+@router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Get a run job",
+    description="Get the status of a submitted job and its result once finished",
+)
+async def get_run(job_id: str) -> JobResponse:
+    """Get the status and result of a run job."""
+    try:
+        job = PortiaService.get_instance().get_job(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    return JobResponse.from_job(job)
+
+
+@router.delete(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Cancel a run job",
+    description="Cancel a pending or running job. Cancelling a finished job has no effect.",
+)
+async def cancel_run(job_id: str) -> JobResponse:
+    """Cancel a run job."""
+    try:
+        job = PortiaService.get_instance().cancel_job(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+    logger.info(f"Cancelled run job {job_id}")
+    return JobResponse.from_job(job)
@@ -0,0 +1,109 @@
+"""Command line interface for serving the application."""
+
+import argparse
+import logging
+import os
+from collections.abc import Sequence
+
+import uvicorn
+
+from app.config import available_cpus, settings
+from app.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def default_process_count() -> int:
+    """Get the default number of worker processes: one per CPU available to the process."""
+    return available_cpus()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the ``portia-fastapi`` command."""
+    parser = argparse.ArgumentParser(
+        prog="portia-fastapi", description="Portia FastAPI example server"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Serve the API with one or more worker processes",
+        description=(
+            "Serve the API with a supervisor managing worker processes. Send SIGHUP to the "
+            "supervisor to replace the workers one at a time."
+        ),
+    )
+    serve_parser.add_argument("--host", default=None, help=f"Bind host (default: {settings.host})")
+    serve_parser.add_argument(
+        "--port", type=int, default=None, help=f"Bind port (default: {settings.port})"
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: WEB_CONCURRENCY or the available CPUs)",
+    )
+    serve_parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help=f"Portia executor threads per process (default: {settings.max_workers})",
+    )
+    serve_parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=None,
+        help="Seconds a stopping worker waits for in-flight requests before exiting",
+    )
+    return parser
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the API server.
+
+    Each worker process runs the application lifespan, which prepares its
+    ``PortiaService`` before the worker starts accepting connections.
+
+    Args:
+        args: Parsed ``serve`` command line arguments
+
+    """
+    if args.max_workers is not None:
+        # Worker processes load their settings from the environment, this process uses its own
+        os.environ["MAX_WORKERS"] = str(args.max_workers)
+        settings.max_workers = args.max_workers
+
+    workers = args.workers or settings.web_concurrency or default_process_count()
+    if settings.execution_backend in ("process", "hybrid") and settings.process_pool_size is None:
+        # Share the CPUs between the process pools of the workers, rather than starting
+        # a pool with a process per CPU in every worker
+        process_pool_size = max(available_cpus() // workers, 1)
+        os.environ["PROCESS_POOL_SIZE"] = str(process_pool_size)
+        settings.process_pool_size = process_pool_size
+    host = args.host or settings.host
+    port = args.port or settings.port
+    logger.info(
+        f"Serving on {host}:{port} with {workers} worker processes and "
+        f"{settings.max_workers} executor threads each"
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        log_level=settings.log_level.lower(),
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Entry point of the ``portia-fastapi`` command."""
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    if args.command == "serve":
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
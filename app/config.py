@@ -1,14 +1,18 @@
 """Application configuration."""
 
 import logging
+import math
+import os
 import tomllib
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Literal
 
-from portia.config import Config as PortiaConfig
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+if TYPE_CHECKING:
+    from portia.config import Config as PortiaConfig
+
 
 def _get_version_from_pyproject() -> str:
     """Extract version from pyproject.toml file."""
@@ -22,6 +26,50 @@ def _get_version_from_pyproject() -> str:
         return "unknown"
 
 
+# CPU quota of the cgroup of this process, as "<quota> <period>" (v2) or in two files (v1)
+_CGROUP_V2_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+_CGROUP_V1_CPU_QUOTA = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+_CGROUP_V1_CPU_PERIOD = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+
+def _cgroup_cpu_quota() -> float | None:
+    """Get the CPU quota of the cgroup of this process in CPUs, or None if it is not limited."""
+    try:
+        quota, period = _CGROUP_V2_CPU_MAX.read_text().split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota = _CGROUP_V1_CPU_QUOTA.read_text().strip()
+            period = _CGROUP_V1_CPU_PERIOD.read_text().strip()
+        except OSError:
+            return None
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except ValueError:
+        # "max" means no quota
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def available_cpus() -> int:
+    """Get the number of CPUs this process may use.
+
+    Unlike ``os.cpu_count()``, this honours the CPU affinity of the process and
+    the CPU quota of its cgroup, so a container limited to 2 CPUs on a 64-core
+    host counts 2.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS and Windows
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
 class PortiaConfigSettings(BaseSettings):
     """Portia configuration settings."""
 
@@ -78,13 +126,36 @@ class PortiaConfigSettings(BaseSettings):
 
     model_config = SettingsConfigDict(env_prefix="PORTIA_CONFIG_")
 
-    def to_portia_config(self) -> PortiaConfig:
-        """Convert settings to Portia Config."""
+    def to_portia_config(self) -> "PortiaConfig":
+        """Convert settings to Portia Config.
+
+        The Portia SDK is imported here rather than with this module, since it
+        imports every LLM client library and dominates application startup time.
+        """
+        from portia.config import Config as PortiaConfig  # noqa: PLC0415
+
         config_data = self.model_dump(exclude_none=True)
 
         return PortiaConfig.from_default(**config_data)
 
 
+class TenantSettings(BaseModel):
+    """Scheduling settings of a tenant."""
+
+    weight: float = Field(
+        default=1.0, gt=0, description="Relative share of the executor when tenants compete"
+    )
+    max_in_flight_runs: int | None = Field(
+        default=None, ge=1, description="Maximum number of runs of the tenant executing at once"
+    )
+    max_queued_runs: int | None = Field(
+        default=None, ge=0, description="Maximum number of runs of the tenant waiting to execute"
+    )
+    api_keys: list[str] = Field(
+        default=[], description="API keys identifying the tenant in the X-API-Key header"
+    )
+
+
 class Settings(BaseSettings):
     """Application settings with validation and environment variable support."""
 
@@ -98,6 +169,222 @@ class Settings(BaseSettings):
     max_workers: int = Field(
         default=4, description="Maximum number of worker threads for Portia execution"
     )
+    web_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Number of worker processes started by the serve command (defaults to CPUs)",
+    )
+    execution_backend: Literal["thread", "process", "hybrid", "async"] = Field(
+        default="thread",
+        description=(
+            "Where runs execute: worker threads, worker processes, worker processes with "
+            "streamed runs kept on threads, or the event loop with sync-only tools on threads. "
+            "Runs in worker processes skip the plan cache and the execution hooks, so they "
+            "are not stopped at their deadline and hold their process until they finish"
+        ),
+    )
+    async_max_concurrent_runs: int = Field(
+        default=256,
+        ge=1,
+        description="Maximum number of runs executing at the same time with the async backend",
+    )
+    process_pool_size: int | None = Field(
+        default=None,
+        ge=1,
+        description="Number of worker processes of the process backends (defaults to CPUs)",
+    )
+    max_in_flight_runs: int | None = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Maximum number of runs executing at the same time "
+            "(defaults to the capacity of the execution backend)"
+        ),
+    )
+    max_queued_runs: int = Field(
+        default=100, ge=0, description="Maximum number of runs waiting for an executor slot"
+    )
+    high_priority_reserved_runs: int = Field(
+        default=0,
+        ge=0,
+        description="Executor slots reserved for high priority runs (at most all but one)",
+    )
+    low_priority_borrowing: bool = Field(
+        default=True,
+        description=(
+            "Let low priority runs use the reserved slots while no high priority run "
+            "is executing or waiting"
+        ),
+    )
+    tenants: dict[str, TenantSettings] = Field(
+        default={}, description="Scheduling settings of the tenants by tenant ID"
+    )
+    tenant_defaults: TenantSettings = Field(
+        default_factory=TenantSettings,
+        description="Scheduling settings of the default tenant, unless configured in TENANTS",
+    )
+    tenant_header: str = Field(
+        default="X-Tenant-ID", description="Request header selecting a tenant configured in TENANTS"
+    )
+    default_tenant: str = Field(
+        default="default", description="Tenant of the requests that do not identify one"
+    )
+    overload_retry_after_seconds: int = Field(
+        default=5, ge=0, description="Retry-After hint returned when the run queue is full"
+    )
+    run_timeout_max_seconds: float = Field(
+        default=300.0,
+        gt=0,
+        description="Default and maximum deadline for a run in seconds",
+    )
+    portia_instance_pool_size: int = Field(
+        default=16,
+        ge=1,
+        description="Maximum number of Portia instances cached by tool set",
+    )
+    coalesce_runs: bool = Field(
+        default=True,
+        description="Share one execution between identical /run requests executing at once",
+    )
+    llm_shared_clients: bool = Field(
+        default=True,
+        description="Share model objects and pooled HTTP clients across Portia instances",
+    )
+    llm_http_max_connections: int = Field(
+        default=100, ge=1, description="Maximum connections per LLM endpoint and client"
+    )
+    llm_http_max_keepalive_connections: int = Field(
+        default=20, ge=0, description="Idle connections kept alive per LLM endpoint and client"
+    )
+    llm_http_keepalive_expiry_seconds: float = Field(
+        default=30.0, ge=0, description="Seconds idle LLM connections are kept alive"
+    )
+    llm_http2: bool = Field(
+        default=False, description="Use HTTP/2 for LLM connections (requires the h2 package)"
+    )
+    tool_index_ttl_seconds: float = Field(
+        default=300.0,
+        ge=0,
+        description="Interval between background tool index refreshes (0 disables refreshing)",
+    )
+
+    # Warm-up settings
+    warmup_tool_sets: list[list[str]] = Field(
+        default=[],
+        description="Tool sets whose Portia instances are built at startup, as a JSON list",
+    )
+    warmup_timeout_seconds: float = Field(
+        default=30.0, gt=0, description="Deadline for the startup warm-up in seconds"
+    )
+    warmup_dry_run: bool = Field(
+        default=False,
+        description="Plan a query with each warmed tool set to prime the model clients",
+    )
+
+    # Batch settings
+    batch_max_items: int = Field(
+        default=1000, ge=1, description="Maximum number of items in a batch run request"
+    )
+    batch_max_concurrency: int = Field(
+        default=4, ge=1, description="Maximum number of batch items executed at the same time"
+    )
+
+    # Job settings
+    job_max_retained: int = Field(
+        default=10000, ge=1, description="Maximum number of run jobs kept in the job store"
+    )
+    job_retention_seconds: float = Field(
+        default=3600.0, ge=0, description="How long finished run jobs are kept"
+    )
+    job_max_concurrency: int = Field(
+        default=4, ge=1, description="Maximum number of run jobs executing at the same time"
+    )
+    job_max_pending: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum number of unfinished run jobs, beyond which submissions get 503",
+    )
+
+    # Result cache settings
+    result_cache_enabled: bool = Field(
+        default=False, description="Serve repeated /run queries from the result cache"
+    )
+    result_cache_backend: Literal["memory", "redis"] = Field(
+        default="memory",
+        description="Result cache backend (redis uses portia_config.llm_redis_cache_url)",
+    )
+    result_cache_ttl_seconds: float = Field(
+        default=300.0, gt=0, description="How long cached run results are served"
+    )
+    result_cache_max_entries: int = Field(
+        default=1024, ge=1, description="Maximum number of results kept by the memory backend"
+    )
+
+    # Plan cache settings
+    plan_cache_enabled: bool = Field(
+        default=False, description="Reuse generated plans for repeated queries"
+    )
+    plan_cache_strategy: Literal["exact", "template"] = Field(
+        default="exact",
+        description=(
+            "How queries are matched to cached plans (template also matches queries that "
+            "only differ in quoted strings and numbers)"
+        ),
+    )
+    plan_cache_max_entries: int = Field(
+        default=256, ge=1, description="Maximum number of cached plans"
+    )
+    plan_cache_ttl_seconds: float = Field(
+        default=3600.0, gt=0, description="How long cached plans are reused"
+    )
+
+    # Readiness settings
+    readiness_max_queued_runs: int | None = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Queued runs at which the service reports not ready "
+            "(defaults to half of MAX_QUEUED_RUNS)"
+        ),
+    )
+    readiness_max_error_rate: float = Field(
+        default=0.5,
+        ge=0,
+        le=1,
+        description="Share of failed recent runs at which the service reports not ready",
+    )
+    readiness_error_window_seconds: float = Field(
+        default=60.0, gt=0, description="Window of recent runs used for the error rate"
+    )
+    readiness_min_runs: int = Field(
+        default=10,
+        ge=1,
+        description="Minimum number of recent runs before the error rate affects readiness",
+    )
+
+    # Tracing settings
+    server_timing_enabled: bool = Field(
+        default=True, description="Report the phases of each request in a Server-Timing header"
+    )
+    tracing_export_path: str | None = Field(
+        default=None, description="File that traces are appended to as OTLP/JSON lines"
+    )
+    tracing_otlp_endpoint: str | None = Field(
+        default=None,
+        description="OTLP/HTTP collector endpoint that traces are posted to",
+    )
+    tracing_service_name: str = Field(
+        default="portia-fastapi", description="service.name of the exported traces"
+    )
+
+    # Admin settings
+    admin_api_key: str | None = Field(
+        default=None,
+        description=(
+            "API key required in the X-Admin-Key header for admin endpoints, "
+            "which are disabled when it is not set"
+        ),
+    )
 
     # CORS settings
     allowed_domains: list[str] = Field(
@@ -111,6 +398,22 @@ class Settings(BaseSettings):
 
     # Logging settings
     log_level: str = Field(default="INFO", description="Logging level")
+    log_format: Literal["text", "json"] | None = Field(
+        default=None,
+        description="Log output format (defaults to json if portia_config.json_log_serialize)",
+    )
+    log_query_mode: Literal["full", "truncate", "hash"] = Field(
+        default="truncate", description="How user queries appear in logs"
+    )
+    log_query_max_chars: int = Field(
+        default=200, ge=1, description="Length user queries are truncated to in logs"
+    )
+    log_success_sample_rate: float = Field(
+        default=1.0, ge=0, le=1, description="Share of high-volume success logs that are kept"
+    )
+    log_queue_max_size: int = Field(
+        default=10000, ge=1, description="Log records buffered before new records are dropped"
+    )
 
     # Application version
     application_version: str = Field(
@@ -119,21 +422,13 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_nested_delimiter="__")
 
-    def get_portia_config(self) -> PortiaConfig:
+    def get_portia_config(self) -> "PortiaConfig":
         """Get the Portia configuration."""
         return self.portia_config.to_portia_config()
 
 
 settings = Settings()
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
-
-logger = logging.getLogger(__name__)
-
 
 def get_app_config() -> dict[str, Any]:
     """Get application configuration."""
@@ -22,3 +22,83 @@ class InvalidToolsError(Exception):
             f"The following tools are not available: {', '.join(invalid_tools)}. "
             f"Available tools: {', '.join(available_tools)}"
         )
+
+
+class JobNotFoundError(Exception):
+    """Exception raised when a run job does not exist or is no longer retained."""
+
+    def __init__(self, job_id: str) -> None:
+        """Initialize the exception.
+
+        Args:
+            job_id: ID of the job that was requested
+
+        """
+        self.job_id = job_id
+        super().__init__(f"Job not found: {job_id}")
+
+
+class JobStoreFullError(Exception):
+    """Exception raised when the job store cannot accept more jobs."""
+
+    def __init__(self, max_jobs: int) -> None:
+        """Initialize the exception.
+
+        Args:
+            max_jobs: Maximum number of jobs the store can hold
+
+        """
+        self.max_jobs = max_jobs
+        super().__init__(f"The job store is full ({max_jobs} unfinished jobs)")
+
+
+class ServiceOverloadedError(Exception):
+    """Exception raised when a run is rejected because the execution queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        """Initialize the exception.
+
+        Args:
+            retry_after: Number of seconds the caller should wait before retrying
+
+        """
+        self.retry_after = retry_after
+        super().__init__("The service is at capacity, please retry later")
+
+
+class TenantOverloadedError(ServiceOverloadedError):
+    """Exception raised when a run is rejected because its tenant's queue is full."""
+
+    def __init__(self, tenant: str, retry_after: int) -> None:
+        """Initialize the exception.
+
+        Args:
+            tenant: The tenant whose queue is full
+            retry_after: Number of seconds the caller should wait before retrying
+
+        """
+        super().__init__(retry_after)
+        self.tenant = tenant
+        self.args = (f"Too many queued runs for tenant {tenant}, please retry later",)
+
+
+class RunTimeoutError(Exception):
+    """Exception raised when a run does not finish before its deadline."""
+
+    def __init__(self, timeout: float) -> None:
+        """Initialize the exception.
+
+        Args:
+            timeout: The deadline of the run in seconds
+
+        """
+        self.timeout = timeout
+        super().__init__(f"Query execution did not finish within {timeout}s")
+
+
+class RunCancelledError(Exception):
+    """Exception raised inside a run to stop it once it has been cancelled.
+
+    This is raised from the Portia execution hooks, so the run stops before its
+    next step or tool call instead of occupying a worker thread to completion.
+    """
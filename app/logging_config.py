@@ -0,0 +1,192 @@
+"""Logging pipeline that keeps formatting and output off the request path.
+
+Log records are put on an in-memory queue by the handler installed on the root
+logger and formatted and written to stdout by a background listener thread, so
+a slow stdout never blocks the event loop. The queue is bounded and records
+are dropped rather than blocking when it is full.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any
+
+from app.config import Settings, settings
+from app.services.tracing import current_request_id
+
+# Pass as ``extra`` to make a record subject to the ``log_success_sample_rate`` setting
+SAMPLED = {"sampled": True}
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes of every LogRecord, anything else was passed in ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    [*vars(logging.LogRecord("", 0, "", 0, "", None, None)), "message", "asctime", "sampled"]
+)
+
+_listener: logging.handlers.QueueListener | None = None
+_handler: "NonBlockingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including their ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as JSON."""
+        entry: dict[str, Any] = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep only a share of the records logged with ``extra=SAMPLED``."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize the filter.
+
+        Args:
+            rate: Share of sampled records to keep, between 0 and 1
+
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Whether to keep the record."""
+        if not getattr(record, "sampled", False) or self.rate >= 1:
+            return True
+        return random.random() < self.rate  # noqa: S311
+
+
+class RequestIdFilter(logging.Filter):
+    """Add the ID of the request being handled to records as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add the request ID, read from the context of the thread logging the record."""
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that defers formatting to the listener and never blocks.
+
+    Unlike ``QueueHandler``, records are not formatted before being queued,
+    except for exception tracebacks which must be rendered while their frames
+    are still alive. Records are dropped and counted when the queue is full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        """Initialize the handler with the queue read by the listener."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Prepare a record for the queue without formatting its message."""
+        if record.exc_info:
+            # Copy the record since other handlers may still render the original
+            record = copy.copy(record)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggedQuery:
+    """A user query as it appears in logs, rendered only if the record is emitted.
+
+    Depending on the ``log_query_mode`` setting, the query is logged in full,
+    truncated to ``log_query_max_chars`` characters or replaced by a hash that
+    still correlates repeated queries without logging their content.
+    """
+
+    __slots__ = ("query",)
+
+    def __init__(self, query: str) -> None:
+        """Wrap a query for logging."""
+        self.query = query
+
+    def __str__(self) -> str:
+        """Render the query according to the logging settings."""
+        if settings.log_query_mode == "hash":
+            return f"sha256:{hashlib.sha256(self.query.encode()).hexdigest()[:16]}"
+        if settings.log_query_mode == "truncate" and len(self.query) > settings.log_query_max_chars:
+            truncated = self.query[: settings.log_query_max_chars]
+            return f"{truncated!r}... ({len(self.query)} chars)"
+        return repr(self.query)
+
+
+def configure_logging(app_settings: Settings | None = None) -> None:
+    """Route the root logger through the queue to a background listener.
+
+    Called by the entry points rather than on import, so that importing the
+    application has no side effects on logging. Calling it again replaces the
+    previous configuration.
+
+    Args:
+        app_settings: Settings to configure logging from, defaults to ``settings``
+
+    """
+    global _listener, _handler  # noqa: PLW0603
+    app_settings = app_settings or settings
+    shutdown_logging()
+
+    log_format = app_settings.log_format or (
+        "json" if app_settings.portia_config.json_log_serialize else "text"
+    )
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if log_format == "json" else logging.Formatter(_TEXT_FORMAT)
+    )
+
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(app_settings.log_queue_max_size)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(SampleFilter(app_settings.log_success_sample_rate))
+    _handler.addFilter(RequestIdFilter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(getattr(logging, app_settings.log_level.upper()))
+
+
+def shutdown_logging() -> None:
+    """Flush the queued records and stop the listener, if logging was configured."""
+    global _listener, _handler  # noqa: PLW0603
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        if _handler.dropped:
+            sys.stderr.write(f"{_handler.dropped} log records were dropped, the queue was full\n")
+        _handler = None
+    if _listener is not None:
+        # Stopping the listener processes the records still in the queue
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Get the number of records dropped because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
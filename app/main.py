@@ -7,10 +7,17 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.admin import router as admin_router
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.run import router as run_router
+from app.api.runs import router as runs_router
 from app.config import get_app_config, settings
+from app.logging_config import configure_logging, shutdown_logging
+from app.middleware import MetricsMiddleware, TenantMiddleware, TracingMiddleware
+from app.responses import FastJSONResponse
 from app.services.portia_service import PortiaService
+from app.services.tracing import configure_tracing, shutdown_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +28,22 @@ async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
 
     Handles startup and shutdown events.
     """
+    configure_logging()
+    configure_tracing(settings)
     logger.info("Starting up FastAPI application and initializing Portia service")
+    if settings.admin_api_key is None:
+        logger.warning("ADMIN_API_KEY is not set, admin endpoints are disabled")
     # Initialize Portia service singleton
-    PortiaService()
+    portia_service = PortiaService()
+    await portia_service.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down FastAPI application")
+    await portia_service.stop()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 app_config = get_app_config()
@@ -39,6 +54,7 @@ app = FastAPI(
     title=settings.app_name,
     version=settings.application_version,
     debug=settings.debug,
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -47,17 +63,35 @@ app.add_middleware(
     allow_origins=settings.allowed_domains,
     allow_credentials=True,
 )
+app.add_middleware(TenantMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 # Include API routes
 app.include_router(
     run_router,
     tags=["run"],
 )
 
+app.include_router(
+    runs_router,
+    tags=["runs"],
+)
+
 app.include_router(
     health_router,
     tags=["health"],
 )
 
+app.include_router(
+    metrics_router,
+    tags=["metrics"],
+)
+
+app.include_router(
+    admin_router,
+    tags=["admin"],
+)
+
 
 # Root endpoint
 @app.get("/", summary="Root endpoint", description="Welcome message")
@@ -0,0 +1,128 @@
+"""ASGI middleware of the application."""
+
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.metrics import HTTP_REQUEST_SECONDS
+from app.services.tenancy import current_tenant, resolve_tenant
+from app.services.tracing import Trace, current_trace, export_trace
+
+# Longest client-supplied X-Request-ID that is propagated, longer ones are replaced
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class MetricsMiddleware:
+    """Record the latency of every HTTP request by method, route and status code.
+
+    The route is the path template of the matched endpoint (e.g. ``/runs/{job_id}``)
+    rather than the raw path, to keep the number of label values bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection, timing HTTP requests."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start_time,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
+
+
+class TracingMiddleware:
+    """Trace every HTTP request under a request ID.
+
+    The request ID is taken from the ``X-Request-ID`` request header or
+    generated, bound to the request's trace for the service and executor
+    layers, and returned in the ``X-Request-ID`` response header along with a
+    ``Server-Timing`` header summarizing the phases of the request. The trace
+    is exported once the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection, tracing HTTP requests."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = uuid.uuid4().hex
+        trace = Trace.start(request_id, scope["method"], **{"http.method": scope["method"]})
+        token = current_trace.set(trace)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                if settings.server_timing_enabled:
+                    headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_trace.reset(token)
+            trace.end()
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                trace.root.name = f"{scope['method']} {route}"
+                trace.root.attributes["http.route"] = route
+            export_trace(trace)
+
+
+class TenantMiddleware:
+    """Identify the tenant of every HTTP request.
+
+    The tenant is resolved from the ``X-API-Key`` or tenant header and bound
+    for the service layer, which schedules runs fairly between tenants.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI connection, binding the tenant of HTTP requests."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tenant = resolve_tenant(Headers(scope=scope))
+        trace = current_trace.get()
+        if trace is not None:
+            trace.root.attributes["tenant.id"] = tenant
+        token = current_tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
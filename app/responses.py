@@ -0,0 +1,63 @@
+"""Fast JSON responses.
+
+``FastJSONResponse`` is the default response class of the application. It
+serializes with orjson, which encodes large run outputs several times faster
+than the standard library. Endpoints returning large payloads build their
+response content directly and return the response, skipping the validation
+and ``jsonable_encoder`` pass FastAPI applies to returned models.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def orjson_default(obj: Any) -> Any:  # noqa: ANN401
+    """Encode the objects orjson does not support natively, such as pydantic models.
+
+    Called by orjson only for objects it cannot encode itself, so plain dicts,
+    lists, strings, numbers, datetimes and UUIDs never reach the slower
+    fallback of ``jsonable_encoder``.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:  # noqa: ANN401
+    """Serialize content to JSON with orjson."""
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401
+        """Serialize the response content."""
+        return dumps(content)
+
+
+def run_response_content(result: dict[str, Any]) -> dict[str, Any]:
+    """Build the ``RunResponse`` content of a run result without validating it.
+
+    The service already produces every field with the right type, so the
+    result is passed through as is instead of being validated by pydantic and
+    walked by ``jsonable_encoder``.
+
+    Args:
+        result: Result of a run as returned by ``PortiaService``
+
+    Returns:
+        The fields of ``RunResponse``
+
+    """
+    return {
+        "success": result["success"],
+        "result": result.get("result"),
+        "error": result.get("error"),
+        "execution_time": result.get("execution_time"),
+        "queue_time": result.get("queue_time"),
+    }
@@ -0,0 +1,34 @@
+"""Pydantic schemas for the admin endpoints."""
+
+from pydantic import BaseModel, Field
+
+
+class ToolIndexStatsResponse(BaseModel):
+    """Response model for tool index stats."""
+
+    tool_count: int = Field(..., description="Number of indexed tools")
+    refresh_count: int = Field(..., description="Number of successful index refreshes")
+    refresh_failures: int = Field(..., description="Number of failed index refreshes")
+    last_refresh_duration: float | None = Field(
+        default=None, description="Duration of the last successful refresh in seconds"
+    )
+    total_refresh_duration: float = Field(
+        ..., description="Total time spent refreshing the index in seconds"
+    )
+    last_refreshed_at: float | None = Field(
+        default=None, description="Unix timestamp of the last successful refresh"
+    )
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "tool_count": 12,
+                    "refresh_count": 3,
+                    "refresh_failures": 0,
+                    "last_refresh_duration": 0.42,
+                    "total_refresh_duration": 1.31,
+                    "last_refreshed_at": 1735689600.0,
+                }
+            ]
+        }
+    }
@@ -9,3 +9,39 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Application status")
     version: str = Field(..., description="Application version")
     model_config = {"json_schema_extra": {"examples": [{"status": "healthy", "version": "0.1.0"}]}}
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for readiness checks."""
+
+    status: str = Field(..., description="Either ready or not_ready")
+    version: str = Field(..., description="Application version")
+    checks: dict[str, bool] = Field(..., description="Result of each readiness check")
+    in_flight_runs: int = Field(..., description="Number of runs currently executing")
+    queued_runs: int = Field(..., description="Number of runs waiting for an executor slot")
+    queue_threshold: int = Field(..., description="Queued runs at which the service is not ready")
+    recent_runs: int = Field(..., description="Number of runs finished within the error window")
+    error_rate: float | None = Field(
+        default=None, description="Share of recent runs that failed, if there were any"
+    )
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "status": "ready",
+                    "version": "0.1.0",
+                    "checks": {
+                        "warm": True,
+                        "tool_index": True,
+                        "queue": True,
+                        "error_rate": True,
+                    },
+                    "in_flight_runs": 3,
+                    "queued_runs": 0,
+                    "queue_threshold": 100,
+                    "recent_runs": 42,
+                    "error_rate": 0.02,
+                }
+            ]
+        }
+    }
@@ -4,6 +4,9 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
+from app.services.admission import RunPriority
+
 
 class RunRequest(BaseModel):
     """Request model for the /run endpoint."""
@@ -17,6 +20,25 @@ class RunRequest(BaseModel):
         ...,
         description="List of tool IDs to use for the execution",
     )
+    timeout: float | None = Field(
+        default=None,
+        description="Deadline for the execution in seconds, capped by the server limit",
+        gt=0,
+    )
+    coalesce: bool = Field(
+        default=True,
+        description=(
+            "Share the execution of an identical run already in flight "
+            "(streamed runs always execute on their own)"
+        ),
+    )
+    priority: RunPriority | None = Field(
+        default=None,
+        description=(
+            "Execution lane of the run, defaults to high for /run and /run/stream "
+            "and to low for /run/batch items and /runs jobs"
+        ),
+    )
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -36,6 +58,9 @@ class RunResponse(BaseModel):
     result: Any | None = Field(default=None, description="The result of the execution")
     error: str | None = Field(default=None, description="Error message if execution failed")
     execution_time: float | None = Field(default=None, description="Execution time in seconds")
+    queue_time: float | None = Field(
+        default=None, description="Time spent waiting for an executor slot in seconds"
+    )
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -50,7 +75,58 @@ class RunResponse(BaseModel):
                     },
                     "error": None,
                     "execution_time": 2.5,
+                    "queue_time": 0.0,
+                }
+            ]
+        }
+    }
+
+
+class BatchRunRequest(BaseModel):
+    """Request model for the /run/batch endpoint."""
+
+    items: list[RunRequest] = Field(
+        ...,
+        description="The queries to execute",
+        min_length=1,
+        max_length=settings.batch_max_items,
+    )
+    max_concurrency: int | None = Field(
+        default=None,
+        description=(
+            "Maximum number of items executed at the same time, capped by the server limit"
+        ),
+        ge=1,
+    )
+    stream: bool = Field(
+        default=False,
+        description="Stream results as NDJSON in completion order instead of one JSON response",
+    )
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "items": [
+                        {"query": "What is 2+2?", "tools": ["calculator_tool"]},
+                        {"query": "What is 3*7?", "tools": ["calculator_tool"]},
+                    ],
+                    "max_concurrency": 2,
+                    "stream": False,
                 }
             ]
         }
     }
+
+
+class BatchRunItemResponse(RunResponse):
+    """Result of a single batch item, as streamed by the /run/batch endpoint."""
+
+    index: int = Field(..., description="Position of the item in the batch request")
+
+
+class BatchRunResponse(BaseModel):
+    """Response model for the /run/batch endpoint."""
+
+    results: list[RunResponse] = Field(
+        ..., description="Results of the batch items, in request order"
+    )
@@ -0,0 +1,60 @@
+"""Pydantic schemas for the /runs job endpoints."""
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from app.services.job_store import Job, JobStatus
+
+
+class JobResponse(BaseModel):
+    """Response model describing a run job."""
+
+    id: str = Field(..., description="Job ID")
+    status: JobStatus = Field(..., description="Current status of the job")
+    created_at: float = Field(..., description="Unix timestamp when the job was submitted")
+    started_at: float | None = Field(
+        default=None, description="Unix timestamp when the job started executing"
+    )
+    finished_at: float | None = Field(
+        default=None, description="Unix timestamp when the job finished"
+    )
+    result: Any | None = Field(default=None, description="The result of the execution")
+    error: str | None = Field(default=None, description="Error message if the job failed")
+    execution_time: float | None = Field(default=None, description="Execution time in seconds")
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": "3f2b6c1e9a8d4f7b8c2e1d0a9b8c7d6e",
+                    "status": "succeeded",
+                    "created_at": 1735689600.0,
+                    "started_at": 1735689600.1,
+                    "finished_at": 1735689602.6,
+                    "result": {
+                        "value": "4.0",
+                        "summary": (
+                            "The query asked for the result of 2+2, and the expression "
+                            "was evaluated to give the output 4.0."
+                        ),
+                    },
+                    "error": None,
+                    "execution_time": 2.5,
+                }
+            ]
+        }
+    }
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobResponse":
+        """Create a response from a job."""
+        return cls(
+            id=job.id,
+            status=job.status,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            result=job.result,
+            error=job.error,
+            execution_time=job.execution_time,
+        )
@@ -0,0 +1,373 @@
+"""Admission control in front of the Portia executor."""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+from app.exceptions import ServiceOverloadedError, TenantOverloadedError
+
+# Tenant of runs whose caller did not identify one
+DEFAULT_TENANT = "default"
+
+
+class RunPriority(StrEnum):
+    """Execution lane of a run."""
+
+    HIGH = "high"
+    LOW = "low"
+
+
+@dataclass(frozen=True)
+class TenantLimits:
+    """Share of the executor and limits of a tenant.
+
+    Attributes:
+        weight: Relative share of the executor slots when tenants compete for them
+        max_in_flight: Maximum number of runs of the tenant holding a slot at the same time
+        max_queued: Maximum number of runs of the tenant waiting for a slot
+
+    """
+
+    weight: float = 1.0
+    max_in_flight: int | None = None
+    max_queued: int | None = None
+
+
+@dataclass(eq=False)
+class _Waiter:
+    """A run waiting for a slot, tagged with its virtual start and finish times."""
+
+    start_tag: float
+    finish_tag: float
+    sequence: int
+    future: "asyncio.Future[None]"
+
+
+def _lane_waiters() -> dict[RunPriority, deque[_Waiter]]:
+    return {priority: deque() for priority in RunPriority}
+
+
+@dataclass
+class _TenantState:
+    """Occupancy, queues and counters of a tenant."""
+
+    limits: TenantLimits
+    in_flight: int = 0
+    waiters: dict[RunPriority, deque[_Waiter]] = field(default_factory=_lane_waiters)
+    finish_tag: float = 0.0
+    admitted: int = 0
+    rejected: int = 0
+    total_queue_time: float = 0.0
+
+    @property
+    def has_capacity(self) -> bool:
+        """Whether the tenant may hold one more slot."""
+        return self.limits.max_in_flight is None or self.in_flight < self.limits.max_in_flight
+
+    @property
+    def queued(self) -> int:
+        """Number of runs of the tenant waiting for a slot in any lane."""
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+
+@dataclass
+class _LaneState:
+    """Occupancy and counters of a priority lane."""
+
+    in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    total_queue_time: float = 0.0
+
+
+class AdmissionController:
+    """Bounds the number of runs executing and waiting for the executor.
+
+    Up to ``max_in_flight`` runs hold a slot at the same time and up to
+    ``max_queued`` further runs wait for one. Runs arriving when the queue is
+    full are rejected immediately instead of queueing invisibly inside the
+    executor.
+
+    Waiting runs are admitted by weighted fair queueing across tenants: each
+    run is tagged with a virtual finish time that grows by ``1 / weight`` per
+    run of its tenant, and freed slots go to the waiting run with the earliest
+    tag. A tenant queueing many runs therefore only delays the runs of other
+    tenants by their share of the slots, and runs of a single tenant are still
+    admitted in FIFO order. Tenants can also be capped in how many runs they
+    execute and queue at the same time.
+
+    Runs are also split into a high and a low priority lane.
+    ``reserved_high_priority`` slots are kept for high priority runs, and freed
+    slots go to waiting high priority runs before any low priority run, so
+    background work queues behind interactive work rather than next to it.
+    With ``low_priority_borrowing``, low priority runs may also use the
+    reserved slots while no high priority run is executing or waiting.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queued: int,
+        retry_after_seconds: int,
+        tenant_limits: Mapping[str, TenantLimits] | None = None,
+        default_tenant_limits: TenantLimits | None = None,
+        *,
+        reserved_high_priority: int = 0,
+        low_priority_borrowing: bool = True,
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            max_in_flight: Maximum number of runs holding a slot at the same time
+            max_queued: Maximum number of runs waiting for a slot
+            retry_after_seconds: Retry-After hint given to rejected callers
+            tenant_limits: Limits of the configured tenants
+            default_tenant_limits: Limits of the tenants that are not configured
+            reserved_high_priority: Slots only high priority runs may hold, at most all
+                but one of the slots
+            low_priority_borrowing: Let low priority runs hold the reserved slots while
+                the high priority lane is idle
+
+        """
+        self._max_in_flight = max_in_flight
+        self._max_queued = max_queued
+        self._retry_after_seconds = retry_after_seconds
+        self._tenant_limits = dict(tenant_limits or {})
+        self._default_tenant_limits = default_tenant_limits or TenantLimits()
+        self._reserved_high_priority = max(min(reserved_high_priority, max_in_flight - 1), 0)
+        self._low_priority_borrowing = low_priority_borrowing
+        self._tenants: dict[str, _TenantState] = {}
+        self._lanes = {priority: _LaneState() for priority in RunPriority}
+        self._in_flight = 0
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._sequence = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_queue_time = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of runs currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Number of runs currently waiting for a slot."""
+        return self._queued
+
+    @property
+    def is_full(self) -> bool:
+        """Whether a new run would be rejected right now."""
+        return self._in_flight >= self._max_in_flight and self._queued >= self._max_queued
+
+    def check(self, tenant: str = DEFAULT_TENANT, priority: RunPriority = RunPriority.HIGH) -> None:
+        """Reject a run up front if it would be rejected by ``acquire`` right now.
+
+        Raises:
+            ServiceOverloadedError: If the queue is full
+            TenantOverloadedError: If the tenant's queue is full
+
+        """
+        state = self._tenant(tenant)
+        if not self._can_admit_now(state, priority):
+            self._check_queue_limits(tenant, state)
+
+    async def acquire(
+        self,
+        tenant: str = DEFAULT_TENANT,
+        priority: RunPriority = RunPriority.HIGH,
+        *,
+        wait_for_capacity: bool = False,
+    ) -> float:
+        """Acquire a slot, waiting in the queue of the run's lane if none is free.
+
+        Args:
+            tenant: Tenant the run belongs to
+            priority: Lane the run executes in
+            wait_for_capacity: Wait even if the queue is full, for callers that
+                already bound their own concurrency such as background jobs
+
+        Returns:
+            The time spent waiting for the slot in seconds
+
+        Raises:
+            ServiceOverloadedError: If the queue is full
+            TenantOverloadedError: If the tenant's queue is full
+
+        """
+        state = self._tenant(tenant)
+        lane = self._lanes[priority]
+        if self._can_admit_now(state, priority):
+            start_tag, _ = self._tag(state)
+            self._admit(state, priority, start_tag)
+            return 0.0
+
+        if not wait_for_capacity:
+            self._check_queue_limits(tenant, state)
+
+        start_tag, finish_tag = self._tag(state)
+        self._sequence += 1
+        waiter = _Waiter(
+            start_tag=start_tag,
+            finish_tag=finish_tag,
+            sequence=self._sequence,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        state.waiters[priority].append(waiter)
+        self._queued += 1
+        lane.queued += 1
+        start_time = time.perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over just before cancellation, pass it on
+                self.release(tenant, priority)
+            elif waiter in state.waiters[priority]:
+                state.waiters[priority].remove(waiter)
+                self._queued -= 1
+                lane.queued -= 1
+                # Low priority runs may have waited for this high priority run to be admitted
+                self._dispatch()
+            raise
+
+        queue_time = time.perf_counter() - start_time
+        self.total_queue_time += queue_time
+        state.total_queue_time += queue_time
+        lane.total_queue_time += queue_time
+        return queue_time
+
+    def release(
+        self, tenant: str = DEFAULT_TENANT, priority: RunPriority = RunPriority.HIGH
+    ) -> None:
+        """Release a slot, handing free slots to the waiting runs with the earliest tags."""
+        state = self._tenant(tenant)
+        self._in_flight -= 1
+        state.in_flight -= 1
+        self._lanes[priority].in_flight -= 1
+        self._dispatch()
+
+    def _tenant(self, tenant: str) -> _TenantState:
+        """Get the state of a tenant, creating it on its first run."""
+        state = self._tenants.get(tenant)
+        if state is None:
+            limits = self._tenant_limits.get(tenant, self._default_tenant_limits)
+            state = self._tenants[tenant] = _TenantState(limits=limits)
+        return state
+
+    def _lane_has_capacity(self, priority: RunPriority) -> bool:
+        """Whether a free slot may be given to a run of a lane."""
+        if self._in_flight >= self._max_in_flight:
+            return False
+        if priority is RunPriority.HIGH:
+            return True
+        high = self._lanes[RunPriority.HIGH]
+        if self._low_priority_borrowing and not high.in_flight and not high.queued:
+            return True
+        return self._lanes[RunPriority.LOW].in_flight < (
+            self._max_in_flight - self._reserved_high_priority
+        )
+
+    def _can_admit_now(self, state: _TenantState, priority: RunPriority) -> bool:
+        """Whether a new run of a tenant gets a slot without queueing."""
+        return (
+            self._lane_has_capacity(priority) and state.has_capacity and not state.waiters[priority]
+        )
+
+    def _check_queue_limits(self, tenant: str, state: _TenantState) -> None:
+        """Reject a run that would have to queue beyond the tenant or the global limit."""
+        if state.limits.max_queued is not None and state.queued >= state.limits.max_queued:
+            self.rejected += 1
+            state.rejected += 1
+            raise TenantOverloadedError(tenant, self._retry_after_seconds)
+        if self._queued >= self._max_queued:
+            self.rejected += 1
+            state.rejected += 1
+            raise ServiceOverloadedError(self._retry_after_seconds)
+
+    def _tag(self, state: _TenantState) -> tuple[float, float]:
+        """Get the virtual start and finish times of a new run of a tenant."""
+        start_tag = max(self._virtual_time, state.finish_tag)
+        state.finish_tag = start_tag + 1 / state.limits.weight
+        return start_tag, state.finish_tag
+
+    def _admit(self, state: _TenantState, priority: RunPriority, start_tag: float) -> None:
+        """Give a slot to a run of a tenant."""
+        lane = self._lanes[priority]
+        self._in_flight += 1
+        state.in_flight += 1
+        state.admitted += 1
+        lane.in_flight += 1
+        lane.admitted += 1
+        self.admitted += 1
+        self._virtual_time = max(self._virtual_time, start_tag)
+
+    def _next_waiter(self) -> tuple[_TenantState, RunPriority] | None:
+        """Find the waiting run to admit next: the lanes in priority order, then earliest tag."""
+        for priority in RunPriority:
+            if not self._lane_has_capacity(priority):
+                continue
+            eligible = [
+                state
+                for state in self._tenants.values()
+                if state.waiters[priority] and state.has_capacity
+            ]
+            if eligible:
+                waiters = [(state.waiters[priority][0], state) for state in eligible]
+                _, state = min(waiters, key=lambda item: (item[0].finish_tag, item[0].sequence))
+                return state, priority
+        return None
+
+    def _dispatch(self) -> None:
+        """Admit waiting runs while slots are free."""
+        while (next_waiter := self._next_waiter()) is not None:
+            state, priority = next_waiter
+            waiter = state.waiters[priority].popleft()
+            self._queued -= 1
+            self._lanes[priority].queued -= 1
+            if waiter.future.done():
+                # Cancelled, its caller has not resumed yet to leave the queue
+                continue
+            self._admit(state, priority, waiter.start_tag)
+            waiter.future.set_result(None)
+
+    def stats(self) -> dict[str, float]:
+        """Get the current occupancy and admission counters."""
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_in_flight": self._max_in_flight,
+            "max_queued": self._max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "total_queue_time": self.total_queue_time,
+        }
+
+    def tenant_stats(self) -> dict[str, dict[str, float]]:
+        """Get the current occupancy and admission counters of every tenant seen so far."""
+        return {
+            tenant: {
+                "in_flight": state.in_flight,
+                "queued": state.queued,
+                "admitted": state.admitted,
+                "rejected": state.rejected,
+                "total_queue_time": state.total_queue_time,
+            }
+            for tenant, state in list(self._tenants.items())
+        }
+
+    def lane_stats(self) -> dict[str, dict[str, float]]:
+        """Get the current occupancy and admission counters of every priority lane."""
+        return {
+            str(priority): {
+                "in_flight": lane.in_flight,
+                "queued": lane.queued,
+                "admitted": lane.admitted,
+                "total_queue_time": lane.total_queue_time,
+            }
+            for priority, lane in self._lanes.items()
+        }
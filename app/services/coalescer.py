@@ -0,0 +1,89 @@
+"""Coalescing of identical runs executing at the same time."""
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Execution(Generic[T]):
+    """An execution in flight and the number of callers waiting for it."""
+
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class RequestCoalescer(Generic[T]):
+    """Shares one execution between concurrent callers with the same key.
+
+    The first caller of a key starts the execution as a task, and callers
+    arriving while it is in flight wait for the same task and receive its
+    result or exception. The execution is only cancelled once every caller
+    waiting for it has gone away, so one client disconnecting does not fail
+    the others.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self._executions: dict[str, _Execution[T]] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: str,
+        execute: Callable[[], Coroutine[Any, Any, T]],
+        *,
+        deadline: float | None = None,
+    ) -> tuple[T, bool]:
+        """Run an execution, or wait for the identical one already in flight.
+
+        Args:
+            key: Key identifying identical executions
+            execute: Function starting the execution, called if none is in flight
+            deadline: Seconds a caller joining an execution in flight waits for it
+
+        Returns:
+            The result of the execution and whether it was shared with an
+            execution already in flight
+
+        Raises:
+            TimeoutError: If the execution joined did not finish before the deadline
+
+        """
+        execution = self._executions.get(key)
+        coalesced = execution is not None
+        if execution is None:
+            execution = _Execution(task=asyncio.create_task(execute()))
+            self._executions[key] = execution
+            execution.task.add_done_callback(lambda _: self._forget(key, execution))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        execution.waiters += 1
+        try:
+            async with asyncio.timeout(deadline if coalesced else None):
+                return await asyncio.shield(execution.task), coalesced
+        finally:
+            execution.waiters -= 1
+            if execution.waiters == 0 and not execution.task.done():
+                # Nobody is waiting for the result anymore
+                self._forget(key, execution)
+                execution.task.cancel()
+
+    def _forget(self, key: str, execution: _Execution[T]) -> None:
+        """Stop sharing an execution with new callers."""
+        if self._executions.get(key) is execution:
+            del self._executions[key]
+
+    def stats(self) -> dict[str, int]:
+        """Get the number of executions in flight, started and shared."""
+        return {
+            "in_flight": len(self._executions),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,61 @@
+"""Rolling error rate of recent runs."""
+
+import time
+
+
+class RollingErrorRate:
+    """Error rate of the runs that finished within a sliding time window.
+
+    The window is split into a fixed number of buckets kept in a ring, so
+    recording a run and reading the rate both take constant time and memory
+    regardless of traffic. Runs are recorded from the event loop, so the ring
+    is never updated concurrently and needs no lock.
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = 12) -> None:
+        """Initialize the window.
+
+        Args:
+            window_seconds: Length of the sliding window in seconds
+            buckets: Number of buckets the window is split into
+
+        """
+        self._bucket_seconds = window_seconds / buckets
+        self._epochs = [-1] * buckets
+        self._totals = [0] * buckets
+        self._errors = [0] * buckets
+
+    def _epoch(self, now: float | None) -> int:
+        return int((time.monotonic() if now is None else now) / self._bucket_seconds)
+
+    def record(self, *, error: bool, now: float | None = None) -> None:
+        """Record a finished run.
+
+        Args:
+            error: Whether the run failed
+            now: Monotonic time of the record, defaults to the current time
+
+        """
+        epoch = self._epoch(now)
+        index = epoch % len(self._epochs)
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._totals[index] = 0
+            self._errors[index] = 0
+        self._totals[index] += 1
+        self._errors[index] += error
+
+    def counts(self, now: float | None = None) -> tuple[int, int]:
+        """Get the number of runs and failed runs within the window."""
+        oldest = self._epoch(now) - len(self._epochs)
+        total = errors = 0
+        for index, epoch in enumerate(self._epochs):
+            if epoch > oldest:
+                total += self._totals[index]
+                errors += self._errors[index]
+        return total, errors
+
+    def rate(self, now: float | None = None) -> float | None:
+        """Get the share of failed runs within the window, or None if there were no runs."""
+        total, errors = self.counts(now)
+        return errors / total if total else None
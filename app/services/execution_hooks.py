@@ -0,0 +1,107 @@
+"""Portia execution hooks that report plan progress to the current run."""
+
+import time
+from typing import TYPE_CHECKING
+
+from fastapi.encoders import jsonable_encoder
+from portia.execution_hooks import BeforeStepExecutionOutcome, ExecutionHooks
+
+from app.exceptions import RunCancelledError
+from app.services.metrics import RUN_STAGE_SECONDS
+from app.services.run_context import current_run
+from app.services.tracing import record_span
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from portia import Plan, PlanRun, Tool
+    from portia.clarification import Clarification
+    from portia.execution_agents.output import Output
+    from portia.plan import Step
+
+
+def _before_plan_run(plan: "Plan", _: "PlanRun") -> None:
+    """Report the generated plan and how long planning took."""
+    run_context = current_run.get()
+    if run_context is None:
+        return
+    if run_context.started_at is not None:
+        planning_time = time.perf_counter() - run_context.started_at
+        RUN_STAGE_SECONDS.observe(planning_time, stage="planning")
+        record_span("planning", planning_time, plan_id=str(plan.id))
+    run_context.emit(
+        "plan_created",
+        {
+            "plan_id": str(plan.id),
+            "steps": [
+                {"task": step.task, "tool_id": step.tool_id, "output": step.output}
+                for step in plan.steps
+            ],
+        },
+    )
+
+
+def _before_step_execution(
+    _: "Plan", plan_run: "PlanRun", step: "Step"
+) -> BeforeStepExecutionOutcome:
+    """Stop cancelled runs, otherwise report that a step is starting."""
+    run_context = current_run.get()
+    if run_context is not None:
+        if run_context.cancelled.is_set():
+            raise RunCancelledError("Run was cancelled before its next step")
+        run_context.step_started_at = time.perf_counter()
+        run_context.emit(
+            "step_started",
+            {
+                "step_index": plan_run.current_step_index,
+                "task": step.task,
+                "tool_id": step.tool_id,
+            },
+        )
+    return BeforeStepExecutionOutcome.CONTINUE
+
+
+def _after_step_execution(_: "Plan", plan_run: "PlanRun", step: "Step", output: "Output") -> None:
+    """Report that a step has finished along with its output and duration."""
+    run_context = current_run.get()
+    if run_context is None:
+        return
+    if run_context.step_started_at is not None:
+        step_time = time.perf_counter() - run_context.step_started_at
+        RUN_STAGE_SECONDS.observe(step_time, stage="step")
+        record_span(
+            "step", step_time, step_index=plan_run.current_step_index, tool_id=step.tool_id or ""
+        )
+    run_context.emit(
+        "step_completed",
+        {
+            "step_index": plan_run.current_step_index,
+            "task": step.task,
+            "tool_id": step.tool_id,
+            "output": jsonable_encoder(output),
+        },
+    )
+
+
+def _before_tool_call(
+    _: "Tool", __: "dict[str, Any]", ___: "PlanRun", ____: "Step"
+) -> "Clarification | None":
+    """Stop cancelled runs before they call another tool."""
+    run_context = current_run.get()
+    if run_context is not None and run_context.cancelled.is_set():
+        raise RunCancelledError("Run was cancelled before its next tool call")
+    return None
+
+
+def create_execution_hooks() -> ExecutionHooks:
+    """Create the execution hooks shared by every Portia instance built by the service.
+
+    The hooks are no-ops for runs without a run context, and never prompt for
+    clarifications since there is no CLI user in API usage.
+    """
+    return ExecutionHooks(
+        before_plan_run=_before_plan_run,
+        before_step_execution=_before_step_execution,
+        after_step_execution=_after_step_execution,
+        before_tool_call=_before_tool_call,
+    )
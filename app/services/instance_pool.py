@@ -0,0 +1,102 @@
+"""Bounded LRU pool of Portia SDK instances keyed by tool set."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+ToolSetKey = frozenset[str]
+
+
+def tool_set_key(tools: Iterable[str]) -> ToolSetKey:
+    """Build the canonical pool key for a collection of tool IDs."""
+    return frozenset(tools)
+
+
+class InstancePool(Generic[T]):
+    """Least-recently-used cache of instances keyed by a canonical tool set.
+
+    The pool holds at most ``max_size`` entries. When a new entry would exceed
+    that capacity, the least recently used entry is evicted. Hit, miss and
+    eviction counters are kept for observability.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize the pool.
+
+        Args:
+            max_size: Maximum number of instances kept in the pool
+
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._max_size = max_size
+        self._entries: OrderedDict[ToolSetKey, T] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of instances kept in the pool."""
+        return self._max_size
+
+    def __len__(self) -> int:
+        """Return the number of pooled instances."""
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether an instance is pooled for the given key."""
+        return key in self._entries
+
+    def get(self, key: ToolSetKey) -> T | None:
+        """Get the instance for the given key and mark it as recently used.
+
+        Args:
+            key: Canonical tool set key
+
+        Returns:
+            The pooled instance, or None if there is no entry for the key
+
+        """
+        with self._lock:
+            instance = self._entries.get(key)
+            if instance is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return instance
+
+    def put(self, key: ToolSetKey, instance: T) -> None:
+        """Add an instance to the pool, evicting the least recently used entry if full.
+
+        Args:
+            key: Canonical tool set key
+            instance: The instance to pool
+
+        """
+        with self._lock:
+            self._entries[key] = instance
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all pooled instances."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get the pool counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
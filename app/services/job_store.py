@@ -0,0 +1,188 @@
+"""In-process store for asynchronously executed run jobs."""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+from app.exceptions import JobNotFoundError, JobStoreFullError
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    """Lifecycle states of a run job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has reached a terminal state."""
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+@dataclass
+class Job:
+    """A query submitted for asynchronous execution."""
+
+    query: str
+    tools: list[str]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Any | None = None
+    error: str | None = None
+    execution_time: float | None = None
+    task: "asyncio.Task[None] | None" = field(default=None, repr=False)
+
+
+JobRunner = Callable[[Job], Awaitable[dict[str, Any]]]
+
+
+class JobStore:
+    """Bounded in-memory store that runs jobs as background tasks.
+
+    Finished jobs are retained for ``retention_seconds`` and at most
+    ``max_retained`` jobs are kept in total; the oldest finished jobs are
+    dropped first. At most ``max_concurrency`` jobs run at the same time, the
+    rest wait in the pending state, and at most ``max_pending`` jobs are
+    unfinished at once.
+    """
+
+    def __init__(
+        self,
+        max_retained: int,
+        retention_seconds: float,
+        max_concurrency: int,
+        max_pending: int | None = None,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            max_retained: Maximum number of jobs kept in the store
+            retention_seconds: How long finished jobs are kept
+            max_concurrency: Maximum number of jobs running at the same time
+            max_pending: Maximum number of unfinished jobs, limited only by
+                ``max_retained`` if None
+
+        """
+        self._max_retained = max_retained
+        self._max_pending = min(max_pending or max_retained, max_retained)
+        self._retention_seconds = retention_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._jobs: dict[str, Job] = {}
+        # Finished job IDs in the order they finished, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of retained jobs."""
+        return len(self._jobs)
+
+    def submit(self, query: str, tools: list[str], runner: JobRunner) -> Job:
+        """Create a job and schedule it for execution.
+
+        Args:
+            query: The query to execute
+            tools: List of tool IDs to use
+            runner: Coroutine function executing the job and returning a run result
+
+        Returns:
+            The newly created job
+
+        Raises:
+            JobStoreFullError: If the store holds the maximum number of unfinished jobs
+
+        """
+        self.prune()
+        if len(self._jobs) >= self._max_retained:
+            raise JobStoreFullError(self._max_retained)
+        if len(self._jobs) - len(self._finished) >= self._max_pending:
+            raise JobStoreFullError(self._max_pending)
+
+        job = Job(query=query, tools=tools)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._execute(job, runner))
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Get a job by ID.
+
+        Raises:
+            JobNotFoundError: If the job does not exist or is no longer retained
+
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancel a pending or running job. Cancelling a finished job has no effect.
+
+        Raises:
+            JobNotFoundError: If the job does not exist or is no longer retained
+
+        """
+        job = self.get(job_id)
+        if not job.status.is_finished:
+            if job.task is not None:
+                job.task.cancel()
+            self._finish(job, JobStatus.CANCELLED, error="Job was cancelled")
+        return job
+
+    def prune(self) -> None:
+        """Drop expired finished jobs, then the oldest finished jobs while the store is full."""
+        expire_before = time.time() - self._retention_seconds
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at >= expire_before and len(self._jobs) < self._max_retained:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
+
+    def stats(self) -> dict[str, int]:
+        """Get the number of retained jobs by status."""
+        counts = dict.fromkeys(JobStatus, 0)
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {status.value: count for status, count in counts.items()}
+
+    async def _execute(self, job: Job, runner: JobRunner) -> None:
+        """Run a job once a concurrency slot is available and record its outcome."""
+        try:
+            async with self._semaphore:
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                result = await runner(job)
+        except asyncio.CancelledError:
+            self._finish(job, JobStatus.CANCELLED, error="Job was cancelled")
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            self._finish(job, JobStatus.FAILED, error=str(e))
+        else:
+            job.result = result.get("result")
+            job.execution_time = result.get("execution_time")
+            status = JobStatus.SUCCEEDED if result["success"] else JobStatus.FAILED
+            self._finish(job, status, error=result.get("error"))
+
+    def _finish(self, job: Job, status: JobStatus, error: str | None = None) -> None:
+        """Move a job to a terminal state unless it already reached one."""
+        if job.status.is_finished:
+            return
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.task = None
+        self._finished[job.id] = job.finished_at
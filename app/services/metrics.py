@@ -0,0 +1,300 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms keep one shard of values per thread. Recording a
+value only touches the calling thread's shard, so the request path never
+contends on a lock; the shards are summed when the metrics are scraped.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import TypeVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class MetricSnapshot:
+    """The samples of a metric family at scrape time.
+
+    Attributes:
+        name: Metric family name
+        help: Description of the metric
+        type: Prometheus metric type (``counter``, ``gauge`` or ``histogram``)
+        samples: ``(sample name, labels, value)`` triples
+
+    """
+
+    name: str
+    help: str
+    type: str
+    samples: list[tuple[str, dict[str, str], float]] = field(default_factory=list)
+
+
+class _ShardedMetric:
+    """Metric whose values are kept in one shard per thread."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: list[dict[LabelValues, list[float]]] = []
+        # Only taken when a thread records its first value
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict[LabelValues, list[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _label_values(self, labels: Mapping[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merged(self) -> dict[LabelValues, list[float]]:
+        """Sum the shards of all threads."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: dict[LabelValues, list[float]] = {}
+        for shard in shards:
+            for label_values, values in shard.copy().items():
+                total = merged.setdefault(label_values, [0.0] * len(values))
+                for index, value in enumerate(list(values)):
+                    total[index] += value
+        return merged
+
+    def _labels(self, label_values: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, label_values, strict=True))
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing counter."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter for the given labels."""
+        values = self._shard().setdefault(self._label_values(labels), [0.0])
+        values[0] += amount
+
+    def value(self, **labels: str) -> float:
+        """Get the current total for the given labels."""
+        return self._merged().get(self._label_values(labels), [0.0])[0]
+
+    def collect(self) -> MetricSnapshot:
+        """Get the counter samples."""
+        return MetricSnapshot(
+            name=self.name,
+            help=self.documentation,
+            type=self.type,
+            samples=[
+                (f"{self.name}_total", self._labels(label_values), values[0])
+                for label_values, values in sorted(self._merged().items())
+            ],
+        )
+
+
+class Histogram(_ShardedMetric):
+    """Histogram of observed values with fixed bucket boundaries."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: Metric family name
+            documentation: Description of the metric
+            labelnames: Names of the labels of the metric
+            buckets: Upper bounds of the buckets, a +Inf bucket is always added
+
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for the given labels."""
+        # Per-bucket counts, then the +Inf bucket, the sum and the count
+        shard = self._shard()
+        label_values = self._label_values(labels)
+        values = shard.get(label_values)
+        if values is None:
+            values = shard[label_values] = [0.0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the managed block in seconds."""
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start_time, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Get the number of observations for the given labels."""
+        values = self._merged().get(self._label_values(labels))
+        return int(values[-1]) if values else 0
+
+    def collect(self) -> MetricSnapshot:
+        """Get the cumulative bucket, sum and count samples."""
+        samples: list[tuple[str, dict[str, str], float]] = []
+        for label_values, values in sorted(self._merged().items()):
+            labels = self._labels(label_values)
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), values, strict=False):
+                cumulative += count
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative)
+                )
+            samples.append((f"{self.name}_sum", labels, values[-2]))
+            samples.append((f"{self.name}_count", labels, values[-1]))
+        return MetricSnapshot(
+            name=self.name, help=self.documentation, type=self.type, samples=samples
+        )
+
+
+def snapshot(
+    name: str,
+    documentation: str,
+    values: float | Mapping[tuple[tuple[str, str], ...], float],
+    metric_type: str = "gauge",
+) -> MetricSnapshot:
+    """Build a snapshot of values read at scrape time, e.g. from a ``stats()`` method.
+
+    Args:
+        name: Metric family name
+        documentation: Description of the metric
+        values: A single value, or values keyed by ``(label name, label value)`` pairs
+        metric_type: ``gauge``, or ``counter`` for cumulative values
+
+    """
+    if not isinstance(values, Mapping):
+        values = {(): values}
+    sample_name = f"{name}_total" if metric_type == "counter" else name
+    return MetricSnapshot(
+        name=name,
+        help=documentation,
+        type=metric_type,
+        samples=[(sample_name, dict(labels), value) for labels, value in values.items()],
+    )
+
+
+MetricT = TypeVar("MetricT", Counter, Histogram)
+
+
+class MetricsRegistry:
+    """Collection of the metrics exposed by the application."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        """Add a metric to the registry and return it."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> list[MetricSnapshot]:
+        """Get the samples of all registered metrics."""
+        return [metric.collect() for metric in self._metrics.values()]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(snapshots: Iterable[MetricSnapshot]) -> str:
+    """Render metric snapshots in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    for snapshot in snapshots:
+        lines.append(f"# HELP {snapshot.name} {snapshot.help}")
+        lines.append(f"# TYPE {snapshot.name} {snapshot.type}")
+        for sample_name, labels, value in snapshot.samples:
+            if labels:
+                label_text = ",".join(
+                    f'{name}="{_escape_label_value(label)}"' for name, label in labels.items()
+                )
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+RUN_STAGE_SECONDS = registry.register(
+    Histogram(
+        "portia_run_stage_duration_seconds",
+        "Duration of the stages of a run: queue, instance_lookup, instance_build, planning, "
+        "step and total",
+        labelnames=("stage",),
+    )
+)
+TENANT_RUN_SECONDS = registry.register(
+    Histogram(
+        "portia_tenant_run_duration_seconds",
+        "Queue time and total duration of runs by tenant",
+        labelnames=("tenant", "stage"),
+    )
+)
+LANE_QUEUE_SECONDS = registry.register(
+    Histogram(
+        "portia_lane_queue_duration_seconds",
+        "Time runs waited for an executor slot by priority lane",
+        labelnames=("lane",),
+    )
+)
+RUNS = registry.register(
+    Counter(
+        "portia_runs",
+        "Runs by tool set and outcome (success, error, timeout, abandoned, rejected)",
+        labelnames=("tool_set", "outcome"),
+    )
+)
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "portia_http_request_duration_seconds",
+        "Latency of HTTP requests by method, route and status code",
+        labelnames=("method", "route", "status"),
+    )
+)
+TOOL_INDEX_REFRESH_SECONDS = registry.register(
+    Histogram(
+        "portia_tool_index_refresh_duration_seconds",
+        "Duration of tool index refreshes by result (success or failure)",
+        labelnames=("result",),
+    )
+)
@@ -0,0 +1,256 @@
+"""Process-wide registry of LLM models and their pooled HTTP clients.
+
+Portia resolves model names from its configuration into new model objects, each
+with its own HTTP clients, whenever an agent needs a model. Every Portia
+instance built by the service shares one configuration, so the registry
+resolves the configured models once, keyed by provider, model and endpoint,
+and puts the shared model objects in the configuration. Models of providers
+with an OpenAI-compatible client also share tuned HTTP clients per endpoint,
+so rebuilding Portia instances keeps warm TLS connections and a process opens
+at most ``llm_http_max_connections`` connections per endpoint.
+"""
+
+import functools
+import importlib.util
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from portia import Config
+    from portia.model import GenerativeModel
+
+logger = logging.getLogger(__name__)
+
+# Model fields of the Portia configuration resolved by the registry
+MODEL_FIELDS = (
+    "default_model",
+    "planning_model",
+    "execution_model",
+    "introspection_model",
+    "summarizer_model",
+)
+
+DEFAULT_OPENAI_ENDPOINT = "https://api.openai.com/v1"
+
+# Configuration fields holding the endpoint of providers with a configurable endpoint
+_ENDPOINT_FIELDS = {
+    "azure-openai": "azure_openai_endpoint",
+    "ollama": "ollama_base_url",
+}
+
+
+@dataclass
+class _HttpClients:
+    """The shared sync and async HTTP clients of an endpoint."""
+
+    sync: httpx.Client
+    async_: httpx.AsyncClient
+
+
+def _pool_connections(client: httpx.Client | httpx.AsyncClient) -> tuple[int, int] | None:
+    """Count the open and the idle connections in the connection pool of a client.
+
+    httpx does not expose its connection pool, so the counts are read from the
+    private httpcore pool of the transport. Returns None if a version of httpx or
+    httpcore does not have the expected attributes.
+    """
+    transport = getattr(client, "_transport", None)
+    pool = getattr(transport, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    try:
+        connections = list(connections)
+        return len(connections), sum(1 for connection in connections if connection.is_idle())
+    except (AttributeError, TypeError):
+        return None
+
+
+class ModelClientRegistry:
+    """Shared model objects keyed by provider, model and endpoint."""
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool = False,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            max_connections: Maximum number of connections per endpoint and client
+            max_keepalive_connections: Maximum number of idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept alive
+            http2: Negotiate HTTP/2 with endpoints supporting it, requires the h2 package
+
+        """
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self._http2:
+            logger.warning("HTTP/2 requires the h2 package, using HTTP/1.1 for LLM clients")
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[str, str], _HttpClients] = {}
+        self._models: dict[tuple[str, str, str], GenerativeModel] = {}
+        self.hits = 0
+        self.builds = 0
+
+    @classmethod
+    def from_settings(cls) -> "ModelClientRegistry":
+        """Create a registry configured by the application settings."""
+        return cls(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+            http2=settings.llm_http2,
+        )
+
+    def share_models(self, config: "Config") -> "Config":
+        """Get a copy of a Portia configuration using the shared model objects.
+
+        Models that cannot be resolved are left to the SDK, which resolves them
+        on use as before.
+
+        Args:
+            config: The Portia configuration
+
+        Returns:
+            The configuration with its model names replaced by shared models
+
+        """
+        shared: dict[str, Any] = {}
+        for field in MODEL_FIELDS:
+            try:
+                model_string = _model_string(config, field)
+                if model_string is not None:
+                    shared[field] = self.model(config, model_string)
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"Failed to share the {field}, resolving it on use: {e}")
+        if not shared:
+            return config
+        return config.model_copy(update={"models": config.models.model_copy(update=shared)})
+
+    def model(self, config: "Config", model_string: str) -> "GenerativeModel":
+        """Get the shared model object of a ``provider/model`` string.
+
+        Args:
+            config: The Portia configuration providing API keys and endpoints
+            model_string: The model, e.g. ``openai/gpt-4.1``
+
+        Returns:
+            The model object, built on first use
+
+        """
+        provider, model_name = model_string.split("/", maxsplit=1)
+        key = (provider, model_name, _endpoint(config, provider))
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.hits += 1
+                return model
+            model = self._build_model(config, *key)
+            self._models[key] = model
+            self.builds += 1
+            return model
+
+    def _build_model(
+        self, config: "Config", provider: str, model_name: str, endpoint: str
+    ) -> "GenerativeModel":
+        """Build a model object, with the shared HTTP clients of its endpoint if supported."""
+        if provider == "openai":
+            # Imported here, since the Portia SDK is only imported once the service starts
+            from portia.model import OpenAIGenerativeModel  # noqa: PLC0415
+
+            clients = self._http_clients(provider, endpoint)
+            return OpenAIGenerativeModel(
+                model_name=model_name,
+                api_key=config.must_get_api_key("openai_api_key"),
+                http_client=clients.sync,
+                http_async_client=clients.async_,
+            )
+        return config.get_generative_model(f"{provider}/{model_name}")
+
+    def _http_clients(self, provider: str, endpoint: str) -> _HttpClients:
+        """Get the shared HTTP clients of an endpoint, creating them on first use."""
+        clients = self._clients.get((provider, endpoint))
+        if clients is None:
+            clients = _HttpClients(
+                sync=httpx.Client(limits=self._limits, http2=self._http2),
+                async_=httpx.AsyncClient(limits=self._limits, http2=self._http2),
+            )
+            self._clients[(provider, endpoint)] = clients
+        return clients
+
+    def stats(self) -> dict[str, Any]:
+        """Get the model counters and the connection pool usage of every endpoint.
+
+        Pools whose usage cannot be read are left out.
+        """
+        pools = []
+        for (provider, endpoint), clients in list(self._clients.items()):
+            for client_type, client in (("sync", clients.sync), ("async", clients.async_)):
+                usage = _pool_connections(client)
+                if usage is None:
+                    continue
+                connections, idle = usage
+                pools.append(
+                    {
+                        "pool": f"{provider} {endpoint}",
+                        "client": client_type,
+                        "connections": connections,
+                        "idle": idle,
+                    }
+                )
+        return {
+            "models": len(self._models),
+            "hits": self.hits,
+            "builds": self.builds,
+            "max_connections": self._limits.max_connections,
+            "pools": pools,
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP clients."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._models.clear()
+        for client in clients:
+            client.sync.close()
+            await client.async_.aclose()
+
+
+def _model_string(config: "Config", field: str) -> str | None:
+    """Get the ``provider/model`` string configured for a model field, if it is one.
+
+    The default model is resolved by the SDK from the LLM provider when it is not set.
+    """
+    model = getattr(config.models, field, None)
+    if field == "default_model" and model is None:
+        model = str(config.get_default_model())
+    return model if isinstance(model, str) else None
+
+
+def _endpoint(config: "Config", provider: str) -> str:
+    """Get the endpoint models of a provider connect to."""
+    if provider == "openai":
+        return os.environ.get("OPENAI_BASE_URL") or DEFAULT_OPENAI_ENDPOINT
+    field = _ENDPOINT_FIELDS.get(provider)
+    return str(getattr(config, field, None) or "") if field else ""
+
+
+@functools.cache
+def get_model_client_registry() -> ModelClientRegistry:
+    """Get the model client registry of this process."""
+    return ModelClientRegistry.from_settings()
@@ -0,0 +1,180 @@
+"""Cache of Portia plans reused for repeated queries and query templates."""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+from app.services.instance_pool import ToolSetKey
+
+if TYPE_CHECKING:
+    from portia import Plan
+
+# Quoted strings and numbers are treated as the parameters of a query template.
+# Single quotes only count when they are not part of a word, so "What's" is not a quote.
+_PARAMETER_PATTERN = re.compile(r"\"[^\"]*\"|(?<!\w)'[^']*'(?!\w)|(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+
+
+class PlanCacheStrategy(StrEnum):
+    """How queries are matched to cached plans.
+
+    ``exact`` reuses a plan for queries that only differ in whitespace.
+    ``template`` also reuses it for queries that only differ in quoted strings
+    and numbers, which are passed to the cached plan as plan inputs.
+    """
+
+    EXACT = "exact"
+    TEMPLATE = "template"
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    """A query normalized for plan caching.
+
+    Attributes:
+        text: The normalized query, with parameters replaced by ``$param_<n>`` for templates
+        values: Values of the parameters in the order they appear in the query
+
+    """
+
+    text: str
+    values: tuple[str, ...] = ()
+
+    @property
+    def parameters(self) -> dict[str, str]:
+        """Map of plan input names to their values."""
+        return {f"param_{index}": value for index, value in enumerate(self.values)}
+
+
+def normalize_query(query: str, strategy: PlanCacheStrategy) -> QueryTemplate:
+    """Normalize a query into the template used to look up its plan.
+
+    Args:
+        query: The query to normalize
+        strategy: The normalization strategy
+
+    Returns:
+        The query template
+
+    """
+    text = " ".join(query.split())
+    if strategy == PlanCacheStrategy.EXACT:
+        return QueryTemplate(text=text)
+
+    values: list[str] = []
+
+    def to_parameter(match: re.Match[str]) -> str:
+        value = match.group()
+        if value[0] in "\"'":
+            value = value[1:-1]
+        values.append(value)
+        return f"$param_{len(values) - 1}"
+
+    return QueryTemplate(text=_PARAMETER_PATTERN.sub(to_parameter, text), values=tuple(values))
+
+
+@dataclass
+class CachedPlan:
+    """A cached plan together with the time it took to generate."""
+
+    plan: "Plan"
+    planning_time: float
+    created_at: float
+
+
+class PlanCache:
+    """Least-recently-used cache of plans keyed by tool set and query template.
+
+    Holds at most ``max_entries`` plans, each for at most ``ttl_seconds``.
+    Lookups and inserts happen on executor threads, so access is guarded by a lock.
+    """
+
+    def __init__(self, strategy: PlanCacheStrategy, max_entries: int, ttl_seconds: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            strategy: How queries are matched to cached plans
+            max_entries: Maximum number of plans kept
+            ttl_seconds: How long plans are reused
+
+        """
+        self.strategy = strategy
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[ToolSetKey, str], CachedPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.planning_time_saved = 0.0
+
+    def __len__(self) -> int:
+        """Return the number of cached plans."""
+        return len(self._entries)
+
+    def get(self, tools: ToolSetKey, template: QueryTemplate) -> "Plan | None":
+        """Get the plan for a tool set and query template.
+
+        Args:
+            tools: Canonical tool set key
+            template: The normalized query
+
+        Returns:
+            The cached plan, or None if there is no unexpired plan
+
+        """
+        key = (tools, template.text)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.time() - cached.created_at >= self._ttl_seconds:
+                del self._entries[key]
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.planning_time_saved += cached.planning_time
+            return cached.plan
+
+    def put(
+        self, tools: ToolSetKey, template: QueryTemplate, plan: "Plan", planning_time: float
+    ) -> None:
+        """Add a plan, evicting the least recently used plan if the cache is full.
+
+        Args:
+            tools: Canonical tool set key
+            template: The normalized query
+            plan: The plan generated for the query
+            planning_time: Seconds it took to generate the plan
+
+        """
+        key = (tools, template.text)
+        with self._lock:
+            self._entries[key] = CachedPlan(
+                plan=plan, planning_time=planning_time, created_at=time.time()
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached plans."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Get the cache counters and the total planning time saved."""
+        return {
+            "strategy": self.strategy.value,
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "planning_time_saved": round(self.planning_time_saved, 3),
+        }
@@ -1,18 +1,104 @@
 """Portia SDK service integration."""
 
 import asyncio
+import contextvars
+import functools
+import importlib
+import inspect
 import logging
+import math
+import multiprocessing
 import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import ClassVar
+from collections.abc import AsyncIterator, Coroutine, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
 
-from portia import DefaultToolRegistry, Portia, Tool
+import orjson
 
-from app.config import settings
-from app.exceptions import InvalidToolsError
+from app.config import available_cpus, settings
+from app.exceptions import InvalidToolsError, RunTimeoutError, ServiceOverloadedError
+from app.logging_config import SAMPLED
+from app.services.admission import AdmissionController, RunPriority
+from app.services.coalescer import RequestCoalescer
+from app.services.error_rate import RollingErrorRate
+from app.services.instance_pool import InstancePool, ToolSetKey, tool_set_key
+from app.services.job_store import Job, JobStore
+from app.services.metrics import (
+    LANE_QUEUE_SECONDS,
+    RUN_STAGE_SECONDS,
+    RUNS,
+    TENANT_RUN_SECONDS,
+    MetricSnapshot,
+    snapshot,
+)
+from app.services.model_clients import get_model_client_registry
+from app.services.plan_cache import PlanCache, PlanCacheStrategy, QueryTemplate, normalize_query
+from app.services.result_cache import (
+    RESULT_CACHE_CONFIG_FIELDS,
+    CachePolicy,
+    CacheStatus,
+    create_result_cache,
+    result_cache_key,
+)
+from app.services.run_context import RunContext, RunEvent, current_run
+from app.services.tenancy import default_tenant_limits, get_tenant, tenant_limits
+from app.services.tool_index import ToolIndex
+from app.services.tracing import span
+
+if TYPE_CHECKING:
+    # Imported at runtime by _import_lazy, these imports are for type checkers only
+    from portia import (  # noqa: TC004
+        Config,
+        DefaultToolRegistry,
+        Plan,
+        PlanInput,
+        PlanRun,
+        Portia,
+        Tool,
+    )
+
+    from app.services import process_worker  # noqa: TC004
+    from app.services.execution_hooks import create_execution_hooks  # noqa: TC004
 
 logger = logging.getLogger(__name__)
 
+# Names imported on first use rather than with this module, since importing the Portia
+# SDK also imports every LLM client library and dominates application startup time
+_LAZY_IMPORTS: dict[str, tuple[str, str | None]] = {
+    "DefaultToolRegistry": ("portia", "DefaultToolRegistry"),
+    "PlanInput": ("portia", "PlanInput"),
+    "Portia": ("portia", "Portia"),
+    "Tool": ("portia", "Tool"),
+    "create_execution_hooks": ("app.services.execution_hooks", "create_execution_hooks"),
+    "process_worker": ("app.services.process_worker", None),
+}
+
+
+def _import_lazy(name: str) -> Any:  # noqa: ANN401
+    """Import a lazily imported name into this module, keeping a value already set.
+
+    Values set beforehand, e.g. by ``unittest.mock.patch``, take precedence.
+    """
+    module_name, attribute = _LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name)
+    return globals().setdefault(name, module if attribute is None else getattr(module, attribute))
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Import the lazily imported names on first attribute access."""
+    if name in _LAZY_IMPORTS:
+        return _import_lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Query planned by the warm-up dry run, answered without tools
+WARMUP_QUERY = "Reply with the word ready."
+
+# Share of MAX_QUEUED_RUNS at which an instance reports not ready by default, so load
+# balancers drain it before its queue is full and runs are rejected
+READINESS_QUEUE_FRACTION = 0.5
+
 
 class PortiaService:
     """Singleton service for interacting with the Portia SDK.
@@ -37,17 +123,231 @@ class PortiaService:
         return cls._instance
 
     def __init__(self) -> None:
-        """Initialize the Portia service."""
+        """Initialize the Portia service.
+
+        Imports the Portia SDK, so that it is loaded during application startup
+        rather than when the application module is imported.
+        """
         if not hasattr(self, "_initialized"):
-            self._config = settings.get_portia_config()
+            for name in _LAZY_IMPORTS:
+                _import_lazy(name)
+            self._config = _portia_config()
             self._initialized = True
-            self._tools: set[str] = set()
-            self._portia_instance: Portia | None = None
+            self._instance_pool: InstancePool[Portia] = InstancePool(
+                max_size=settings.portia_instance_pool_size
+            )
+            self._pending_builds: dict[ToolSetKey, asyncio.Future[Portia]] = {}
+            self._execution_hooks = create_execution_hooks()
+            self._tool_index = ToolIndex(loader=self._load_tools)
+            self._background_tasks: set[asyncio.Task[None]] = set()
+            self._jobs = JobStore(
+                max_retained=settings.job_max_retained,
+                retention_seconds=settings.job_retention_seconds,
+                max_concurrency=settings.job_max_concurrency,
+                max_pending=settings.job_max_pending,
+            )
             self._executor = ThreadPoolExecutor(max_workers=settings.max_workers)
+            self._process_executor = (
+                self._create_process_executor()
+                if settings.execution_backend in ("process", "hybrid")
+                else None
+            )
+            self._timed_out_runs = 0
+            self._abandoned_runs = 0
+            self._recent_errors = RollingErrorRate(settings.readiness_error_window_seconds)
+            self._warm = False
+            self._admission = _create_admission(
+                settings.max_in_flight_runs or self._executor_capacity()
+            )
+            # Runs of the async backend falling back to worker threads are bounded by the
+            # threads, rather than queueing unseen in the thread pool
+            self._thread_admission = (
+                _create_admission(settings.max_workers)
+                if settings.execution_backend == "async"
+                else None
+            )
+            self._plan_cache = (
+                PlanCache(
+                    strategy=PlanCacheStrategy(settings.plan_cache_strategy),
+                    max_entries=settings.plan_cache_max_entries,
+                    ttl_seconds=settings.plan_cache_ttl_seconds,
+                )
+                if settings.plan_cache_enabled
+                else None
+            )
+            self._result_cache = create_result_cache(settings)
+            self._run_key_config = settings.portia_config.model_dump(
+                include=RESULT_CACHE_CONFIG_FIELDS
+            )
+            self._coalescer: RequestCoalescer[dict] | None = (
+                RequestCoalescer() if settings.coalesce_runs else None
+            )
+
+    def _create_process_executor(self) -> ProcessPoolExecutor:
+        """Create the worker processes of the process execution backend."""
+        return ProcessPoolExecutor(
+            max_workers=settings.process_pool_size or available_cpus(),
+            # Spawn rather than fork, since forking a process running threads is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=process_worker.initialize_worker,
+        )
+
+    def _replace_process_executor(self, broken: ProcessPoolExecutor | None) -> None:
+        """Replace a broken process pool.
+
+        Every run in flight fails when a worker process dies, so the pool is only
+        replaced by the first of them; the others find it already replaced.
+        """
+        if broken is None or broken is not self._process_executor:
+            return
+        logger.warning("An execution worker process died, restarting the process pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._process_executor = self._create_process_executor()
+
+    def _executor_capacity(self) -> int:
+        """Get the number of runs the configured execution backend executes at the same time."""
+        if settings.execution_backend == "async":
+            return settings.async_max_concurrent_runs
+        if self._process_executor is None:
+            return settings.max_workers
+        processes = settings.process_pool_size or available_cpus()
+        if settings.execution_backend == "hybrid":
+            return processes + settings.max_workers
+        return processes
+
+    def _runs_in_process(self, run_context: RunContext) -> bool:
+        """Whether a run executes in a worker process rather than a worker thread.
+
+        The hybrid backend keeps streamed runs on threads, since their progress
+        events and cooperative cancellation rely on in-process execution hooks.
+        """
+        if self._process_executor is None:
+            return False
+        return settings.execution_backend == "process" or run_context.on_event is None
+
+    async def _runs_async(self, portia_instance: "Portia", tools: list[str]) -> bool:
+        """Whether a run executes as a task on the event loop rather than in a worker thread.
+
+        With the async backend, runs whose Portia instance offers the async SDK
+        methods and whose tools are all async-capable are awaited on the event
+        loop, so they do not hold a worker thread while waiting on LLM and tool
+        calls. Runs with sync-only tools fall back to the worker threads.
+        """
+        if settings.execution_backend != "async":
+            return False
+        methods = ("arun",) if self._plan_cache is None else ("aplan", "arun_plan")
+        if not all(
+            inspect.iscoroutinefunction(getattr(portia_instance, method, None))
+            for method in methods
+        ):
+            return False
+        available_tools = await self._aget_available_tools_map()
+        return all(_is_async_tool(available_tools.get(tool)) for tool in tools)
+
+    async def start(self) -> None:
+        """Prepare the service for traffic.
 
-    def _get_portia_instance(self, tools: set[str]) -> Portia:
+        Builds the tool index, schedules its background refresh and starts the
+        warm-up of the hot tool sets. The service reports ready once the warm-up
+        has finished or its deadline has passed.
+        """
+        if self._process_executor is not None:
+            _warn_process_backend_limits()
+
+        try:
+            await self.refresh_tool_index()
+        except Exception:
+            logger.exception("Failed to build the tool index at startup, retrying on first use")
+
+        if settings.tool_index_ttl_seconds > 0:
+            self._start_background_task(
+                self._tool_index.run_refresh_loop(settings.tool_index_ttl_seconds)
+            )
+
+        if settings.warmup_tool_sets or self._process_executor is not None:
+            self._start_background_task(self._warm_up())
+        else:
+            self._warm = True
+
+    async def _warm_up(self) -> None:
+        """Build the Portia instances of the hot tool sets and start the worker processes.
+
+        Tool sets are warmed concurrently under the ``warmup_timeout_seconds``
+        deadline. A tool set that fails or misses the deadline is logged and
+        built on first use instead, so warm-up never keeps the service from
+        becoming ready.
+        """
+        start_time = time.perf_counter()
+        warm_ups = [self._warm_up_tool_set(tools) for tools in settings.warmup_tool_sets]
+        if self._process_executor is not None:
+            warm_ups.append(self._warm_up_processes())
+
+        try:
+            async with asyncio.timeout(settings.warmup_timeout_seconds):
+                results = await asyncio.gather(*warm_ups, return_exceptions=True)
+        except TimeoutError:
+            logger.warning(
+                f"Warm-up did not finish within {settings.warmup_timeout_seconds}s, "
+                "remaining tool sets are built on first use"
+            )
+        else:
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Warm-up step failed: {result}")
+            logger.info(f"Warm-up finished in {time.perf_counter() - start_time:.2f}s")
+        finally:
+            self._warm = True
+
+    async def _warm_up_tool_set(self, tools: list[str]) -> None:
+        """Build the Portia instance of a tool set and optionally plan a query with it."""
+        portia_instance = await self._aget_portia_instance(set(tools))
+        if settings.warmup_dry_run:
+            await asyncio.to_thread(portia_instance.plan, WARMUP_QUERY, tools)
+
+    async def _warm_up_processes(self) -> None:
+        """Start the worker processes of the process backends, which warm up as they start."""
+        loop = asyncio.get_running_loop()
+        processes = settings.process_pool_size or available_cpus()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._process_executor, process_worker.warm_up)
+                for _ in range(processes)
+            )
+        )
+
+    async def stop(self) -> None:
+        """Cancel the background tasks, stop the executors and close the caches and clients."""
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+
+        if self._result_cache is not None:
+            await self._result_cache.close()
+
+        if settings.llm_shared_clients:
+            # Portia instances and the configuration hold models of the closed HTTP
+            # clients, so a restarted service builds them again with new clients
+            await get_model_client_registry().aclose()
+            self._instance_pool.clear()
+            self._pending_builds.clear()
+            self._config = _portia_config()
+
+    def _start_background_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a coroutine as a background task owned by the service."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _get_portia_instance(self, tools: set[str]) -> "Portia":
         """Get the Portia SDK instance for the given tools.
 
+        Instances are pooled by tool set, so alternating between tool
+        combinations reuses previously built instances until they are evicted.
+
         Args:
             tools: Set of tool IDs to use
 
@@ -55,74 +355,1080 @@ class PortiaService:
             InvalidToolsError: If requested tools are not available
 
         """
-        if tools == self._tools and self._portia_instance is not None:
-            return self._portia_instance
+        portia_instance = self._instance_pool.get(tool_set_key(tools))
+        if portia_instance is not None:
+            return portia_instance
+
+        return self._build_portia_instance(tools)
+
+    async def _aget_portia_instance(self, tools: set[str]) -> "Portia":
+        """Get the Portia SDK instance for the given tools without blocking the event loop.
+
+        Cache misses are built in a worker thread. Concurrent requests for the
+        same tool set share a single in-flight build instead of each constructing
+        their own instance.
+
+        Args:
+            tools: Set of tool IDs to use
+
+        Raises:
+            InvalidToolsError: If requested tools are not available
 
+        """
+        key = tool_set_key(tools)
+        with RUN_STAGE_SECONDS.time(stage="instance_lookup"), span("instance_lookup"):
+            portia_instance = self._instance_pool.get(key)
+        if portia_instance is not None:
+            return portia_instance
+
+        build = self._pending_builds.get(key)
+        if build is None:
+            build = asyncio.ensure_future(asyncio.to_thread(self._build_portia_instance, tools))
+            self._pending_builds[key] = build
+            build.add_done_callback(lambda done: self._finish_build(key, done))
+
+        # Shield the shared build so a cancelled waiter does not cancel it for the others
+        with span("instance_build", tools=",".join(sorted(key))):
+            return await asyncio.shield(build)
+
+    def _finish_build(self, key: ToolSetKey, build: "asyncio.Future[Portia]") -> None:
+        """Forget a completed in-flight build."""
+        self._pending_builds.pop(key, None)
+        if not build.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            build.exception()
+
+    def _build_portia_instance(self, tools: set[str]) -> "Portia":
+        """Build a Portia SDK instance for the given tools and add it to the pool.
+
+        Args:
+            tools: Set of tool IDs to use
+
+        Raises:
+            InvalidToolsError: If requested tools are not available
+
+        """
         available_tools_map = self._get_available_tools_map()
 
-        if tools.issubset(set(available_tools_map.keys())):
-            self._portia_instance = Portia(
-                config=self._config,
-                tools=[available_tools_map[tool] for tool in tools],
-                execution_hooks=None,  # No CLI hooks for API usage
-            )
-            self._tools = tools
+        if tool_set_key(tools).issubset(available_tools_map.keys()):
+            with RUN_STAGE_SECONDS.time(stage="instance_build"):
+                portia_instance = Portia(
+                    config=self._config,
+                    tools=[available_tools_map[tool] for tool in tools],
+                    execution_hooks=self._execution_hooks,
+                )
+            self._instance_pool.put(tool_set_key(tools), portia_instance)
             logger.info(f"Portia SDK initialized successfully with tools: {tools}")
 
-            return self._portia_instance
+            return portia_instance
 
         raise InvalidToolsError(list(tools), list(available_tools_map.keys()))
 
-    async def run_query(self, query: str, tools: list[str]) -> dict:
+    def admission_stats(self) -> dict[str, float]:
+        """Get the occupancy and counters of the run admission controllers."""
+        return _sum_stats(admission.stats() for admission in self._admissions())
+
+    def _admissions(self) -> list[AdmissionController]:
+        """Get the admission controllers of the executors."""
+        if self._thread_admission is None:
+            return [self._admission]
+        return [self._admission, self._thread_admission]
+
+    def _admission_for(self, backend: str) -> AdmissionController:
+        """Get the admission controller bounding the runs executing on a backend."""
+        if backend == "thread" and self._thread_admission is not None:
+            return self._thread_admission
+        return self._admission
+
+    def instance_pool_stats(self) -> dict[str, int]:
+        """Get size and hit/miss/eviction counters of the Portia instance pool."""
+        return self._instance_pool.stats()
+
+    async def run_query(
+        self,
+        query: str,
+        tools: list[str],
+        deadline: float | None = None,
+        cache_policy: CachePolicy | None = None,
+        *,
+        coalesce: bool = True,
+        priority: RunPriority = RunPriority.HIGH,
+    ) -> dict:
         """Run the given query using the Portia SDK and specified tools.
 
+        When the result cache is enabled, successful results are cached and
+        served for identical queries until they expire. When run coalescing is
+        enabled, identical queries arriving while one is executing share its
+        execution and receive its result. Runs only share executions of the
+        same priority, so a high priority run never waits in the low priority lane.
+
+        Args:
+            query: The query to execute
+            tools: List of tool IDs to use
+            deadline: Deadline in seconds, capped by the ``run_timeout_max_seconds`` setting
+            cache_policy: How the result cache may be used for this run
+            coalesce: Whether the run may share the execution of an identical run
+            priority: Lane the run executes in
+
+        Returns:
+            The result of the query execution. With the result cache enabled it
+            also holds the ``cache_status`` and, for cached results, their ``cache_age``
+
+        Raises:
+            InvalidToolsError: If requested tools are not available
+            ServiceOverloadedError: If the run queue is full
+            RunTimeoutError: If the run did not finish before the deadline
+
+        """
+        cache_policy = cache_policy or CachePolicy()
+        use_result_cache = self._result_cache is not None
+        run_key = result_cache_key(query, tools, self._run_key_config) if use_result_cache else None
+
+        if use_result_cache and cache_policy.use_cached:
+            with span("result_cache"):
+                cached = await self._result_cache.get(run_key, max_age=cache_policy.max_age)
+            if cached is not None:
+                logger.info("Serving query result from the result cache", extra=SAMPLED)
+                return {
+                    **cached.result,
+                    "queue_time": 0.0,
+                    "cache_status": CacheStatus.HIT,
+                    "cache_age": round(cached.age),
+                }
+
+        result, coalesced = await self._run_once(
+            query,
+            tools,
+            deadline,
+            self._coalesce_key(query, tools, priority) if coalesce else None,
+            priority,
+        )
+        if not use_result_cache:
+            return result
+
+        if result["success"] and cache_policy.store and not coalesced:
+            await self._result_cache.set(run_key, result)
+
+        cache_status = CacheStatus.MISS if cache_policy.store else CacheStatus.BYPASS
+        return {**result, "cache_status": cache_status}
+
+    async def _run_once(
+        self,
+        query: str,
+        tools: list[str],
+        deadline: float | None,
+        coalesce_key: str | None,
+        priority: RunPriority,
+        *,
+        portia_instance: "Portia | None" = None,
+        wait_for_capacity: bool = False,
+    ) -> tuple[dict, bool]:
+        """Execute a run, sharing the execution of an identical run in flight if coalescing.
+
         Args:
             query: The query to execute
             tools: List of tool IDs to use
+            deadline: Deadline in seconds, capped by the ``run_timeout_max_seconds`` setting
+            coalesce_key: Key of identical runs, or None to always execute the run
+            priority: Lane the run executes in
+            portia_instance: The Portia instance to run the query with, if already resolved
+            wait_for_capacity: Wait for an executor slot even if the run queue is full
 
         Returns:
-            The result of the query execution
+            The result of the run and whether it was shared with a run in flight
+
+        Raises:
+            RunTimeoutError: If the run did not finish before the deadline
+
+        """
+
+        async def execute() -> dict:
+            return await self._execute_run(
+                portia_instance or await self._aget_portia_instance(set(tools)),
+                query,
+                tools,
+                RunContext(),
+                deadline=deadline,
+                priority=priority,
+                wait_for_capacity=wait_for_capacity,
+            )
+
+        if coalesce_key is None:
+            return await execute(), False
+
+        run_deadline = _capped_deadline(deadline)
+        try:
+            result, coalesced = await self._coalescer.run(
+                coalesce_key, execute, deadline=run_deadline
+            )
+        except TimeoutError as e:
+            # Only raised to callers that joined a run executing with a later deadline
+            raise RunTimeoutError(run_deadline) from e
+        if coalesced:
+            logger.info("Shared the execution of an identical run in flight", extra=SAMPLED)
+        return {**result}, coalesced
+
+    def _coalesce_key(
+        self,
+        query: str,
+        tools: list[str],
+        priority: RunPriority,
+        *,
+        wait_for_capacity: bool = False,
+    ) -> str | None:
+        """Get the key identical runs share an execution by, or None if coalescing is disabled.
+
+        Runs only share executions within a lane and with the same admission, so a high
+        priority run never waits in the low priority lane and a background run waiting
+        for capacity is never rejected because the run it joined was.
+        """
+        if self._coalescer is None:
+            return None
+        run_key = result_cache_key(query, tools, self._run_key_config)
+        admission = "wait" if wait_for_capacity else "reject"
+        return f"{run_key}:{priority}:{admission}"
+
+    def result_cache_stats(self) -> dict[str, Any] | None:
+        """Get the result cache counters, or None if the result cache is disabled."""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
+
+    async def stream_query(
+        self,
+        query: str,
+        tools: list[str],
+        deadline: float | None = None,
+        priority: RunPriority = RunPriority.HIGH,
+    ) -> AsyncIterator[RunEvent]:
+        """Run the given query and stream its progress events.
+
+        The Portia instance is resolved before streaming starts, so invalid tools
+        are reported by this call rather than while iterating.
+
+        Args:
+            query: The query to execute
+            tools: List of tool IDs to use
+            deadline: Deadline in seconds, capped by the ``run_timeout_max_seconds`` setting
+            priority: Lane the run executes in
+
+        Returns:
+            An iterator of ``plan_created``, ``step_started`` and ``step_completed``
+            events, ending with a ``result`` event holding the run result, which
+            reports a timeout as a failed result. Runs of the ``process`` backend
+            execute in a worker process and only yield the ``result`` event
 
         Raises:
             InvalidToolsError: If requested tools are not available
+            ServiceOverloadedError: If the run queue is full
 
         """
-        portia_instance = self._get_portia_instance(set(tools))
+        portia_instance = await self._aget_portia_instance(set(tools))
+        backend = "async" if await self._runs_async(portia_instance, tools) else "thread"
+        # Reject up front, since errors can no longer change the status once streaming starts
+        try:
+            self._admission_for(backend).check(get_tenant(), priority)
+        except ServiceOverloadedError:
+            RUNS.inc(tool_set=_tool_set_label(tools), outcome="rejected")
+            raise
+        return self._stream_run(portia_instance, query, tools, deadline, priority)
 
+    async def _stream_run(
+        self,
+        portia_instance: "Portia",
+        query: str,
+        tools: list[str],
+        deadline: float | None,
+        priority: RunPriority,
+    ) -> AsyncIterator[RunEvent]:
+        """Execute a run and yield its progress events as they are emitted."""
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue[RunEvent | None] = asyncio.Queue()
+        run_context = RunContext(
+            # Hooks fire in the executor thread, so hand events over to the event loop
+            on_event=lambda event: loop.call_soon_threadsafe(events.put_nowait, event)
+        )
+        run = asyncio.create_task(
+            self._execute_run(
+                portia_instance,
+                query,
+                tools,
+                run_context,
+                deadline=deadline,
+                priority=priority,
+                wait_for_capacity=True,
+            )
+        )
+        run.add_done_callback(lambda _: events.put_nowait(None))
+
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+            try:
+                result = await run
+            except RunTimeoutError as e:
+                result = {"success": False, "error": str(e)}
+            yield RunEvent(event="result", data=result)
+        finally:
+            run.cancel()
+
+    async def _execute_run(
+        self,
+        portia_instance: "Portia",
+        query: str,
+        tools: list[str],
+        run_context: RunContext,
+        *,
+        deadline: float | None = None,
+        priority: RunPriority = RunPriority.HIGH,
+        wait_for_capacity: bool = False,
+    ) -> dict:
+        """Execute a run on the executor with the run context bound for execution hooks.
+
+        The run must be admitted and finish within the deadline. When the deadline
+        passes or the caller goes away, the run is cancelled cooperatively: no further
+        plan steps or tool calls are scheduled, and its executor slot is released as
+        soon as the worker thread returns. Runs executing on the event loop are
+        cancelled right away.
+
+        Args:
+            portia_instance: The Portia SDK instance to run the query with
+            query: The query to execute
+            tools: List of tool IDs to use
+            run_context: State of the run shared with the execution hooks
+            deadline: Deadline in seconds, capped by the ``run_timeout_max_seconds`` setting
+            priority: Lane the run waits for an executor slot in
+            wait_for_capacity: Wait for an executor slot even if the run queue is full
+
+        Raises:
+            ServiceOverloadedError: If the run queue, or the queue of the run's tenant, is full
+                and not waiting for capacity
+            RunTimeoutError: If the run did not finish before the deadline
+
+        """
+        run_deadline = _capped_deadline(deadline)
+        queue_time = 0.0
         start_time = time.time()
+        run_started_at = time.perf_counter()
+        outcome = "error"
+        execution: asyncio.Future[Any] | None = None
+        tenant = get_tenant()
+        backend = await self._run_backend(portia_instance, tools, run_context)
+        admission = self._admission_for(backend)
+        # The pool the run is submitted to, to tell whether it was replaced after breaking
+        process_executor = self._process_executor
 
         try:
-            # Run the Portia execution in a thread pool to avoid blocking the event loop
-            loop = asyncio.get_running_loop()
-            plan_run = await loop.run_in_executor(self._executor, portia_instance.run, query, tools)
+            async with asyncio.timeout(run_deadline):
+                with span("queue", tenant=tenant, priority=str(priority)):
+                    queue_time = await admission.acquire(
+                        tenant, priority, wait_for_capacity=wait_for_capacity
+                    )
+                _record_queue_time(tenant, priority, queue_time)
+                start_time = time.time()
 
-            result = plan_run.outputs.final_output
+                with span("execute", backend=backend):
+                    execution = self._submit_run(
+                        portia_instance, query, tools, run_context, backend
+                    )
+                    execution.add_done_callback(
+                        functools.partial(_on_execution_done, admission, tenant, priority)
+                    )
+                    # Shield the execution so the slot is held until the worker returns
+                    output = await asyncio.shield(execution)
+
+            result = orjson.loads(output) if backend == "process" else output.outputs.final_output
+            outcome = "success"
 
             execution_time = round(time.time() - start_time, 2)
 
-            logger.info(f"Query executed successfully in {execution_time}s")
+            logger.info(
+                "Query executed successfully in %ss",
+                execution_time,
+                extra={
+                    **SAMPLED,
+                    "execution_time": execution_time,
+                    "queue_time": round(queue_time, 3),
+                },
+            )
 
+        except TimeoutError as e:
+            outcome = "timeout"
+            _cancel_run(run_context, execution)
+            self._timed_out_runs += 1
+            logger.warning("Query execution timed out after %ss", run_deadline)
+            raise RunTimeoutError(run_deadline) from e
+        except ServiceOverloadedError:
+            outcome = "rejected"
+            raise
+        except asyncio.CancelledError:
+            outcome = "abandoned"
+            _cancel_run(run_context, execution)
+            self._abandoned_runs += 1
+            logger.warning("Query execution abandoned by the caller")
+            raise
         except Exception as e:
             execution_time = time.time() - start_time
-            logger.exception(f"Query execution failed after {execution_time}s")
+            logger.exception("Query execution failed after %ss", execution_time)
+            if isinstance(e, BrokenProcessPool):
+                self._replace_process_executor(process_executor)
 
             return {
                 "success": False,
                 "error": str(e),
                 "execution_time": execution_time,
+                "queue_time": round(queue_time, 3),
             }
         else:
             return {
                 "success": True,
                 "result": result,
                 "execution_time": execution_time,
+                "queue_time": round(queue_time, 3),
             }
+        finally:
+            self._record_outcome(tools, tenant, outcome, time.perf_counter() - run_started_at)
+
+    def _record_outcome(self, tools: list[str], tenant: str, outcome: str, duration: float) -> None:
+        """Count a finished run in the metrics and in the recent error rate."""
+        RUNS.inc(tool_set=_tool_set_label(tools), outcome=outcome)
+        if outcome != "rejected":
+            RUN_STAGE_SECONDS.observe(duration, stage="total")
+            TENANT_RUN_SECONDS.observe(duration, tenant=tenant, stage="total")
+        if outcome not in ("rejected", "abandoned"):
+            self._recent_errors.record(error=outcome != "success")
+
+    async def _run_backend(
+        self, portia_instance: "Portia", tools: list[str], run_context: RunContext
+    ) -> str:
+        """Get where a run executes: ``process``, ``async`` or ``thread``."""
+        if self._runs_in_process(run_context):
+            return "process"
+        if await self._runs_async(portia_instance, tools):
+            return "async"
+        return "thread"
+
+    def _submit_run(
+        self,
+        portia_instance: "Portia",
+        query: str,
+        tools: list[str],
+        run_context: RunContext,
+        backend: str,
+    ) -> "asyncio.Future[Any]":
+        """Start a run without blocking the event loop.
+
+        Runs in worker threads and event loop tasks resolve to their ``PlanRun``,
+        with the run context bound for the execution hooks. Runs in worker
+        processes resolve to their final output encoded as JSON.
+        """
+        loop = asyncio.get_running_loop()
+        if backend == "process":
+            return loop.run_in_executor(
+                self._process_executor, process_worker.run_query, query, tools
+            )
+
+        context = contextvars.copy_context()
+        context.run(current_run.set, run_context)
+        if backend == "async":
+            return loop.create_task(
+                self._arun_portia(portia_instance, query, tools), context=context
+            )
+        return loop.run_in_executor(
+            self._executor, context.run, self._run_portia, portia_instance, query, tools
+        )
+
+    def _run_portia(self, portia_instance: "Portia", query: str, tools: list[str]) -> "PlanRun":
+        """Plan and run a query on the calling thread, reusing cached plans if enabled.
+
+        On a plan cache hit the planning LLM call is skipped and the cached plan is
+        run directly. With the ``template`` strategy, the parameters of the query are
+        passed to the plan as plan inputs.
+        """
+        _mark_started()
+        if self._plan_cache is None:
+            return portia_instance.run(query, tools)
+
+        template = normalize_query(query, self._plan_cache.strategy)
+        tool_set = tool_set_key(tools)
+        plan = self._plan_cache.get(tool_set, template)
+        if plan is None:
+            start_time = time.perf_counter()
+            plan = portia_instance.plan(
+                template.text if template.values else query,
+                tools,
+                plan_inputs=_plan_inputs(template),
+            )
+            self._cache_plan(tool_set, template, plan, time.perf_counter() - start_time)
+
+        return portia_instance.run_plan(plan, plan_run_inputs=_plan_run_inputs(template))
+
+    async def _arun_portia(
+        self, portia_instance: "Portia", query: str, tools: list[str]
+    ) -> "PlanRun":
+        """Plan and run a query on the event loop with the async SDK methods.
+
+        Behaves like ``_run_portia``, including the reuse of cached plans.
+        """
+        _mark_started()
+        if self._plan_cache is None:
+            return await portia_instance.arun(query, tools)
+
+        template = normalize_query(query, self._plan_cache.strategy)
+        tool_set = tool_set_key(tools)
+        plan = self._plan_cache.get(tool_set, template)
+        if plan is None:
+            start_time = time.perf_counter()
+            plan = await portia_instance.aplan(
+                template.text if template.values else query,
+                tools,
+                plan_inputs=_plan_inputs(template),
+            )
+            self._cache_plan(tool_set, template, plan, time.perf_counter() - start_time)
+
+        return await portia_instance.arun_plan(plan, plan_run_inputs=_plan_run_inputs(template))
+
+    def _cache_plan(
+        self, tool_set: ToolSetKey, template: QueryTemplate, plan: "Plan", planning_time: float
+    ) -> None:
+        """Store a generated plan in the plan cache."""
+        self._plan_cache.put(tool_set, template, plan, planning_time)
+        logger.info(f"Cached plan {plan.id} generated in {planning_time:.2f}s")
+
+    def plan_cache_stats(self) -> dict[str, Any] | None:
+        """Get the plan cache counters, or None if the plan cache is disabled."""
+        if self._plan_cache is None:
+            return None
+        return self._plan_cache.stats()
+
+    def collect_metrics(self) -> list[MetricSnapshot]:
+        """Get the executor, instance pool, tool index, job and cache metrics."""
+        admission = self.admission_stats()
+        pool = self._instance_pool.stats()
+        tool_index = self._tool_index.stats()
+        snapshots = [
+            snapshot("portia_executor_in_flight_runs", "Runs executing", admission["in_flight"]),
+            snapshot(
+                "portia_executor_queued_runs",
+                "Runs waiting for an executor slot",
+                admission["queued"],
+            ),
+            snapshot(
+                "portia_executor_capacity",
+                "Runs that can execute at the same time",
+                admission["max_in_flight"],
+            ),
+            snapshot("portia_instance_pool_size", "Pooled Portia instances", pool["size"]),
+            snapshot(
+                "portia_instance_pool_lookups",
+                "Portia instance pool lookups by result",
+                {(("result", "hit"),): pool["hits"], (("result", "miss"),): pool["misses"]},
+                metric_type="counter",
+            ),
+            snapshot(
+                "portia_instance_pool_evictions",
+                "Portia instances evicted from the pool",
+                pool["evictions"],
+                metric_type="counter",
+            ),
+            snapshot(
+                "portia_tool_index_tools", "Tools in the tool index", tool_index["tool_count"]
+            ),
+            snapshot(
+                "portia_tool_index_last_refresh_timestamp_seconds",
+                "Unix time of the last successful tool index refresh, 0 before the first",
+                tool_index["last_refreshed_at"] or 0.0,
+            ),
+            snapshot(
+                "portia_jobs",
+                "Retained run jobs by status",
+                {(("status", status),): count for status, count in self._jobs.stats().items()},
+            ),
+        ]
+        for cache_name, stats in (
+            ("result", self.result_cache_stats()),
+            ("plan", self.plan_cache_stats()),
+        ):
+            if stats is not None:
+                snapshots.append(
+                    snapshot(
+                        f"portia_{cache_name}_cache_lookups",
+                        f"{cache_name.capitalize()} cache lookups by result",
+                        {
+                            (("result", "hit"),): stats["hits"],
+                            (("result", "miss"),): stats["misses"],
+                        },
+                        metric_type="counter",
+                    )
+                )
+        admissions = self._admissions()
+        snapshots.extend(
+            _tenant_snapshots(
+                _sum_keyed_stats(admission.tenant_stats() for admission in admissions)
+            )
+        )
+        snapshots.extend(
+            _lane_snapshots(_sum_keyed_stats(admission.lane_stats() for admission in admissions))
+        )
+        if self._coalescer is not None:
+            snapshots.append(
+                snapshot(
+                    "portia_coalesced_runs",
+                    "Runs that shared the execution of an identical run in flight",
+                    self._coalescer.coalesced,
+                    metric_type="counter",
+                )
+            )
+        if settings.llm_shared_clients:
+            snapshots.extend(_model_client_snapshots(get_model_client_registry().stats()))
+        plan_cache_stats = self.plan_cache_stats()
+        if plan_cache_stats is not None:
+            snapshots.append(
+                snapshot(
+                    "portia_plan_cache_planning_time_saved_seconds",
+                    "Planning time saved by running cached plans",
+                    plan_cache_stats["planning_time_saved"],
+                    metric_type="counter",
+                )
+            )
+        return snapshots
+
+    def run_stats(self) -> dict[str, int]:
+        """Get the counters of runs that timed out or were abandoned by their caller."""
+        return {
+            "timed_out": self._timed_out_runs,
+            "abandoned": self._abandoned_runs,
+        }
+
+    def readiness(self) -> dict[str, Any]:
+        """Check whether the service should receive new traffic.
+
+        The service is ready once startup has finished and the tool index is built,
+        as long as the run queue is below its readiness threshold and the share of
+        recent runs that failed is below ``readiness_max_error_rate``. Every check
+        reads counters that are already maintained, so this never blocks.
+
+        Returns:
+            Whether the service is ready, the result of each check and the values checked
+
+        """
+        admission = self.admission_stats()
+        queued_runs = admission["queued"]
+        queue_threshold = settings.readiness_max_queued_runs or max(
+            math.ceil(settings.max_queued_runs * READINESS_QUEUE_FRACTION), 1
+        )
+        recent_runs, recent_errors = self._recent_errors.counts()
+        error_rate = recent_errors / recent_runs if recent_runs else None
+
+        checks = {
+            "warm": self._warm,
+            "tool_index": self._tool_index.is_built,
+            "queue": queued_runs < queue_threshold,
+            "error_rate": (
+                error_rate is None
+                or recent_runs < settings.readiness_min_runs
+                or error_rate < settings.readiness_max_error_rate
+            ),
+        }
+        return {
+            "ready": all(checks.values()),
+            "checks": checks,
+            "in_flight_runs": admission["in_flight"],
+            "queued_runs": queued_runs,
+            "queue_threshold": queue_threshold,
+            "recent_runs": recent_runs,
+            "error_rate": error_rate,
+        }
+
+    async def run_batch(
+        self,
+        items: list["BatchItem"],
+        max_concurrency: int | None = None,
+    ) -> AsyncIterator[tuple[int, dict]]:
+        """Run a batch of queries concurrently, yielding results as they complete.
+
+        One Portia instance is resolved per distinct tool set and shared by every
+        item using it. Items are admitted like ``/run`` requests, so a full run queue
+        rejects them rather than letting batches queue without bound. Items whose
+        tools are not available, that are rejected or that time out fail
+        individually rather than failing the whole batch.
+
+        Args:
+            items: The items to execute
+            max_concurrency: Maximum number of items executed at the same time,
+                capped by the ``batch_max_concurrency`` setting
+
+        Yields:
+            Tuples of the item index and its run result, in completion order
+
+        """
+        concurrency = min(
+            max_concurrency or settings.batch_max_concurrency, settings.batch_max_concurrency
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        tool_sets = list({tool_set_key(item.tools) for item in items})
+        resolved = await asyncio.gather(
+            *(self._aget_portia_instance(set(key)) for key in tool_sets),
+            return_exceptions=True,
+        )
+        instances = dict(zip(tool_sets, resolved, strict=True))
+
+        async def run_item(index: int, item: BatchItem) -> tuple[int, dict]:
+            portia_instance = instances[tool_set_key(item.tools)]
+            if isinstance(portia_instance, BaseException):
+                return index, {"success": False, "error": str(portia_instance)}
+            coalesce_key = (
+                self._coalesce_key(item.query, item.tools, item.priority) if item.coalesce else None
+            )
+            async with semaphore:
+                try:
+                    result, _ = await self._run_once(
+                        item.query,
+                        item.tools,
+                        item.deadline,
+                        coalesce_key,
+                        item.priority,
+                        portia_instance=portia_instance,
+                    )
+                except (RunTimeoutError, ServiceOverloadedError) as e:
+                    result = {"success": False, "error": str(e)}
+                return index, result
+
+        tasks = [asyncio.create_task(run_item(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def submit_job(
+        self,
+        query: str,
+        tools: list[str],
+        priority: RunPriority = RunPriority.LOW,
+        deadline: float | None = None,
+        *,
+        coalesce: bool = True,
+    ) -> Job:
+        """Submit a query for asynchronous execution.
+
+        Args:
+            query: The query to execute
+            tools: List of tool IDs to use
+            priority: Lane the job executes in
+            deadline: Deadline of the run in seconds from when the job starts, capped by
+                the ``run_timeout_max_seconds`` setting
+            coalesce: Whether the job may share the execution of an identical run
+
+        Returns:
+            The created job, which runs in the background
+
+        Raises:
+            InvalidToolsError: If requested tools are not available
+            JobStoreFullError: If the job store cannot accept more jobs
+
+        """
+        await self._aget_available_tools_map()
+        invalid_tools = self._tool_index.invalid_ids(tools)
+        if invalid_tools:
+            raise InvalidToolsError(invalid_tools, self._tool_index.ids())
+
+        runner = functools.partial(
+            self._run_job, priority=priority, deadline=deadline, coalesce=coalesce
+        )
+        return self._jobs.submit(query, tools, runner)
+
+    async def _run_job(
+        self, job: Job, *, priority: RunPriority, deadline: float | None, coalesce: bool
+    ) -> dict:
+        """Execute a submitted job, waiting for capacity rather than being rejected."""
+        coalesce_key = (
+            self._coalesce_key(job.query, job.tools, priority, wait_for_capacity=True)
+            if coalesce
+            else None
+        )
+        try:
+            result, _ = await self._run_once(
+                job.query,
+                job.tools,
+                deadline,
+                coalesce_key,
+                priority,
+                wait_for_capacity=True,
+            )
+        except RunTimeoutError as e:
+            return {"success": False, "error": str(e)}
+        return result
+
+    def get_job(self, job_id: str) -> Job:
+        """Get a submitted job by ID.
+
+        Raises:
+            JobNotFoundError: If the job does not exist or is no longer retained
+
+        """
+        return self._jobs.get(job_id)
+
+    def cancel_job(self, job_id: str) -> Job:
+        """Cancel a submitted job.
+
+        Raises:
+            JobNotFoundError: If the job does not exist or is no longer retained
+
+        """
+        return self._jobs.cancel(job_id)
 
     def available_tool_ids(self) -> list[str]:
         """Get list of available tool IDs."""
-        return list(self._get_available_tools_map().keys())
+        return self._tool_index.ids()
+
+    @property
+    def tool_index(self) -> ToolIndex:
+        """The cached index of available tools."""
+        return self._tool_index
+
+    async def refresh_tool_index(self) -> dict[str, Any]:
+        """Rebuild the tool index in a worker thread.
+
+        Returns:
+            The tool index stats after the refresh
 
-    def _get_available_tools_map(self) -> dict[str, Tool]:
+        """
+        await asyncio.to_thread(self._tool_index.refresh)
+        return self._tool_index.stats()
+
+    def _get_available_tools_map(self) -> Mapping[str, "Tool"]:
         """Get a map of tool IDs to tool objects for all the available tools."""
-        available_tools = DefaultToolRegistry(config=self._config).get_tools()
-        return {tool.id: tool for tool in available_tools}
+        return self._tool_index.tools_map()
+
+    async def _aget_available_tools_map(self) -> Mapping[str, "Tool"]:
+        """Get the map of available tools, building the tool index in a worker thread if needed.
+
+        The index is normally built at startup; it is only built here when that failed.
+        """
+        if self._tool_index.is_built:
+            return self._tool_index.tools_map()
+        return await asyncio.to_thread(self._tool_index.tools_map)
+
+    def _load_tools(self) -> list["Tool"]:
+        """Load all the available tools from the Portia tool registry."""
+        return DefaultToolRegistry(config=self._config).get_tools()
+
+
+class BatchItem(NamedTuple):
+    """A query of a batch and how to execute it."""
+
+    query: str
+    tools: list[str]
+    deadline: float | None = None
+    priority: RunPriority = RunPriority.LOW
+    coalesce: bool = True
+
+
+def _warn_process_backend_limits() -> None:
+    """Warn about the features runs in worker processes do without."""
+    skipped = ["the execution hooks, so they are not stopped at their deadline or when abandoned"]
+    if settings.plan_cache_enabled:
+        skipped.append("the plan cache")
+    logger.warning(
+        f"Runs in worker processes of the {settings.execution_backend} backend skip "
+        f"{' and '.join(reversed(skipped))}"
+    )
+
+
+def _capped_deadline(deadline: float | None) -> float:
+    """Get the deadline of a run, capped by the ``run_timeout_max_seconds`` setting."""
+    return min(deadline or settings.run_timeout_max_seconds, settings.run_timeout_max_seconds)
+
+
+def _is_async_tool(tool: "Tool | None") -> bool:
+    """Whether a tool implements its own coroutine ``arun`` rather than only a sync ``run``."""
+    if tool is None:
+        return False
+    arun = getattr(type(tool), "arun", None)
+    return inspect.iscoroutinefunction(arun) and arun is not getattr(Tool, "arun", None)
+
+
+def _mark_started() -> None:
+    """Record the start of the current run's execution in its run context."""
+    run_context = current_run.get()
+    if run_context is not None:
+        run_context.started_at = time.perf_counter()
+
+
+def _plan_inputs(template: QueryTemplate) -> "list[PlanInput] | None":
+    """Get the plan inputs declared for the parameters of a query template."""
+    return [
+        PlanInput(name=name, description=f"Value of ${name} in the query")
+        for name in template.parameters
+    ] or None
+
+
+def _plan_run_inputs(template: QueryTemplate) -> "list[PlanInput] | None":
+    """Get the plan run inputs holding the parameter values of a query template."""
+    return [
+        PlanInput(name=name, value=value) for name, value in template.parameters.items()
+    ] or None
+
+
+def _create_admission(max_in_flight: int) -> AdmissionController:
+    """Create an admission controller for an executor running ``max_in_flight`` runs at once."""
+    return AdmissionController(
+        max_in_flight=max_in_flight,
+        max_queued=settings.max_queued_runs,
+        retry_after_seconds=settings.overload_retry_after_seconds,
+        tenant_limits=tenant_limits(settings),
+        default_tenant_limits=default_tenant_limits(settings),
+        reserved_high_priority=settings.high_priority_reserved_runs,
+        low_priority_borrowing=settings.low_priority_borrowing,
+    )
+
+
+def _on_execution_done(
+    admission: AdmissionController,
+    tenant: str,
+    priority: RunPriority,
+    execution: "asyncio.Future[Any]",
+) -> None:
+    """Release the executor slot of a finished run."""
+    admission.release(tenant, priority)
+    if not execution.cancelled():
+        # Mark the exception as retrieved in case the caller already gave up on the run
+        execution.exception()
+
+
+def _sum_stats(stats: Iterable[Mapping[str, float]]) -> dict[str, float]:
+    """Add up the counters of several admission controllers."""
+    total: dict[str, float] = {}
+    for item in stats:
+        for name, value in item.items():
+            total[name] = total.get(name, 0) + value
+    return total
+
+
+def _sum_keyed_stats(
+    stats: Iterable[Mapping[str, Mapping[str, float]]],
+) -> dict[str, dict[str, float]]:
+    """Add up the per-tenant or per-lane counters of several admission controllers."""
+    total: dict[str, dict[str, float]] = {}
+    for item in stats:
+        for key, counters in item.items():
+            total[key] = _sum_stats([total.get(key, {}), counters])
+    return total
+
+
+def _record_queue_time(tenant: str, priority: RunPriority, queue_time: float) -> None:
+    """Record the time an admitted run waited for its executor slot."""
+    RUN_STAGE_SECONDS.observe(queue_time, stage="queue")
+    TENANT_RUN_SECONDS.observe(queue_time, tenant=tenant, stage="queue")
+    LANE_QUEUE_SECONDS.observe(queue_time, lane=str(priority))
+
+
+def _cancel_run(run_context: RunContext, execution: "asyncio.Future[Any] | None") -> None:
+    """Cancel a run that timed out or was abandoned.
+
+    Runs in worker threads stop cooperatively at their next plan step or tool
+    call, while runs executing on the event loop are cancelled right away.
+    """
+    run_context.cancel()
+    if isinstance(execution, asyncio.Task):
+        execution.cancel()
+
+
+def _tenant_snapshots(stats: dict[str, dict[str, float]]) -> list[MetricSnapshot]:
+    """Build the per-tenant occupancy and admission metrics of the executor."""
+
+    def by_tenant(name: str) -> dict[tuple[tuple[str, str], ...], float]:
+        return {(("tenant", tenant),): tenant_stats[name] for tenant, tenant_stats in stats.items()}
+
+    return [
+        snapshot(
+            "portia_tenant_in_flight_runs", "Runs executing by tenant", by_tenant("in_flight")
+        ),
+        snapshot(
+            "portia_tenant_queued_runs",
+            "Runs waiting for an executor slot by tenant",
+            by_tenant("queued"),
+        ),
+        snapshot(
+            "portia_tenant_admitted_runs",
+            "Runs admitted to the executor by tenant",
+            by_tenant("admitted"),
+            metric_type="counter",
+        ),
+        snapshot(
+            "portia_tenant_rejected_runs",
+            "Runs rejected because the run queue or the tenant's queue was full, by tenant",
+            by_tenant("rejected"),
+            metric_type="counter",
+        ),
+    ]
+
+
+def _lane_snapshots(stats: dict[str, dict[str, float]]) -> list[MetricSnapshot]:
+    """Build the per-lane occupancy and admission metrics of the executor."""
+
+    def by_lane(name: str) -> dict[tuple[tuple[str, str], ...], float]:
+        return {(("lane", lane),): lane_stats[name] for lane, lane_stats in stats.items()}
+
+    return [
+        snapshot(
+            "portia_lane_in_flight_runs", "Runs executing by priority lane", by_lane("in_flight")
+        ),
+        snapshot(
+            "portia_lane_queued_runs",
+            "Runs waiting for an executor slot by priority lane",
+            by_lane("queued"),
+        ),
+        snapshot(
+            "portia_lane_admitted_runs",
+            "Runs admitted to the executor by priority lane",
+            by_lane("admitted"),
+            metric_type="counter",
+        ),
+    ]
+
+
+def _portia_config() -> "Config":
+    """Get the Portia configuration, using the shared model objects if enabled."""
+    config = settings.get_portia_config()
+    if settings.llm_shared_clients:
+        config = get_model_client_registry().share_models(config)
+    return config
+
+
+def _model_client_snapshots(stats: dict[str, Any]) -> list[MetricSnapshot]:
+    """Build the metrics of the shared models and their HTTP connection pools."""
+    connections: dict[tuple[tuple[str, str], ...], float] = {}
+    utilization: dict[tuple[tuple[str, str], ...], float] = {}
+    for pool in stats["pools"]:
+        labels = (("pool", pool["pool"]), ("client", pool["client"]))
+        active = pool["connections"] - pool["idle"]
+        connections[(*labels, ("state", "active"))] = active
+        connections[(*labels, ("state", "idle"))] = pool["idle"]
+        utilization[labels] = active / stats["max_connections"]
+    return [
+        snapshot(
+            "portia_llm_shared_model_lookups",
+            "Shared model lookups by result",
+            {(("result", "hit"),): stats["hits"], (("result", "build"),): stats["builds"]},
+            metric_type="counter",
+        ),
+        snapshot(
+            "portia_llm_http_connections",
+            "Connections of the shared LLM HTTP clients by state",
+            connections,
+        ),
+        snapshot(
+            "portia_llm_http_pool_utilization",
+            "Share of the maximum connections of a shared LLM HTTP client in use",
+            utilization,
+        ),
+    ]
+
+
+def _tool_set_label(tools: list[str]) -> str:
+    """Build the metrics label of a tool set."""
+    return ",".join(sorted(set(tools)))
@@ -0,0 +1,106 @@
+"""Portia execution inside the worker processes of the process execution backend.
+
+Functions in this module run in worker processes started by a
+``ProcessPoolExecutor``. Each process builds its own Portia configuration,
+tool map and pool of Portia instances once and reuses them for every run it
+executes. Only the query, the tool IDs and the JSON-encoded final output
+cross the process boundary, so no SDK objects need to be pickled.
+"""
+
+import functools
+import logging
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from portia import Config, DefaultToolRegistry, Portia, Tool
+
+from app.config import settings
+from app.logging_config import configure_logging
+from app.responses import dumps
+from app.services.instance_pool import InstancePool, tool_set_key
+from app.services.model_clients import get_model_client_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _WorkerState:
+    """Portia state of a worker process."""
+
+    config: Config
+    tools: Mapping[str, Tool]
+    instances: InstancePool[Portia]
+
+
+@functools.cache
+def _worker_state() -> _WorkerState:
+    """Build the Portia state of this process on first use."""
+    config = settings.get_portia_config()
+    if settings.llm_shared_clients:
+        config = get_model_client_registry().share_models(config)
+    tools = MappingProxyType(
+        {tool.id: tool for tool in DefaultToolRegistry(config=config).get_tools()}
+    )
+    return _WorkerState(
+        config=config,
+        tools=tools,
+        instances=InstancePool(max_size=settings.portia_instance_pool_size),
+    )
+
+
+def _build_instance(state: _WorkerState, tools: list[str]) -> Portia:
+    """Get the pooled Portia instance of a tool set, building it on a miss."""
+    key = tool_set_key(tools)
+    portia_instance = state.instances.get(key)
+    if portia_instance is None:
+        portia_instance = Portia(config=state.config, tools=[state.tools[tool] for tool in tools])
+        state.instances.put(key, portia_instance)
+    return portia_instance
+
+
+def initialize_worker() -> None:
+    """Prepare a worker process before it receives its first run.
+
+    Builds the Portia instances of the ``warmup_tool_sets`` setting, so the
+    first runs with hot tool sets do not pay for their construction.
+    """
+    configure_logging()
+    state = _worker_state()
+    for tools in settings.warmup_tool_sets:
+        try:
+            _build_instance(state, tools)
+        except Exception as e:  # noqa: BLE001
+            # A failing initializer would break the whole pool, the instance is built on first use
+            logger.warning(f"Failed to warm up tool set {tools} in worker process: {e}")
+    logger.info(f"Execution worker process ready with {len(state.tools)} tools")
+
+
+def warm_up() -> int:
+    """Make sure this worker process has started, returning its process ID."""
+    return os.getpid()
+
+
+def run_query(query: str, tools: list[str]) -> bytes:
+    """Run a query in this worker process.
+
+    Args:
+        query: The query to execute
+        tools: List of tool IDs to use, already validated by the service
+
+    Returns:
+        The final output of the run, encoded as JSON
+
+    Raises:
+        RuntimeError: If the run failed, with the message of the original error
+
+    """
+    state = _worker_state()
+    try:
+        portia_instance = _build_instance(state, tools)
+        plan_run = portia_instance.run(query, tools)
+        return dumps(plan_run.outputs.final_output)
+    except Exception as e:  # noqa: BLE001
+        # SDK exceptions are not guaranteed to be picklable, so only their message is sent back
+        raise RuntimeError(str(e)) from None
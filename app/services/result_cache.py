@@ -0,0 +1,341 @@
+"""Cache of successful run results keyed by query, tools and model configuration."""
+
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+import orjson
+
+from app.responses import dumps
+
+if TYPE_CHECKING:
+    from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Portia configuration fields that change how a query is planned and answered
+RESULT_CACHE_CONFIG_FIELDS = frozenset(
+    {
+        "llm_provider",
+        "default_model",
+        "planning_model",
+        "execution_model",
+        "introspection_model",
+        "summarizer_model",
+        "planning_agent_type",
+        "execution_agent_type",
+    }
+)
+
+
+class CacheStatus(StrEnum):
+    """How a run result was served, as reported in the ``X-Cache`` header."""
+
+    HIT = "HIT"
+    MISS = "MISS"
+    BYPASS = "BYPASS"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Per-request cache behaviour derived from a ``Cache-Control`` header.
+
+    Attributes:
+        use_cached: Whether a cached result may be served
+        store: Whether a fresh result may be stored
+        max_age: Maximum age in seconds of a cached result that may be served
+
+    """
+
+    use_cached: bool = True
+    store: bool = True
+    max_age: float | None = None
+
+    @classmethod
+    def from_header(cls, value: str | None) -> "CachePolicy":
+        """Parse the ``no-cache``, ``no-store`` and ``max-age`` directives of a header.
+
+        Unknown directives and malformed ``max-age`` values are ignored.
+        """
+        if not value:
+            return cls()
+
+        use_cached = True
+        store = True
+        max_age = None
+        for directive in value.split(","):
+            name, _, argument = directive.strip().lower().partition("=")
+            if name == "no-store":
+                use_cached = False
+                store = False
+            elif name == "no-cache":
+                use_cached = False
+            elif name == "max-age":
+                try:
+                    max_age = max(float(argument.strip('"')), 0.0)
+                except ValueError:
+                    continue
+        return cls(use_cached=use_cached, store=store, max_age=max_age)
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A run result together with the time it was stored."""
+
+    result: dict[str, Any]
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the result was stored."""
+        return max(time.time() - self.stored_at, 0.0)
+
+
+def result_cache_key(query: str, tools: Iterable[str], config: Mapping[str, Any]) -> str:
+    """Build the cache key of a run.
+
+    The query is normalized for whitespace and tool order and duplicates are
+    ignored, so equivalent requests share one entry.
+
+    Args:
+        query: The query to execute
+        tools: Tool IDs used for the run
+        config: Portia configuration fields that affect the result
+
+    Returns:
+        A hex digest identifying the run
+
+    """
+    payload = json.dumps(
+        {
+            "query": " ".join(query.split()),
+            "tools": sorted(set(tools)),
+            "config": {name: config[name] for name in sorted(config)},
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache(ABC):
+    """Storage backend for cached run results."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl_seconds: How long results are kept
+
+        """
+        self._ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str, max_age: float | None = None) -> CachedResult | None:
+        """Get a cached result, counting hits, misses and backend errors.
+
+        Backend errors are logged and reported as a miss, so an unavailable
+        cache never fails a run.
+
+        Args:
+            key: Cache key of the run
+            max_age: Maximum age in seconds of a result that may be returned
+
+        Returns:
+            The cached result, or None if there is no fresh entry
+
+        """
+        try:
+            cached = await self._get(key)
+        except Exception:
+            self.errors += 1
+            logger.exception("Result cache lookup failed")
+            cached = None
+
+        if cached is None or (max_age is not None and cached.age > max_age):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached
+
+    async def set(self, key: str, result: dict[str, Any]) -> None:
+        """Store a run result. Backend errors are logged and ignored.
+
+        Args:
+            key: Cache key of the run
+            result: The run result
+
+        """
+        try:
+            await self._set(key, CachedResult(result=result, stored_at=time.time()))
+        except Exception:
+            self.errors += 1
+            logger.exception("Result cache store failed")
+
+    @abstractmethod
+    async def _get(self, key: str) -> CachedResult | None:
+        """Get an unexpired entry from the backend."""
+
+    @abstractmethod
+    async def _set(self, key: str, cached: CachedResult) -> None:
+        """Store an entry in the backend."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources held by the backend."""
+
+    def stats(self) -> dict[str, Any]:
+        """Get the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "ttl_seconds": self._ttl_seconds,
+        }
+
+
+class MemoryResultCache(ResultCache):
+    """Least-recently-used in-process cache with a time to live.
+
+    Holds at most ``max_entries`` results. Expired entries are dropped when they
+    are looked up and the least recently used entry is evicted when the cache is
+    full.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl_seconds: How long results are kept
+            max_entries: Maximum number of results kept
+
+        """
+        super().__init__(ttl_seconds)
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._entries)
+
+    async def _get(self, key: str) -> CachedResult | None:
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        if cached.age >= self._ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return cached
+
+    async def _set(self, key: str, cached: CachedResult) -> None:
+        self._entries[key] = cached
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Get the cache counters and size."""
+        return {
+            **super().stats(),
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class RedisResultCache(ResultCache):
+    """Cache shared between processes, stored in Redis with a per-key expiry.
+
+    Size is bounded by the TTL and the Redis ``maxmemory`` policy rather than
+    an entry count.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, key_prefix: str = "portia:run:") -> None:
+        """Initialize the cache.
+
+        Args:
+            url: Redis connection URL
+            ttl_seconds: How long results are kept
+            key_prefix: Prefix of the Redis keys holding results
+
+        Raises:
+            ImportError: If the redis package is not installed
+
+        """
+        # Imported here so the redis client is only required when this backend is used
+        try:
+            from redis.asyncio import Redis  # noqa: PLC0415
+        except ImportError as e:
+            raise ImportError(
+                "The redis result cache backend requires the redis package, "
+                "install it with the redis extra: pip install '.[redis]'"
+            ) from e
+
+        super().__init__(ttl_seconds)
+        self._redis = Redis.from_url(url)
+        self._key_prefix = key_prefix
+
+    async def _get(self, key: str) -> CachedResult | None:
+        payload = await self._redis.get(self._key_prefix + key)
+        if payload is None:
+            return None
+        data = orjson.loads(payload)
+        return CachedResult(result=data["result"], stored_at=data["stored_at"])
+
+    async def _set(self, key: str, cached: CachedResult) -> None:
+        # Encoded like a response, so a hit has the shape of the response of a miss
+        payload = dumps({"result": cached.result, "stored_at": cached.stored_at})
+        await self._redis.set(
+            self._key_prefix + key, payload, px=max(int(self._ttl_seconds * 1000), 1)
+        )
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        """Get the cache counters."""
+        return {**super().stats(), "backend": "redis"}
+
+
+def create_result_cache(app_settings: "Settings") -> ResultCache | None:
+    """Create the result cache configured by the settings.
+
+    Args:
+        app_settings: The application settings
+
+    Returns:
+        The result cache, or None if result caching is disabled
+
+    Raises:
+        ValueError: If the Redis backend is selected without a Redis URL
+        ImportError: If the Redis backend is selected without the redis package installed
+
+    """
+    if not app_settings.result_cache_enabled:
+        return None
+
+    if app_settings.result_cache_backend == "redis":
+        url = app_settings.portia_config.llm_redis_cache_url
+        if not url:
+            raise ValueError(
+                "The redis result cache backend requires PORTIA_CONFIG__LLM_REDIS_CACHE_URL"
+            )
+        return RedisResultCache(url=url, ttl_seconds=app_settings.result_cache_ttl_seconds)
+
+    return MemoryResultCache(
+        ttl_seconds=app_settings.result_cache_ttl_seconds,
+        max_entries=app_settings.result_cache_max_entries,
+    )
@@ -0,0 +1,41 @@
+"""Per-run state shared between the API, service and executor layers."""
+
+import threading
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RunEvent:
+    """A progress event emitted while a run executes."""
+
+    event: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RunContext:
+    """State of a single run.
+
+    The context is bound to ``current_run`` inside the executor thread running
+    the plan, so Portia execution hooks can find the run they belong to.
+    """
+
+    on_event: Callable[[RunEvent], None] | None = None
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    started_at: float | None = None
+    step_started_at: float | None = None
+
+    def cancel(self) -> None:
+        """Ask the run to stop before its next step or tool call."""
+        self.cancelled.set()
+
+    def emit(self, event: str, data: dict[str, Any]) -> None:
+        """Emit a progress event to the run's listener, if any."""
+        if self.on_event is not None:
+            self.on_event(RunEvent(event=event, data=data))
+
+
+current_run: ContextVar[RunContext | None] = ContextVar("current_run", default=None)
@@ -0,0 +1,70 @@
+"""Identification of the tenant a request is made on behalf of."""
+
+import secrets
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from app.config import settings
+from app.services.admission import TenantLimits
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from app.config import Settings, TenantSettings
+
+current_tenant: ContextVar[str | None] = ContextVar("current_tenant", default=None)
+
+
+def get_tenant() -> str:
+    """Get the tenant of the request being handled, or the default tenant."""
+    return current_tenant.get() or settings.default_tenant
+
+
+def resolve_tenant(headers: "Mapping[str, str]") -> str:
+    """Identify the tenant of a request from its headers.
+
+    A known API key in the ``X-API-Key`` header identifies its tenant. Otherwise
+    the tenant header (``X-Tenant-ID`` by default) selects a configured tenant,
+    which assumes it is set by a trusted gateway. Requests with neither, or
+    naming a tenant that is not configured, belong to the default tenant, so
+    clients cannot create tenants, and with them scheduling state and metric
+    labels, by making up tenant IDs.
+
+    Args:
+        headers: The request headers, with lowercase names
+
+    Returns:
+        The tenant ID
+
+    """
+    api_key = headers.get("x-api-key")
+    if api_key:
+        for tenant, tenant_settings in settings.tenants.items():
+            if any(secrets.compare_digest(api_key, key) for key in tenant_settings.api_keys):
+                return tenant
+
+    tenant = headers.get(settings.tenant_header.lower(), "").strip()
+    if tenant in settings.tenants:
+        return tenant
+    return settings.default_tenant
+
+
+def _tenant_limits(tenant_settings: "TenantSettings") -> TenantLimits:
+    return TenantLimits(
+        weight=tenant_settings.weight,
+        max_in_flight=tenant_settings.max_in_flight_runs,
+        max_queued=tenant_settings.max_queued_runs,
+    )
+
+
+def tenant_limits(app_settings: "Settings") -> dict[str, TenantLimits]:
+    """Get the scheduling limits of the configured tenants."""
+    return {
+        tenant: _tenant_limits(tenant_settings)
+        for tenant, tenant_settings in app_settings.tenants.items()
+    }
+
+
+def default_tenant_limits(app_settings: "Settings") -> TenantLimits:
+    """Get the scheduling limits of the tenants that are not configured."""
+    return _tenant_limits(app_settings.tenant_defaults)
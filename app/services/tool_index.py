@@ -0,0 +1,123 @@
+"""In-process index of the tools available from the Portia tool registry."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+from app.services.metrics import TOOL_INDEX_REFRESH_SECONDS
+
+if TYPE_CHECKING:
+    from portia import Tool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolIndex:
+    """Cached map of tool IDs to tool objects.
+
+    The index is built once (at startup or on first use) and then served from
+    memory. Refreshes build a new map and swap it in atomically, so readers never
+    need a lock and always see a complete snapshot.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable["Tool"]]) -> None:
+        """Initialize the index.
+
+        Args:
+            loader: Callable returning all available tools, e.g. from a tool registry
+
+        """
+        self._loader = loader
+        self._tools: Mapping[str, Tool] | None = None
+        self._refresh_lock = threading.Lock()
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.last_refresh_duration: float | None = None
+        self.total_refresh_duration = 0.0
+        self.last_refreshed_at: float | None = None
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the index has been built at least once."""
+        return self._tools is not None
+
+    def refresh(self) -> Mapping[str, "Tool"]:
+        """Rebuild the index from the loader and swap it in.
+
+        Returns:
+            The new map of tool IDs to tools
+
+        """
+        with self._refresh_lock:
+            start_time = time.perf_counter()
+            try:
+                tools = MappingProxyType({tool.id: tool for tool in self._loader()})
+            except Exception:
+                self.refresh_failures += 1
+                TOOL_INDEX_REFRESH_SECONDS.observe(
+                    time.perf_counter() - start_time, result="failure"
+                )
+                raise
+            duration = time.perf_counter() - start_time
+            TOOL_INDEX_REFRESH_SECONDS.observe(duration, result="success")
+
+            self._tools = tools
+            self.refresh_count += 1
+            self.last_refresh_duration = duration
+            self.total_refresh_duration += duration
+            self.last_refreshed_at = time.time()
+
+        logger.info(f"Tool index refreshed with {len(tools)} tools in {duration:.3f}s")
+        return tools
+
+    def tools_map(self) -> Mapping[str, "Tool"]:
+        """Get the map of tool IDs to tools, building the index if needed."""
+        tools = self._tools
+        if tools is None:
+            with self._refresh_lock:
+                tools = self._tools
+            if tools is None:
+                tools = self.refresh()
+        return tools
+
+    def get(self, tool_id: str) -> "Tool | None":
+        """Get a tool by ID."""
+        return self.tools_map().get(tool_id)
+
+    def ids(self) -> list[str]:
+        """Get the IDs of all indexed tools."""
+        return list(self.tools_map().keys())
+
+    def invalid_ids(self, tool_ids: Iterable[str]) -> list[str]:
+        """Get the tool IDs that are not present in the index."""
+        tools = self.tools_map()
+        return [tool_id for tool_id in tool_ids if tool_id not in tools]
+
+    async def run_refresh_loop(self, ttl_seconds: float) -> None:
+        """Refresh the index in a worker thread every ``ttl_seconds`` until cancelled.
+
+        Args:
+            ttl_seconds: Interval between refreshes in seconds
+
+        """
+        while True:
+            await asyncio.sleep(ttl_seconds)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Background tool index refresh failed")
+
+    def stats(self) -> dict[str, Any]:
+        """Get the index size and refresh metrics."""
+        return {
+            "tool_count": len(self._tools) if self._tools is not None else 0,
+            "refresh_count": self.refresh_count,
+            "refresh_failures": self.refresh_failures,
+            "last_refresh_duration": self.last_refresh_duration,
+            "total_refresh_duration": self.total_refresh_duration,
+            "last_refreshed_at": self.last_refreshed_at,
+        }
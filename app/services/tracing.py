@@ -0,0 +1,347 @@
+"""Request-scoped timing spans exported in the OpenTelemetry (OTLP/JSON) format.
+
+Every HTTP request gets a trace holding a root span and the nested spans of
+the phases it went through (queueing, Portia instance lookup and build,
+planning and plan steps). The current trace and span are carried in context
+variables, so they follow the request into the service and, through the copied
+context, into executor threads. Finished traces are summarized in the
+``Server-Timing`` response header and exported off the request path to a file
+or an OTLP/HTTP collector.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+_TRACE_ID_LENGTH = 32
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass
+class Span:
+    """A timed phase of a request."""
+
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    kind: int = SPAN_KIND_INTERNAL
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration of the span in milliseconds, up to now if it has not ended."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+@dataclass
+class Trace:
+    """The spans of one request, identified by its request ID."""
+
+    trace_id: str
+    request_id: str
+    root: Span
+    spans: list[Span] = field(default_factory=list)
+
+    @classmethod
+    def start(cls, request_id: str, name: str, **attributes: Any) -> "Trace":
+        """Start a trace and its root span.
+
+        The request ID is used as the trace ID when it is a valid one (32 hex
+        digits), so traces can be looked up by the ``X-Request-ID`` header.
+        """
+        is_trace_id = len(request_id) == _TRACE_ID_LENGTH and _HEX_DIGITS.issuperset(request_id)
+        root = Span(
+            name=name,
+            span_id=_new_span_id(),
+            parent_id=None,
+            start_ns=time.time_ns(),
+            kind=SPAN_KIND_SERVER,
+            attributes={"http.request_id": request_id, **attributes},
+        )
+        return cls(
+            trace_id=request_id if is_trace_id else os.urandom(16).hex(),
+            request_id=request_id,
+            root=root,
+        )
+
+    def add(self, span: Span) -> None:
+        """Add a finished span. Safe to call from executor threads."""
+        # list.append is atomic, so spans can be added from any thread without a lock
+        self.spans.append(span)
+
+    def end(self) -> None:
+        """End the root span."""
+        self.root.end_ns = time.time_ns()
+
+    def server_timing(self) -> str:
+        """Summarize the spans as a ``Server-Timing`` header value.
+
+        Spans with the same name, like the steps of a plan, are added up into
+        one metric. The duration of the whole request so far is reported as
+        ``total``.
+        """
+        durations: dict[str, float] = {}
+        for span in list(self.spans):
+            durations[span.name] = durations.get(span.name, 0.0) + span.duration_ms
+        durations["total"] = self.root.duration_ms
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in durations.items())
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_request_id() -> str | None:
+    """Get the ID of the request being handled, if any."""
+    trace = current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def _parent_id(trace: Trace) -> str:
+    parent = _current_span.get()
+    return parent.span_id if parent is not None else trace.root.span_id
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Time a phase of the current request as a span nested in the current span.
+
+    Does nothing outside of a traced request.
+
+    Args:
+        name: Name of the phase
+        **attributes: Attributes of the span
+
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(
+        name=name,
+        span_id=_new_span_id(),
+        parent_id=_parent_id(trace),
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+def record_span(name: str, duration: float, **attributes: Any) -> None:
+    """Record a phase of the current request that has just ended.
+
+    For phases whose start is observed elsewhere, such as planning and plan
+    steps reported by the Portia execution hooks.
+
+    Args:
+        name: Name of the phase
+        duration: Duration of the phase in seconds
+        **attributes: Attributes of the span
+
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns()
+    trace.add(
+        Span(
+            name=name,
+            span_id=_new_span_id(),
+            parent_id=_parent_id(trace),
+            start_ns=end_ns - int(duration * 1e9),
+            end_ns=end_ns,
+            attributes=attributes,
+        )
+    )
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: Trace, span: Span) -> dict[str, Any]:
+    otlp_span = {
+        "traceId": trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+        ],
+        "status": (
+            {"code": STATUS_CODE_ERROR, "message": span.error}
+            if span.error
+            else {"code": STATUS_CODE_OK}
+        ),
+    }
+    if span.parent_id is not None:
+        otlp_span["parentSpanId"] = span.parent_id
+    return otlp_span
+
+
+def to_otlp(traces: list[Trace], service_name: str) -> dict[str, Any]:
+    """Convert traces to an OTLP/JSON ``ExportTraceServiceRequest``."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app"},
+                        "spans": [
+                            _otlp_span(trace, span)
+                            for trace in traces
+                            for span in [trace.root, *trace.spans]
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class TraceExporter:
+    """Export finished traces from a background thread.
+
+    Traces are exported as OTLP/JSON, appended as one line per trace to a file
+    and/or posted to an OTLP/HTTP collector endpoint (e.g.
+    ``http://localhost:4318/v1/traces``). The queue is bounded and traces are
+    dropped when it is full, so exporting never slows requests down.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        path: str | None = None,
+        endpoint: str | None = None,
+        max_queued: int = 1000,
+    ) -> None:
+        """Initialize the exporter and start its thread.
+
+        Args:
+            service_name: ``service.name`` resource attribute of the exported spans
+            path: File the traces are appended to
+            endpoint: OTLP/HTTP endpoint the traces are posted to
+            max_queued: Maximum number of traces waiting to be exported
+
+        """
+        self._service_name = service_name
+        self._path = path
+        self._endpoint = endpoint
+        self._queue: queue.Queue[Trace | None] = queue.Queue(max_queued)
+        self.exported = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace) -> None:
+        """Queue a finished trace for export."""
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        """Export the queued traces and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while (trace := self._queue.get()) is not None:
+            try:
+                self._write(trace)
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"Failed to export trace {trace.trace_id}: {e}")
+            else:
+                self.exported += 1
+
+    def _write(self, trace: Trace) -> None:
+        payload = json.dumps(to_otlp([trace], self._service_name))
+        if self._path is not None:
+            with open(self._path, "a") as file:  # noqa: PTH123
+                file.write(payload + "\n")
+        if self._endpoint is not None:
+            request = urllib.request.Request(  # noqa: S310
+                self._endpoint,
+                data=payload.encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=5):  # noqa: S310
+                pass
+
+
+_exporter: TraceExporter | None = None
+
+
+def configure_tracing(app_settings: "Settings") -> None:
+    """Start exporting traces if an export path or collector endpoint is configured."""
+    global _exporter  # noqa: PLW0603
+    shutdown_tracing()
+    if app_settings.tracing_export_path or app_settings.tracing_otlp_endpoint:
+        _exporter = TraceExporter(
+            service_name=app_settings.tracing_service_name,
+            path=app_settings.tracing_export_path,
+            endpoint=app_settings.tracing_otlp_endpoint,
+        )
+
+
+def shutdown_tracing() -> None:
+    """Export the queued traces and stop the exporter, if one was started."""
+    global _exporter  # noqa: PLW0603
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+def export_trace(trace: Trace) -> None:
+    """Queue a finished trace for export, if an exporter is configured."""
+    if _exporter is not None:
+        _exporter.export(trace)
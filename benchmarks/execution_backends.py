@@ -0,0 +1,153 @@
+"""Compare the throughput of the execution backends on runs of the CPU-bound stub tool.
+
+Starts the fake LLM in this process and, for each ``EXECUTION_BACKEND``, the
+real application in a subprocess (``benchmarks.server``) with the stub tools.
+Every run plans and executes a call to ``hash_tool``, which hashes its input
+repeatedly and serializes on the GIL with the thread backend. Runs go through
+the service as in production, so the measurement includes admission, the
+dispatch to worker threads or processes and the encoding of outputs sent back
+from worker processes. A share of the runs is streamed, which the hybrid
+backend keeps on worker threads.
+
+The ``async`` backend falls back to worker threads for ``hash_tool``, since the
+tool has no coroutine ``arun``.
+
+Usage:
+    uv run python -m benchmarks.execution_backends --requests 64 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+from collections.abc import Sequence
+from typing import Any
+
+import httpx
+
+from benchmarks.fake_llm import FakeLLMSettings
+from benchmarks.load_test import (
+    drive_load,
+    free_port,
+    percentile,
+    start_app,
+    start_fake_llm,
+    wait_until_healthy,
+)
+
+BACKENDS = ("thread", "process", "hybrid", "async")
+
+TOOL = "hash_tool"
+
+
+def stream_mix(streamed_ratio: float) -> dict[str, int]:
+    """Get the load test scenario mix streaming a share of the runs."""
+    streamed = round(streamed_ratio * 100)
+    mix = {"run": 100 - streamed, "stream": streamed}
+    return {scenario: weight for scenario, weight in mix.items() if weight > 0}
+
+
+async def measure_backend(backend: str, llm_port: int, args: argparse.Namespace) -> dict[str, Any]:
+    """Start the application with an execution backend and measure its run throughput."""
+    app_port = free_port()
+    workers = str(args.workers)
+    app_process = start_app(
+        app_port,
+        llm_port,
+        {
+            "EXECUTION_BACKEND": backend,
+            "MAX_WORKERS": workers,
+            "PROCESS_POOL_SIZE": workers,
+            "MAX_QUEUED_RUNS": str(args.requests),
+        },
+    )
+    mix = stream_mix(args.streamed_ratio)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{app_port}", limits=limits, timeout=args.request_timeout
+        ) as client:
+            # Ready once the worker processes have started and warmed up
+            await wait_until_healthy(client, wait_seconds=120, path="/health/ready")
+            if args.warmup:
+                await drive_load(client, mix, args.concurrency, args.warmup, TOOL)
+            results, duration = await drive_load(client, mix, args.concurrency, args.requests, TOOL)
+    finally:
+        app_process.terminate()
+        app_process.wait()
+
+    latencies = [latency for result in results.values() for latency in result.latencies]
+    return {
+        "backend": backend,
+        "runs": len(latencies),
+        "errors": sum(result.errors for result in results.values()),
+        "seconds": round(duration, 3),
+        "runs_per_second": round(len(latencies) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Start the fake LLM and measure every selected backend in turn."""
+    llm_port = free_port()
+    llm_server = start_fake_llm(
+        FakeLLMSettings(latency_seconds=args.llm_latency, tool_id=TOOL, plan_steps=1), llm_port
+    )
+    try:
+        return [await measure_backend(backend, llm_port, args) for backend in args.backends]
+    finally:
+        llm_server.should_exit = True
+
+
+def _parse_backends(value: str) -> list[str]:
+    backends = [backend.strip() for backend in value.split(",")]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown execution backends: {sorted(unknown)}")
+    return backends
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the benchmark from the command line and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends",
+        type=_parse_backends,
+        default=list(BACKENDS),
+        help="Comma-separated execution backends (default: all)",
+    )
+    parser.add_argument("--requests", type=int, default=64, help="Measured runs per backend")
+    parser.add_argument("--warmup", type=int, default=8, help="Unmeasured warm-up runs")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--workers", type=int, default=4, help="Worker threads and processes")
+    parser.add_argument(
+        "--streamed-ratio", type=float, default=0.25, help="Share of runs sent to /run/stream"
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.01, help="Fake LLM latency in seconds"
+    )
+    parser.add_argument(
+        "--request-timeout", type=float, default=120.0, help="Client timeout in seconds"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(results, indent=2))  # noqa: T201
+        return
+
+    print(  # noqa: T201
+        f"{'backend':<10}{'runs':>8}{'errors':>8}{'seconds':>10}{'runs/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}"
+    )
+    for result in results:
+        print(  # noqa: T201
+            f"{result['backend']:<10}{result['runs']:>8}{result['errors']:>8}"
+            f"{result['seconds']:>10}{result['runs_per_second']:>10}"
+            f"{result['p50_ms']:>10}{result['p95_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
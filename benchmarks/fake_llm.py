@@ -0,0 +1,181 @@
+"""Local fake of the OpenAI chat completions API for benchmarks.
+
+The fake answers every completion after a configurable latency. Structured
+output requests (``response_format`` JSON schemas or function tools) are
+answered with a minimal instance of the requested schema, and plain
+completions with a configurable number of tokens. Point the OpenAI client at
+it with ``OPENAI_BASE_URL=http://<host>:<port>/v1``.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI, Request
+
+
+@dataclass(frozen=True)
+class FakeLLMSettings:
+    """Behaviour of the fake LLM.
+
+    Attributes:
+        latency_seconds: Delay before each completion is returned
+        output_tokens: Number of tokens in text completions and generated strings
+        tool_id: Tool ID used for ``tool_id`` fields of generated plans
+        plan_steps: Number of steps in generated plans
+
+    """
+
+    latency_seconds: float = 0.05
+    output_tokens: int = 16
+    tool_id: str = "echo_tool"
+    plan_steps: int = 1
+
+
+def _resolve(schema: dict[str, Any], root: dict[str, Any]) -> dict[str, Any]:
+    """Resolve a local ``$ref`` of a JSON schema."""
+    while "$ref" in schema:
+        node: Any = root
+        for part in schema["$ref"].removeprefix("#/").split("/"):
+            node = node[part]
+        schema = node
+    return schema
+
+
+def schema_instance(  # noqa: C901, PLR0911
+    schema: dict[str, Any],
+    settings: FakeLLMSettings,
+    root: dict[str, Any] | None = None,
+    name: str = "",
+) -> Any:  # noqa: ANN401
+    """Generate a minimal instance of a JSON schema.
+
+    Args:
+        schema: The JSON schema to instantiate
+        settings: Behaviour of the fake LLM
+        root: Root schema that ``$ref`` pointers are resolved against
+        name: Name of the property being generated
+
+    Returns:
+        A value matching the schema
+
+    """
+    root = root or schema
+    schema = _resolve(schema, root)
+
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [_resolve(option, root) for option in schema[combinator]]
+            non_null = [option for option in options if option.get("type") != "null"]
+            return schema_instance((non_null or options)[0], settings, root, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema and name != "steps":
+        return schema["default"]
+
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((item for item in schema_type if item != "null"), "null")
+
+    if schema_type == "object":
+        return {
+            key: schema_instance(value, settings, root, key)
+            for key, value in schema.get("properties", {}).items()
+            if key in schema.get("required", []) or key == "steps"
+        }
+    if schema_type == "array":
+        count = settings.plan_steps if name == "steps" else schema.get("minItems", 0)
+        return [schema_instance(schema.get("items", {}), settings, root) for _ in range(count)]
+    if schema_type == "string":
+        if name == "tool_id":
+            return settings.tool_id
+        return " ".join(["stub"] * settings.output_tokens)
+    if schema_type in ("integer", "number"):
+        return schema.get("minimum", 0)
+    if schema_type == "boolean":
+        return False
+    return None
+
+
+def _completion_message(body: dict[str, Any], settings: FakeLLMSettings) -> dict[str, Any]:
+    """Build the assistant message answering a chat completion request."""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        return {"role": "assistant", "content": json.dumps(schema_instance(schema, settings))}
+
+    tools = body.get("tools") or []
+    if tools:
+        tool_choice = body.get("tool_choice")
+        function = tools[0]["function"]
+        if isinstance(tool_choice, dict):
+            chosen = tool_choice["function"]["name"]
+            function = next(
+                tool["function"] for tool in tools if tool["function"]["name"] == chosen
+            )
+        arguments = schema_instance(function.get("parameters", {}), settings)
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+                }
+            ],
+        }
+
+    return {"role": "assistant", "content": " ".join(["stub"] * settings.output_tokens)}
+
+
+def create_fake_llm_app(settings: FakeLLMSettings) -> FastAPI:
+    """Create the fake OpenAI-compatible API.
+
+    Args:
+        settings: Behaviour of the fake LLM
+
+    Returns:
+        An ASGI application serving ``/v1/chat/completions`` and ``/v1/models``
+
+    """
+    app = FastAPI(title="Fake LLM")
+    app.state.completions = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        await asyncio.sleep(settings.latency_seconds)
+        app.state.completions += 1
+
+        message = _completion_message(body, settings)
+        prompt_tokens = sum(len(str(item.get("content", "")).split()) for item in body["messages"])
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": settings.output_tokens,
+                "total_tokens": prompt_tokens + settings.output_tokens,
+            },
+        }
+
+    @app.get("/v1/models")
+    async def models() -> dict[str, Any]:
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    return app
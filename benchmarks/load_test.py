@@ -0,0 +1,275 @@
+"""Load test of the real application against a fake LLM and stub tools.
+
+Starts the fake LLM in this process and the application in a subprocess
+(``benchmarks.server``), drives ``/run``, ``/run/stream``, ``/tools`` and ``/health`` at the
+given concurrency and reports latency percentiles, throughput and the peak
+RSS of the application process.
+
+Usage:
+    uv run python -m benchmarks.load_test --concurrency 16 --requests 500
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+import uvicorn
+
+from benchmarks.fake_llm import FakeLLMSettings, create_fake_llm_app
+
+SCENARIOS = ("run", "stream", "tools", "health")
+
+
+@dataclass
+class ScenarioResult:
+    """Latencies and failures of one scenario."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Get a nearest-rank percentile of a sequence of values."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse a scenario mix such as ``run=8,tools=1,health=1``."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_llm(settings: FakeLLMSettings, port: int) -> uvicorn.Server:
+    """Serve the fake LLM from a background thread."""
+    server = uvicorn.Server(
+        uvicorn.Config(create_fake_llm_app(settings), port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def start_app(
+    port: int, llm_port: int, env_overrides: dict[str, str] | None = None
+) -> subprocess.Popen[bytes]:
+    """Start the application in a subprocess configured to use the fake LLM."""
+    env = {
+        **os.environ,
+        **(env_overrides or {}),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENAI_API_KEY": "fake",
+        "PORTIA_CONFIG__OPENAI_API_KEY": "fake",
+        "PORTIA_CONFIG__LLM_PROVIDER": "openai",
+        "TOOL_INDEX_TTL_SECONDS": "0",
+    }
+    return subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "benchmarks.server", "--port", str(port)], env=env
+    )
+
+
+async def wait_until_healthy(
+    client: httpx.AsyncClient, wait_seconds: float, path: str = "/health"
+) -> None:
+    """Poll a health endpoint of the application until it succeeds."""
+    deadline = time.monotonic() + wait_seconds
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(path)).status_code == httpx.codes.OK:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"The application did not become healthy within {wait_seconds}s")
+
+
+async def _request(client: httpx.AsyncClient, scenario: str, index: int, tool: str) -> bool:
+    if scenario == "run":
+        response = await client.post(
+            "/run", json={"query": f"Process the message 'message {index}'", "tools": [tool]}
+        )
+        return response.status_code == httpx.codes.OK and response.json()["success"]
+    if scenario == "stream":
+        body = {"query": f"Process the message 'message {index}'", "tools": [tool]}
+        async with client.stream("POST", "/run/stream", json=body) as response:
+            events = [line async for line in response.aiter_lines() if line.startswith("event:")]
+        return response.status_code == httpx.codes.OK and "event: result" in events
+    response = await client.get(f"/{scenario}")
+    return response.status_code == httpx.codes.OK
+
+
+async def drive_load(
+    client: httpx.AsyncClient, mix: dict[str, int], concurrency: int, requests: int, tool: str
+) -> tuple[dict[str, ScenarioResult], float]:
+    """Send requests drawn from the scenario mix with a fixed number of concurrent clients.
+
+    Returns:
+        The results by scenario and the wall-clock duration of the load in seconds
+
+    """
+    results = {scenario: ScenarioResult() for scenario in mix}
+    # A fixed seed keeps the sequence of scenarios identical between runs
+    scenarios = random.Random(0).choices(  # noqa: S311
+        list(mix), weights=list(mix.values()), k=requests
+    )
+    counter = itertools.count()
+
+    async def worker() -> None:
+        while (index := next(counter)) < requests:
+            scenario = scenarios[index]
+            start_time = time.perf_counter()
+            try:
+                succeeded = await _request(client, scenario, index, tool)
+            except httpx.HTTPError:
+                succeeded = False
+            results[scenario].latencies.append(time.perf_counter() - start_time)
+            if not succeeded:
+                results[scenario].errors += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start_time
+
+
+def _peak_child_rss_mb() -> float:
+    """Peak RSS of the largest terminated child process, in MiB."""
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def build_report(
+    results: dict[str, ScenarioResult], duration: float, peak_rss_mb: float
+) -> dict[str, Any]:
+    """Summarize the results of a load test."""
+    total = sum(len(result.latencies) for result in results.values())
+    return {
+        "duration_seconds": round(duration, 3),
+        "requests": total,
+        "requests_per_second": round(total / duration, 2) if duration else 0.0,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "scenarios": {
+            scenario: {
+                "requests": len(result.latencies),
+                "errors": result.errors,
+                "p50_ms": round(percentile(result.latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(result.latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(result.latencies, 99) * 1000, 2),
+            }
+            for scenario, result in results.items()
+        },
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(  # noqa: T201
+        f"{report['requests']} requests in {report['duration_seconds']}s "
+        f"({report['requests_per_second']} req/s), peak RSS {report['peak_rss_mb']} MiB"
+    )
+    header = f"{'scenario':<10}{'requests':>10}{'errors':>8}"
+    print(f"{header}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")  # noqa: T201
+    for scenario, stats in report["scenarios"].items():
+        print(  # noqa: T201
+            f"{scenario:<10}{stats['requests']:>10}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+
+
+async def run_load_test(args: argparse.Namespace) -> dict[str, Any]:
+    """Start the fake LLM and the application, run the load test and stop them again."""
+    llm_port = free_port()
+    app_port = free_port()
+    llm_server = start_fake_llm(
+        FakeLLMSettings(
+            latency_seconds=args.llm_latency,
+            output_tokens=args.llm_tokens,
+            tool_id=args.tool,
+            plan_steps=args.plan_steps,
+        ),
+        llm_port,
+    )
+    app_process = start_app(app_port, llm_port)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{app_port}", limits=limits, timeout=args.request_timeout
+        ) as client:
+            await wait_until_healthy(client, wait_seconds=60)
+            if args.warmup:
+                await drive_load(client, args.mix, args.concurrency, args.warmup, args.tool)
+            results, duration = await drive_load(
+                client, args.mix, args.concurrency, args.requests, args.tool
+            )
+    finally:
+        app_process.terminate()
+        app_process.wait()
+        llm_server.should_exit = True
+
+    return build_report(results, duration, _peak_child_rss_mb())
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured warm-up requests")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("run=8,tools=1,health=1"),
+        help="Weighted scenario mix (default: run=8,tools=1,health=1)",
+    )
+    parser.add_argument(
+        "--tool", default="echo_tool", help="Stub tool used by runs (echo_tool or hash_tool)"
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="Fake LLM latency in seconds"
+    )
+    parser.add_argument("--llm-tokens", type=int, default=16, help="Fake LLM output tokens")
+    parser.add_argument("--plan-steps", type=int, default=1, help="Steps in generated plans")
+    parser.add_argument(
+        "--request-timeout", type=float, default=60.0, help="Client timeout in seconds"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args))
+    if args.json:
+        print(json.dumps(report, indent=2))  # noqa: T201
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare the throughput of the default and the fast response serialization of runs.
+
+The default path is what FastAPI does with a returned ``RunResponse``: validate
+the model, convert it with ``jsonable_encoder`` and encode it with the standard
+library. The fast path encodes the run result directly with orjson, as the
+``/run`` endpoint does.
+
+Usage:
+    uv run python -m benchmarks.serialization --iterations 200 --large-size 5000
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+
+from app.responses import dumps, run_response_content
+from app.schemas.run import RunResponse
+
+
+def run_result(size: int) -> dict[str, Any]:
+    """Build a run result whose final output holds ``size`` search results."""
+    return {
+        "success": True,
+        "result": {
+            "value": [
+                {
+                    "title": f"Result {index}",
+                    "url": f"https://example.com/{index}",
+                    "score": index / max(size, 1),
+                    "tags": [f"tag-{index % 7}", f"tag-{index % 11}"],
+                }
+                for index in range(size)
+            ],
+            "summary": "Synthetic final output",
+        },
+        "error": None,
+        "execution_time": 1.25,
+        "queue_time": 0.01,
+    }
+
+
+def default_serialization(result: dict[str, Any]) -> bytes:
+    """Serialize a run result the way FastAPI serializes a returned ``RunResponse``."""
+    response = RunResponse.model_validate(run_response_content(result))
+    content = jsonable_encoder(RunResponse.model_validate(response.model_dump()))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_serialization(result: dict[str, Any]) -> bytes:
+    """Serialize a run result the way the ``/run`` endpoint does."""
+    return dumps(run_response_content(result))
+
+
+def _measure(
+    serialize: Callable[[dict[str, Any]], bytes], result: dict[str, Any], iterations: int
+) -> tuple[float, int]:
+    """Serialize the result repeatedly and return the responses per second and their size."""
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        body = serialize(result)
+    duration = time.perf_counter() - start_time
+    return iterations / duration, len(body)
+
+
+def run_benchmark(iterations: int, small_size: int, large_size: int) -> list[dict[str, Any]]:
+    """Run the benchmark for a small and a large result.
+
+    Args:
+        iterations: Number of responses serialized per path and result size
+        small_size: Number of search results in the small final output
+        large_size: Number of search results in the large final output
+
+    Returns:
+        The throughput of each path for each result size
+
+    """
+    results = []
+    for label, size in (("small", small_size), ("large", large_size)):
+        result = run_result(size)
+        for path, serialize in (("default", default_serialization), ("fast", fast_serialization)):
+            responses_per_second, body_bytes = _measure(serialize, result, iterations)
+            results.append(
+                {
+                    "result": label,
+                    "path": path,
+                    "bytes": body_bytes,
+                    "responses_per_second": responses_per_second,
+                    "megabytes_per_second": responses_per_second * body_bytes / 1e6,
+                }
+            )
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the benchmark from the command line and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="Responses per measurement")
+    parser.add_argument("--small-size", type=int, default=1, help="Results in the small output")
+    parser.add_argument("--large-size", type=int, default=5000, help="Results in the large output")
+    args = parser.parse_args(argv)
+
+    print(f"{'result':<8}{'path':<10}{'bytes':>10}{'responses/s':>14}{'MB/s':>10}")  # noqa: T201
+    for result in run_benchmark(args.iterations, args.small_size, args.large_size):
+        print(  # noqa: T201
+            f"{result['result']:<8}{result['path']:<10}{result['bytes']:>10}"
+            f"{result['responses_per_second']:>14.1f}{result['megabytes_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
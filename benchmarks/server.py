@@ -0,0 +1,38 @@
+"""Serve the real application with deterministic stub tools, for load tests.
+
+Usage:
+    uv run python -m benchmarks.server --port 8100
+"""
+
+import argparse
+from collections.abc import Sequence
+from unittest.mock import patch
+
+import uvicorn
+
+from app.main import app
+from app.services import process_worker
+from app.services.portia_service import PortiaService
+from benchmarks.stub_tools import initialize_stub_worker, stub_tools
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the application with the stub tools instead of the tool registry.
+
+    Worker processes of the process execution backends are initialized with the
+    stub tools as well.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=8100, help="Bind port")
+    args = parser.parse_args(argv)
+
+    with (
+        patch.object(PortiaService, "_load_tools", lambda _: stub_tools()),
+        patch.object(process_worker, "initialize_worker", initialize_stub_worker),
+    ):
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
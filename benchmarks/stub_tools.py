@@ -0,0 +1,80 @@
+"""Deterministic stub tools for benchmarks."""
+
+import hashlib
+from typing import Any
+
+from portia import Tool, ToolRunContext
+from pydantic import BaseModel, Field
+
+from app.services import process_worker
+from app.services.process_worker import initialize_worker
+
+
+class EchoToolSchema(BaseModel):
+    """Input of the echo tool."""
+
+    message: str = Field(..., description="The message to echo")
+
+
+class EchoTool(Tool[str]):
+    """Return the input message unchanged."""
+
+    id: str = "echo_tool"
+    name: str = "Echo Tool"
+    description: str = "Returns the message it is given"
+    args_schema: type[BaseModel] = EchoToolSchema
+    output_schema: tuple[str, str] = ("str", "The echoed message")
+
+    def run(self, _: ToolRunContext, message: str) -> str:
+        """Echo the message."""
+        return message
+
+
+class HashToolSchema(BaseModel):
+    """Input of the hash tool."""
+
+    message: str = Field(..., description="The message to hash")
+
+
+class HashTool(Tool[str]):
+    """Hash the input message repeatedly, a CPU-bound tool with a deterministic output."""
+
+    id: str = "hash_tool"
+    name: str = "Hash Tool"
+    description: str = "Returns a repeated SHA-256 digest of the message"
+    args_schema: type[BaseModel] = HashToolSchema
+    output_schema: tuple[str, str] = ("str", "The hex digest")
+    rounds: int = 20000
+
+    def run(self, _: ToolRunContext, message: str) -> str:
+        """Hash the message ``rounds`` times."""
+        digest = message.encode()
+        for _round in range(self.rounds):
+            digest = hashlib.sha256(digest).digest()
+        return digest.hex()
+
+
+def stub_tools() -> list[Tool]:
+    """Get the stub tools served by the benchmark server."""
+    return [EchoTool(), HashTool()]
+
+
+class StubToolRegistry:
+    """Tool registry serving the stub tools, in place of the default tool registry."""
+
+    def __init__(self, **_: Any) -> None:
+        """Initialize the registry, ignoring the Portia configuration."""
+
+    def get_tools(self) -> list[Tool]:
+        """Get the stub tools."""
+        return stub_tools()
+
+
+def initialize_stub_worker() -> None:
+    """Initialize a worker process of the process execution backends with the stub tools.
+
+    Worker processes are spawned and build their tool map from the default tool
+    registry, so the registry is replaced in the worker before it is initialized.
+    """
+    process_worker.DefaultToolRegistry = StubToolRegistry
+    initialize_worker()
@@ -0,0 +1,243 @@
+"""Tests for the run admission controller."""
+
+import asyncio
+
+import pytest
+
+from app.exceptions import ServiceOverloadedError, TenantOverloadedError
+from app.services.admission import AdmissionController, RunPriority, TenantLimits
+
+
+@pytest.mark.unit
+class TestAdmissionController:
+    """Test cases for AdmissionController."""
+
+    @pytest.mark.asyncio
+    async def test_admits_immediately_when_free(self) -> None:
+        """Test that runs are admitted without waiting while slots are free."""
+        admission = AdmissionController(max_in_flight=2, max_queued=0, retry_after_seconds=5)
+
+        assert await admission.acquire() == 0.0
+        assert await admission.acquire() == 0.0
+        assert admission.in_flight == 2
+
+        admission.release()
+        admission.release()
+        assert admission.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self) -> None:
+        """Test that runs are rejected with a retry hint when the queue is full."""
+        admission = AdmissionController(max_in_flight=1, max_queued=1, retry_after_seconds=7)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+
+        assert admission.is_full is True
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            await admission.acquire()
+
+        assert exc_info.value.retry_after == 7
+        assert admission.stats()["rejected"] == 1
+        waiter.cancel()
+
+    @pytest.mark.asyncio
+    async def test_queued_runs_are_admitted_in_order(self) -> None:
+        """Test that waiting runs get released slots in FIFO order and report their wait."""
+        admission = AdmissionController(max_in_flight=1, max_queued=2, retry_after_seconds=5)
+        await admission.acquire()
+        order: list[str] = []
+
+        async def wait(name: str) -> float:
+            queue_time = await admission.acquire()
+            order.append(name)
+            return queue_time
+
+        first = asyncio.create_task(wait("first"))
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0.01)
+        assert admission.queued == 2
+
+        admission.release()
+        assert await first > 0
+        admission.release()
+        await second
+
+        assert order == ["first", "second"]
+        assert admission.in_flight == 1
+        assert admission.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_capacity_ignores_queue_limit(self) -> None:
+        """Test that callers can opt to wait even when the queue is full."""
+        admission = AdmissionController(max_in_flight=1, max_queued=0, retry_after_seconds=5)
+        await admission.acquire()
+
+        waiter = asyncio.create_task(admission.acquire(wait_for_capacity=True))
+        await asyncio.sleep(0)
+        admission.release()
+
+        assert await waiter >= 0
+        assert admission.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        """Test that a cancelled waiter is removed and does not consume a slot."""
+        admission = AdmissionController(max_in_flight=1, max_queued=1, retry_after_seconds=5)
+        await admission.acquire()
+
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        assert admission.queued == 0
+        admission.release()
+        assert admission.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_tenants_share_slots_by_weight(self) -> None:
+        """Test that a tenant with a long queue does not starve other tenants."""
+        admission = AdmissionController(
+            max_in_flight=1,
+            max_queued=20,
+            retry_after_seconds=5,
+            tenant_limits={"interactive": TenantLimits(weight=2.0)},
+        )
+        await admission.acquire("batch")
+        order: list[str] = []
+
+        async def wait(tenant: str) -> None:
+            await admission.acquire(tenant)
+            order.append(tenant)
+
+        waiters = [asyncio.create_task(wait("batch")) for _ in range(4)]
+        await asyncio.sleep(0)
+        waiters += [asyncio.create_task(wait("interactive")) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        for _ in waiters:
+            admission.release(order[-1] if order else "batch")
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+
+        # Interactive runs arriving later overtake the batch backlog, which already holds a slot
+        assert order == ["interactive", "interactive", "batch", "batch", "batch", "batch"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_concurrency_cap(self) -> None:
+        """Test that a capped tenant waits while other tenants use the free slots."""
+        admission = AdmissionController(
+            max_in_flight=3,
+            max_queued=10,
+            retry_after_seconds=5,
+            tenant_limits={"batch": TenantLimits(max_in_flight=1)},
+        )
+        await admission.acquire("batch")
+
+        capped = asyncio.create_task(admission.acquire("batch"))
+        await asyncio.sleep(0)
+        assert await admission.acquire("interactive") == 0.0
+        assert admission.tenant_stats()["batch"]["queued"] == 1
+
+        admission.release("batch")
+        assert await capped >= 0
+        assert admission.tenant_stats()["batch"]["in_flight"] == 1
+        assert admission.in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_tenant_queue_limit(self) -> None:
+        """Test that runs beyond a tenant's queue limit are rejected for that tenant only."""
+        admission = AdmissionController(
+            max_in_flight=1,
+            max_queued=10,
+            retry_after_seconds=3,
+            default_tenant_limits=TenantLimits(max_queued=1),
+        )
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(TenantOverloadedError) as exc_info:
+            await admission.acquire("a")
+        with pytest.raises(TenantOverloadedError):
+            admission.check("a")
+        admission.check("b")
+
+        assert exc_info.value.tenant == "a"
+        assert exc_info.value.retry_after == 3
+        assert admission.tenant_stats()["a"]["rejected"] == 2
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    @pytest.mark.asyncio
+    async def test_high_priority_runs_are_admitted_first(self) -> None:
+        """Test that waiting high priority runs overtake the low priority queue."""
+        admission = AdmissionController(max_in_flight=1, max_queued=10, retry_after_seconds=5)
+        await admission.acquire(priority=RunPriority.LOW)
+        order: list[str] = []
+
+        async def wait(name: str, priority: RunPriority) -> None:
+            await admission.acquire(priority=priority)
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(f"low {i}", RunPriority.LOW)) for i in range(2)]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(wait("high", RunPriority.HIGH)))
+        await asyncio.sleep(0)
+        assert admission.lane_stats()["low"]["queued"] == 2
+        assert admission.lane_stats()["high"]["queued"] == 1
+
+        admission.release(priority=RunPriority.LOW)
+        await asyncio.sleep(0)
+        admission.release(priority=RunPriority.HIGH)
+        await asyncio.sleep(0)
+        admission.release(priority=RunPriority.LOW)
+        await asyncio.gather(*waiters)
+
+        assert order == ["high", "low 0", "low 1"]
+        assert admission.lane_stats()["high"]["admitted"] == 1
+        assert admission.lane_stats()["low"]["admitted"] == 3
+
+    @pytest.mark.asyncio
+    async def test_reserved_high_priority_slots(self) -> None:
+        """Test that low priority runs leave the reserved slots to high priority runs."""
+        admission = AdmissionController(
+            max_in_flight=3,
+            max_queued=10,
+            retry_after_seconds=5,
+            reserved_high_priority=1,
+            low_priority_borrowing=False,
+        )
+        await admission.acquire(priority=RunPriority.LOW)
+        await admission.acquire(priority=RunPriority.LOW)
+
+        low = asyncio.create_task(admission.acquire(priority=RunPriority.LOW))
+        await asyncio.sleep(0)
+        assert not low.done()
+        assert await admission.acquire(priority=RunPriority.HIGH) == 0.0
+
+        admission.release(priority=RunPriority.LOW)
+        assert await low >= 0
+        assert admission.lane_stats()["low"]["in_flight"] == 2
+        assert admission.lane_stats()["high"]["in_flight"] == 1
+
+    @pytest.mark.asyncio
+    async def test_low_priority_runs_borrow_idle_reserved_slots(self) -> None:
+        """Test that low priority runs use the reserved slots only while high priority is idle."""
+        admission = AdmissionController(
+            max_in_flight=4, max_queued=10, retry_after_seconds=5, reserved_high_priority=2
+        )
+        await admission.acquire(priority=RunPriority.HIGH)
+        await admission.acquire(priority=RunPriority.LOW)
+        await admission.acquire(priority=RunPriority.LOW)
+
+        low = asyncio.create_task(admission.acquire(priority=RunPriority.LOW))
+        await asyncio.sleep(0)
+        assert not low.done()
+        assert admission.in_flight == 3
+
+        admission.release(priority=RunPriority.HIGH)
+        assert await low >= 0
+        assert await admission.acquire(priority=RunPriority.LOW) == 0.0
+        assert admission.lane_stats()["low"]["in_flight"] == 4
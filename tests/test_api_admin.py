@@ -0,0 +1,104 @@
+"""Tests for the admin API endpoints."""
+
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def sample_tool_index_stats() -> dict[str, Any]:
+    """Sample tool index stats for testing."""
+    return {
+        "tool_count": 3,
+        "refresh_count": 2,
+        "refresh_failures": 0,
+        "last_refresh_duration": 0.5,
+        "total_refresh_duration": 1.1,
+        "last_refreshed_at": 1735689600.0,
+    }
+
+
+ADMIN_HEADERS = {"X-Admin-Key": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_api_key() -> Iterator[None]:
+    """Configure the admin API key sent in ``ADMIN_HEADERS``."""
+    with patch("app.api.admin.settings") as mock_settings:
+        mock_settings.admin_api_key = "secret"
+        yield
+
+
+@pytest.mark.unit
+def test_get_tool_index_stats(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_tool_index_stats: dict[str, Any],
+) -> None:
+    """Test retrieving tool index stats."""
+    mock_portia_service.tool_index.stats.return_value = sample_tool_index_stats
+
+    response = client.get("/admin/tools/index", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 200
+    assert response.json() == sample_tool_index_stats
+
+
+@pytest.mark.unit
+def test_refresh_tool_index(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_tool_index_stats: dict[str, Any],
+) -> None:
+    """Test triggering a tool index refresh."""
+    mock_portia_service.refresh_tool_index = AsyncMock(return_value=sample_tool_index_stats)
+
+    response = client.post("/admin/tools/refresh", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["refresh_count"] == 2
+    mock_portia_service.refresh_tool_index.assert_awaited_once()
+
+
+@pytest.mark.unit
+def test_refresh_tool_index_error(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test a failing tool index refresh."""
+    mock_portia_service.refresh_tool_index = AsyncMock(side_effect=Exception("Registry error"))
+
+    response = client.post("/admin/tools/refresh", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 500
+    assert "Failed to refresh the tool index" in response.json()["detail"]
+
+
+@pytest.mark.unit
+def test_admin_key_required(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_tool_index_stats: dict[str, Any],
+) -> None:
+    """Test that admin endpoints require the configured admin key."""
+    mock_portia_service.tool_index.stats.return_value = sample_tool_index_stats
+
+    assert client.get("/admin/tools/index").status_code == 401
+    assert client.get("/admin/tools/index", headers={"X-Admin-Key": "wrong"}).status_code == 401
+    assert client.get("/admin/tools/index", headers=ADMIN_HEADERS).status_code == 200
+
+
+@pytest.mark.unit
+def test_admin_endpoints_disabled_without_key(
+    client: TestClient, mock_portia_service: Mock
+) -> None:
+    """Test that admin endpoints are disabled when no admin key is configured."""
+    mock_portia_service.refresh_tool_index = AsyncMock()
+
+    with patch("app.api.admin.settings") as mock_settings:
+        mock_settings.admin_api_key = None
+
+        response = client.post("/admin/tools/refresh", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 404
+    mock_portia_service.refresh_tool_index.assert_not_awaited()
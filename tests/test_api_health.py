@@ -1,5 +1,7 @@
 """Tests for the health API endpoint."""
 
+from unittest.mock import Mock
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -33,3 +35,53 @@ def test_health_check_response_schema(client: TestClient) -> None:
     # Check data types
     assert isinstance(data["status"], str)
     assert isinstance(data["version"], str)
+
+
+@pytest.mark.unit
+def test_liveness_check(client: TestClient) -> None:
+    """Test that the liveness check succeeds."""
+    response = client.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive", "version": settings.application_version}
+
+
+def _readiness(*, ready: bool) -> dict:
+    return {
+        "ready": ready,
+        "checks": {"warm": True, "tool_index": True, "queue": ready, "error_rate": True},
+        "in_flight_runs": 4,
+        "queued_runs": 0 if ready else 100,
+        "queue_threshold": 100,
+        "recent_runs": 12,
+        "error_rate": 0.25,
+    }
+
+
+@pytest.mark.unit
+def test_readiness_check_ready(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test the readiness check of a ready service."""
+    mock_portia_service.readiness.return_value = _readiness(ready=True)
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["checks"]["queue"] is True
+    assert data["queue_threshold"] == 100
+    assert data["error_rate"] == 0.25
+
+
+@pytest.mark.unit
+def test_readiness_check_not_ready(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test that the readiness check fails with 503 when a check fails."""
+    mock_portia_service.readiness.return_value = _readiness(ready=False)
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "not_ready"
+    assert data["checks"]["queue"] is False
+    assert data["queued_runs"] == 100
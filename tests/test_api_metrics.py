@@ -0,0 +1,33 @@
+"""Tests for the metrics API endpoint."""
+
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.metrics import HTTP_REQUEST_SECONDS, snapshot
+
+
+@pytest.mark.unit
+def test_get_metrics(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test that registry and service metrics are exposed in the Prometheus format."""
+    mock_portia_service.collect_metrics.return_value = [
+        snapshot("portia_instance_pool_size", "Pooled Portia instances", 2)
+    ]
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE portia_run_stage_duration_seconds histogram" in response.text
+    assert "portia_instance_pool_size 2" in response.text
+
+
+@pytest.mark.unit
+def test_request_latency_is_recorded_by_route(client: TestClient) -> None:
+    """Test that HTTP request latency is recorded under the route template."""
+    before = HTTP_REQUEST_SECONDS.count(method="GET", route="/health", status="200")
+
+    client.get("/health")
+
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route="/health", status="200") == before + 1
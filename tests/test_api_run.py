@@ -1,12 +1,25 @@
 """Tests for the run API endpoint."""
 
+import json
+from collections.abc import AsyncIterator
 from typing import Any
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.exceptions import InvalidToolsError
+from app.config import settings
+from app.exceptions import (
+    InvalidToolsError,
+    RunTimeoutError,
+    ServiceOverloadedError,
+    TenantOverloadedError,
+)
+from app.schemas.run import BatchRunItemResponse
+from app.services.admission import RunPriority
+from app.services.portia_service import BatchItem
+from app.services.result_cache import CachePolicy, CacheStatus
+from app.services.run_context import RunEvent
 
 
 @pytest.mark.unit
@@ -32,10 +45,66 @@ def test_run_query_success(
 
     # Verify the service was called with correct parameters
     mock_portia_service.run_query_sync.assert_called_once_with(
-        query=sample_run_request["query"], tools=sample_run_request["tools"]
+        query=sample_run_request["query"],
+        tools=sample_run_request["tools"],
+        deadline=None,
+        cache_policy=CachePolicy(),
+        coalesce=True,
+        priority=RunPriority.HIGH,
     )
 
 
+@pytest.mark.unit
+def test_run_query_serializes_model_result(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test that final outputs holding pydantic models are serialized."""
+    mock_portia_service.run_query_sync.return_value = {
+        "success": True,
+        "result": {"value": BatchRunItemResponse(index=0, success=True)},
+        "execution_time": 1.0,
+    }
+
+    response = client.post("/run", json=sample_run_request)
+
+    assert response.status_code == 200
+    assert response.json()["result"]["value"]["index"] == 0
+
+
+@pytest.mark.unit
+def test_run_query_coalescing_opt_out(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test that requests can opt out of sharing an identical run in flight."""
+    mock_portia_service.run_query_sync.return_value = sample_successful_run_result
+
+    response = client.post("/run", json={**sample_run_request, "coalesce": False})
+
+    assert response.status_code == 200
+    assert mock_portia_service.run_query_sync.call_args.kwargs["coalesce"] is False
+
+
+@pytest.mark.unit
+def test_run_query_low_priority(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test that requests can run in the low priority lane."""
+    mock_portia_service.run_query_sync.return_value = sample_successful_run_result
+
+    response = client.post("/run", json={**sample_run_request, "priority": "low"})
+
+    assert response.status_code == 200
+    assert mock_portia_service.run_query_sync.call_args.kwargs["priority"] is RunPriority.LOW
+
+
 @pytest.mark.unit
 def test_run_query_failure(
     client: TestClient,
@@ -98,6 +167,133 @@ def test_run_query_unexpected_error(
     assert "Internal server error" in data["detail"]
 
 
+@pytest.mark.unit
+def test_run_query_overloaded(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test query execution rejected because the run queue is full."""
+    mock_portia_service.run_query_sync.side_effect = ServiceOverloadedError(retry_after=5)
+
+    response = client.post("/run", json=sample_run_request)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+@pytest.mark.unit
+def test_run_query_tenant_overloaded(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test query execution rejected because the queue of its tenant is full."""
+    mock_portia_service.run_query_sync.side_effect = TenantOverloadedError("batch", retry_after=5)
+
+    response = client.post("/run", json=sample_run_request)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert "batch" in response.json()["detail"]
+
+
+@pytest.mark.unit
+def test_run_query_timeout(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test query execution that does not finish before its deadline."""
+    mock_portia_service.run_query_sync.side_effect = RunTimeoutError(timeout=1.5)
+
+    response = client.post("/run", json={**sample_run_request, "timeout": 1.5})
+
+    assert response.status_code == 504
+    assert "1.5s" in response.json()["detail"]
+    mock_portia_service.run_query_sync.assert_called_once_with(
+        query=sample_run_request["query"],
+        tools=sample_run_request["tools"],
+        deadline=1.5,
+        cache_policy=CachePolicy(),
+        coalesce=True,
+        priority=RunPriority.HIGH,
+    )
+
+
+@pytest.mark.unit
+def test_run_query_cache_headers(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test that Cache-Control is passed to the service and the cache status is reported."""
+    mock_portia_service.run_query_sync.return_value = {
+        **sample_successful_run_result,
+        "cache_status": CacheStatus.HIT,
+        "cache_age": 12,
+    }
+
+    response = client.post("/run", json=sample_run_request, headers={"Cache-Control": "max-age=60"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["Age"] == "12"
+    assert response.json()["result"] == sample_successful_run_result["result"]
+    assert mock_portia_service.run_query_sync.call_args.kwargs["cache_policy"] == CachePolicy(
+        max_age=60
+    )
+
+
+@pytest.mark.unit
+def test_run_query_without_result_cache_has_no_cache_header(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test that no cache headers are sent when the result cache is disabled."""
+    mock_portia_service.run_query_sync.return_value = sample_successful_run_result
+
+    response = client.post("/run", json=sample_run_request)
+
+    assert "X-Cache" not in response.headers
+    assert "Age" not in response.headers
+
+
+@pytest.mark.unit
+def test_run_query_invalid_timeout(
+    client: TestClient,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test that non-positive timeouts are rejected."""
+    response = client.post("/run", json={**sample_run_request, "timeout": 0})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.unit
+def test_run_query_reports_queue_time(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test that queue wait time is reported separately from execution time."""
+    mock_portia_service.run_query_sync.return_value = {
+        **sample_successful_run_result,
+        "queue_time": 0.75,
+    }
+
+    response = client.post("/run", json=sample_run_request)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["queue_time"] == 0.75
+    assert data["execution_time"] == 2.5
+
+
 @pytest.mark.unit
 def test_run_query_invalid_request_empty_query(client: TestClient) -> None:
     """Test run query with empty query."""
@@ -160,3 +356,144 @@ def test_get_available_tools_error(
     data = response.json()
 
     assert "Failed to get available tools" in data["detail"]
+
+
+async def _events(*events: RunEvent) -> AsyncIterator[RunEvent]:
+    """Yield the given run events."""
+    for event in events:
+        yield event
+
+
+@pytest.mark.unit
+def test_stream_run_query_success(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+) -> None:
+    """Test streaming query progress as Server-Sent Events."""
+    mock_portia_service.stream_query = AsyncMock(
+        return_value=_events(
+            RunEvent(event="plan_created", data={"plan_id": "plan-1", "steps": []}),
+            RunEvent(event="result", data=sample_successful_run_result),
+        )
+    )
+
+    response = client.post("/run/stream", json=sample_run_request)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = [message for message in response.text.split("\n\n") if message]
+    assert messages[0] == 'event: plan_created\ndata: {"plan_id":"plan-1","steps":[]}'
+    event_line, data_line = messages[1].split("\n")
+    assert event_line == "event: result"
+    result = json.loads(data_line.removeprefix("data: "))
+    assert result["success"] is True
+    assert result["result"]["value"] == "4.0"
+    assert result["error"] is None
+    mock_portia_service.stream_query.assert_awaited_once_with(
+        query=sample_run_request["query"],
+        tools=sample_run_request["tools"],
+        deadline=None,
+        priority=RunPriority.HIGH,
+    )
+
+
+@pytest.mark.unit
+def test_stream_run_query_invalid_tools(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test streaming a query with invalid tools."""
+    mock_portia_service.stream_query = AsyncMock(
+        side_effect=InvalidToolsError(invalid_tools=["invalid_tool"], available_tools=[])
+    )
+
+    response = client.post("/run/stream", json=sample_run_request)
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["invalid_tools"] == ["invalid_tool"]
+
+
+async def _batch_results(*results: tuple[int, dict[str, Any]]) -> AsyncIterator[tuple[int, dict]]:
+    """Yield the given batch results."""
+    for result in results:
+        yield result
+
+
+@pytest.mark.unit
+def test_run_batch_success(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+    sample_failed_run_result: dict[str, Any],
+) -> None:
+    """Test that batch results are returned in request order."""
+    mock_portia_service.run_batch.return_value = _batch_results(
+        (1, sample_failed_run_result), (0, sample_successful_run_result)
+    )
+
+    response = client.post(
+        "/run/batch",
+        json={"items": [sample_run_request, sample_run_request], "max_concurrency": 2},
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False]
+    assert results[1]["error"] == "Test error message"
+    mock_portia_service.run_batch.assert_called_once_with(
+        items=[
+            BatchItem(query=sample_run_request["query"], tools=sample_run_request["tools"]),
+            BatchItem(query=sample_run_request["query"], tools=sample_run_request["tools"]),
+        ],
+        max_concurrency=2,
+    )
+
+
+@pytest.mark.unit
+def test_run_batch_stream(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+    sample_successful_run_result: dict[str, Any],
+    sample_failed_run_result: dict[str, Any],
+) -> None:
+    """Test streaming batch results as NDJSON in completion order."""
+    mock_portia_service.run_batch.return_value = _batch_results(
+        (1, sample_failed_run_result), (0, sample_successful_run_result)
+    )
+
+    response = client.post(
+        "/run/batch", json={"items": [sample_run_request, sample_run_request], "stream": True}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
+    assert lines[1]["result"]["value"] == "4.0"
+
+
+@pytest.mark.unit
+def test_run_batch_too_many_items(
+    client: TestClient,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test that batches over the item limit are rejected."""
+    items = [sample_run_request] * (settings.batch_max_items + 1)
+
+    response = client.post("/run/batch", json={"items": items})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+
+
+@pytest.mark.unit
+def test_run_batch_empty(client: TestClient) -> None:
+    """Test that empty batches are rejected."""
+    response = client.post("/run/batch", json={"items": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,138 @@
+"""Tests for the /runs job API endpoints."""
+
+from typing import Any
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.exceptions import InvalidToolsError, JobNotFoundError, JobStoreFullError
+from app.services.admission import RunPriority
+from app.services.job_store import Job, JobStatus
+
+
+@pytest.fixture
+def sample_job() -> Job:
+    """Sample finished job for testing."""
+    return Job(
+        query="What is 2+2?",
+        tools=["calculator_tool"],
+        id="job-1",
+        status=JobStatus.SUCCEEDED,
+        created_at=1.0,
+        started_at=1.5,
+        finished_at=4.0,
+        result={"value": "4.0"},
+        execution_time=2.5,
+    )
+
+
+@pytest.mark.unit
+def test_submit_run(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test submitting a job returns its ID immediately."""
+    mock_portia_service.submit_job = AsyncMock(
+        return_value=Job(
+            query=sample_run_request["query"], tools=sample_run_request["tools"], id="job-1"
+        )
+    )
+
+    response = client.post("/runs", json={**sample_run_request, "timeout": 30})
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["id"] == "job-1"
+    assert data["status"] == "pending"
+    assert data["result"] is None
+    mock_portia_service.submit_job.assert_awaited_once_with(
+        query=sample_run_request["query"],
+        tools=sample_run_request["tools"],
+        priority=RunPriority.LOW,
+        deadline=30,
+        coalesce=True,
+    )
+
+
+@pytest.mark.unit
+def test_submit_run_invalid_tools(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test submitting a job with invalid tools."""
+    mock_portia_service.submit_job = AsyncMock(
+        side_effect=InvalidToolsError(
+            invalid_tools=["invalid_tool"], available_tools=["calculator_tool"]
+        )
+    )
+
+    response = client.post("/runs", json=sample_run_request)
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["invalid_tools"] == ["invalid_tool"]
+
+
+@pytest.mark.unit
+def test_submit_run_store_full(
+    client: TestClient,
+    mock_portia_service: Mock,
+    sample_run_request: dict[str, Any],
+) -> None:
+    """Test submitting a job when the job store is full."""
+    mock_portia_service.submit_job = AsyncMock(side_effect=JobStoreFullError(10))
+
+    response = client.post("/runs", json=sample_run_request)
+
+    assert response.status_code == 503
+
+
+@pytest.mark.unit
+def test_get_run(client: TestClient, mock_portia_service: Mock, sample_job: Job) -> None:
+    """Test getting a finished job."""
+    mock_portia_service.get_job.return_value = sample_job
+
+    response = client.get("/runs/job-1")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "succeeded"
+    assert data["result"] == {"value": "4.0"}
+    assert data["execution_time"] == 2.5
+    mock_portia_service.get_job.assert_called_once_with("job-1")
+
+
+@pytest.mark.unit
+def test_get_run_not_found(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test getting an unknown job."""
+    mock_portia_service.get_job.side_effect = JobNotFoundError("missing")
+
+    response = client.get("/runs/missing")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.unit
+def test_cancel_run(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test cancelling a job."""
+    mock_portia_service.cancel_job.return_value = Job(
+        query="What is 2+2?", tools=[], id="job-1", status=JobStatus.CANCELLED
+    )
+
+    response = client.delete("/runs/job-1")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    mock_portia_service.cancel_job.assert_called_once_with("job-1")
+
+
+@pytest.mark.unit
+def test_cancel_run_not_found(client: TestClient, mock_portia_service: Mock) -> None:
+    """Test cancelling an unknown job."""
+    mock_portia_service.cancel_job.side_effect = JobNotFoundError("missing")
+
+    response = client.delete("/runs/missing")
+
+    assert response.status_code == 404
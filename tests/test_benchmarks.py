@@ -0,0 +1,130 @@
+"""Tests for the report and payload helpers of the benchmarks."""
+
+import argparse
+import json
+import math
+
+import pytest
+
+from benchmarks.execution_backends import stream_mix
+from benchmarks.fake_llm import FakeLLMSettings, schema_instance
+from benchmarks.load_test import ScenarioResult, build_report, parse_mix, percentile
+from benchmarks.serialization import default_serialization, fast_serialization, run_result
+
+
+@pytest.mark.unit
+class TestLoadTestReport:
+    """Test cases for the load test report helpers."""
+
+    @pytest.mark.parametrize(
+        ("percent", "expected"),
+        [(0, 1.0), (50, 5.0), (90, 9.0), (95, 10.0), (99, 10.0), (100, 10.0)],
+    )
+    def test_percentile_uses_nearest_rank(self, percent: float, expected: float) -> None:
+        """Test nearest-rank percentiles of unordered values."""
+        values = [7.0, 2.0, 9.0, 1.0, 10.0, 4.0, 3.0, 8.0, 6.0, 5.0]
+
+        assert percentile(values, percent) == expected
+
+    def test_percentile_of_no_values(self) -> None:
+        """Test that the percentile of no values is NaN."""
+        assert math.isnan(percentile([], 50))
+
+    def test_parse_mix(self) -> None:
+        """Test parsing weighted scenario mixes, with a weight of 1 by default."""
+        assert parse_mix("run=8,stream=2,tools") == {"run": 8, "stream": 2, "tools": 1}
+
+    def test_parse_mix_rejects_unknown_scenarios(self) -> None:
+        """Test that unknown scenarios are reported as argument errors."""
+        with pytest.raises(argparse.ArgumentTypeError, match="'search'"):
+            parse_mix("run=1,search=1")
+
+    def test_build_report(self) -> None:
+        """Test the throughput and the latency percentiles of a report."""
+        results = {
+            "run": ScenarioResult(latencies=[0.1, 0.2, 0.3, 0.4], errors=1),
+            "health": ScenarioResult(latencies=[0.001]),
+        }
+
+        report = build_report(results, duration=2.0, peak_rss_mb=123.456)
+
+        assert report["requests"] == 5
+        assert report["requests_per_second"] == 2.5
+        assert report["peak_rss_mb"] == 123.5
+        assert report["scenarios"]["run"] == {
+            "requests": 4,
+            "errors": 1,
+            "p50_ms": 200.0,
+            "p95_ms": 400.0,
+            "p99_ms": 400.0,
+        }
+        assert report["scenarios"]["health"]["p50_ms"] == 1.0
+
+    def test_build_report_without_duration(self) -> None:
+        """Test that an empty load test reports no throughput."""
+        report = build_report({"run": ScenarioResult()}, duration=0.0, peak_rss_mb=0.0)
+
+        assert report["requests_per_second"] == 0.0
+        assert report["scenarios"]["run"]["requests"] == 0
+
+    @pytest.mark.parametrize(
+        ("streamed_ratio", "expected"),
+        [(0.25, {"run": 75, "stream": 25}), (0.0, {"run": 100}), (1.0, {"stream": 100})],
+    )
+    def test_stream_mix(self, streamed_ratio: float, expected: dict[str, int]) -> None:
+        """Test the scenario mix of the execution backend benchmark."""
+        assert stream_mix(streamed_ratio) == expected
+
+
+@pytest.mark.unit
+class TestFakeLLMSchemaInstance:
+    """Test cases for the schema instances generated by the fake LLM."""
+
+    def test_generates_required_fields_and_plan_steps(self) -> None:
+        """Test that required fields and plan steps are generated from referenced schemas."""
+        schema = {
+            "type": "object",
+            "properties": {
+                "steps": {"type": "array", "items": {"$ref": "#/$defs/Step"}},
+                "comment": {"type": "string"},
+            },
+            "required": [],
+            "$defs": {
+                "Step": {
+                    "type": "object",
+                    "properties": {
+                        "task": {"type": "string"},
+                        "tool_id": {"anyOf": [{"type": "null"}, {"type": "string"}]},
+                        "attempts": {"type": "integer", "minimum": 1},
+                        "kind": {"enum": ["tool", "llm"]},
+                    },
+                    "required": ["task", "tool_id", "attempts", "kind"],
+                }
+            },
+        }
+        settings = FakeLLMSettings(output_tokens=2, tool_id="hash_tool", plan_steps=2)
+
+        instance = schema_instance(schema, settings)
+
+        step = {"task": "stub stub", "tool_id": "hash_tool", "attempts": 1, "kind": "tool"}
+        assert instance == {"steps": [step, step]}
+
+    def test_prefers_const_and_defaults(self) -> None:
+        """Test that constants and defaults are used as given."""
+        settings = FakeLLMSettings()
+
+        assert schema_instance({"const": "fixed"}, settings) == "fixed"
+        assert schema_instance({"type": "number", "default": 0.5}, settings) == 0.5
+        assert schema_instance({"type": ["null", "boolean"]}, settings) is False
+
+
+@pytest.mark.unit
+class TestSerializationBenchmark:
+    """Test cases for the payloads of the serialization benchmark."""
+
+    def test_fast_serialization_matches_default(self) -> None:
+        """Test that both serializations encode the same response."""
+        result = run_result(3)
+
+        assert json.loads(fast_serialization(result)) == json.loads(default_serialization(result))
+        assert len(json.loads(fast_serialization(result))["result"]["value"]) == 3
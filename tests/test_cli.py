@@ -0,0 +1,96 @@
+"""Tests for the command line interface."""
+
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.cli import main
+
+
+@pytest.mark.unit
+class TestServe:
+    """Test cases for the serve command."""
+
+    @patch("app.cli.uvicorn.run")
+    @patch("app.cli.settings")
+    def test_serve_defaults(self, mock_settings: Mock, mock_run: Mock) -> None:
+        """Test that settings are used and one worker process is started per CPU core."""
+        mock_settings.host = "127.0.0.1"
+        mock_settings.port = 8000
+        mock_settings.max_workers = 4
+        mock_settings.web_concurrency = None
+        mock_settings.log_level = "INFO"
+
+        with patch("app.cli.available_cpus", return_value=6):
+            main(["serve"])
+
+        mock_run.assert_called_once_with(
+            "app.main:app",
+            host="127.0.0.1",
+            port=8000,
+            workers=6,
+            log_level="info",
+            timeout_graceful_shutdown=None,
+        )
+
+    @patch("app.cli.uvicorn.run")
+    @patch("app.cli.settings")
+    def test_serve_overrides(
+        self, mock_settings: Mock, mock_run: Mock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that command line arguments override the settings."""
+        mock_settings.web_concurrency = 3
+        mock_settings.log_level = "DEBUG"
+        monkeypatch.delenv("MAX_WORKERS", raising=False)
+
+        main(
+            [
+                "serve",
+                "--host",
+                "0.0.0.0",  # noqa: S104
+                "--port",
+                "9000",
+                "--workers",
+                "2",
+                "--max-workers",
+                "8",
+                "--graceful-timeout",
+                "30",
+            ]
+        )
+
+        mock_run.assert_called_once_with(
+            "app.main:app",
+            host="0.0.0.0",  # noqa: S104
+            port=9000,
+            workers=2,
+            log_level="debug",
+            timeout_graceful_shutdown=30.0,
+        )
+        assert mock_settings.max_workers == 8
+        assert os.environ["MAX_WORKERS"] == "8"
+
+    @patch("app.cli.uvicorn.run")
+    @patch("app.cli.settings")
+    def test_serve_shares_cpus_between_process_pools(
+        self, mock_settings: Mock, mock_run: Mock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the process pools of the workers split the available CPUs."""
+        mock_settings.web_concurrency = None
+        mock_settings.execution_backend = "process"
+        mock_settings.process_pool_size = None
+        mock_settings.log_level = "INFO"
+        monkeypatch.setenv("PROCESS_POOL_SIZE", "")
+
+        with patch("app.cli.available_cpus", return_value=8):
+            main(["serve", "--workers", "2"])
+
+        assert mock_run.call_args.kwargs["workers"] == 2
+        assert mock_settings.process_pool_size == 4
+        assert os.environ["PROCESS_POOL_SIZE"] == "4"
+
+    def test_requires_a_command(self) -> None:
+        """Test that running without a command prints usage and exits."""
+        with pytest.raises(SystemExit):
+            main([])
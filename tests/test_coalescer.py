@@ -0,0 +1,103 @@
+"""Tests for the coalescing of identical runs."""
+
+import asyncio
+
+import pytest
+
+from app.services.coalescer import RequestCoalescer
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_identical_callers_share_one_execution() -> None:
+    """Test that callers with the same key share the execution in flight."""
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+    release = asyncio.Event()
+    executions = 0
+
+    async def execute() -> str:
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return f"result {executions}"
+
+    callers = [asyncio.create_task(coalescer.run("key", execute)) for _ in range(3)]
+    other = asyncio.create_task(coalescer.run("other", execute))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*callers)
+    assert [result for result, _ in results] == ["result 1"] * 3
+    assert [coalesced for _, coalesced in results] == [False, True, True]
+    assert (await other)[1] is False
+    assert coalescer.stats() == {"in_flight": 0, "executions": 2, "coalesced": 2}
+
+    # Executions that have finished are not shared anymore
+    assert await coalescer.run("key", execute) == ("result 3", False)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_errors_are_shared() -> None:
+    """Test that every caller receives the exception of the shared execution."""
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+
+    async def execute() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(
+        coalescer.run("key", execute), coalescer.run("key", execute), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_execution_cancelled_once_every_caller_left() -> None:
+    """Test that one caller leaving does not cancel the execution shared with others."""
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+    release = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def execute() -> str:
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    first = asyncio.create_task(coalescer.run("key", execute))
+    second = asyncio.create_task(coalescer.run("key", execute))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert coalescer.stats()["in_flight"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_joining_callers_wait_until_their_deadline() -> None:
+    """Test that a caller joining an execution gives up at its own deadline."""
+    coalescer: RequestCoalescer[str] = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def execute() -> str:
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(coalescer.run("key", execute, deadline=0.01))
+    await asyncio.sleep(0)
+
+    with pytest.raises(TimeoutError):
+        await coalescer.run("key", execute, deadline=0.01)
+
+    release.set()
+    assert await first == ("done", False)
@@ -1,11 +1,17 @@
 """Tests for the config module."""
 
 import logging
+from pathlib import Path
 from unittest.mock import mock_open, patch
 
 import pytest
 
-from app.config import Settings, _get_version_from_pyproject, get_app_config
+from app.config import (
+    Settings,
+    _get_version_from_pyproject,
+    available_cpus,
+    get_app_config,
+)
 
 
 @pytest.mark.unit
@@ -22,6 +28,20 @@ class TestSettings:
             assert settings.debug is False
             assert settings.host == "127.0.0.1"
             assert settings.port == 8000
+            assert settings.web_concurrency is None
+            assert settings.execution_backend == "thread"
+            assert settings.portia_instance_pool_size == 16
+            assert settings.max_in_flight_runs is None
+            assert settings.max_queued_runs == 100
+            assert settings.run_timeout_max_seconds == 300.0
+            assert settings.result_cache_enabled is False
+            assert settings.result_cache_backend == "memory"
+            assert settings.plan_cache_enabled is False
+            assert settings.plan_cache_strategy == "exact"
+            assert settings.tool_index_ttl_seconds == 300.0
+            assert settings.readiness_max_queued_runs is None
+            assert settings.readiness_max_error_rate == 0.5
+            assert settings.admin_api_key is None
             assert settings.allowed_domains == ["*"]
             assert settings.portia_config.openai_api_key is None
             assert settings.portia_config.anthropic_api_key is None
@@ -141,3 +161,28 @@ def test_logging_configuration() -> None:
 
     test_settings = Settings(log_level="ERROR")
     assert test_settings.log_level == "ERROR"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("cpu_max", "affinity", "expected"),
+    [
+        ("max 100000\n", 64, 64),
+        ("200000 100000\n", 64, 2),
+        ("150000 100000\n", 64, 2),
+        ("800000 100000\n", 4, 4),
+        (None, 16, 16),
+    ],
+)
+def test_available_cpus(tmp_path: Path, cpu_max: str | None, affinity: int, expected: int) -> None:
+    """Test that the CPU affinity and the cgroup CPU quota bound the available CPUs."""
+    cpu_max_path = tmp_path / "cpu.max"
+    if cpu_max is not None:
+        cpu_max_path.write_text(cpu_max)
+
+    with (
+        patch("app.config._CGROUP_V2_CPU_MAX", cpu_max_path),
+        patch("app.config._CGROUP_V1_CPU_QUOTA", tmp_path / "missing"),
+        patch("app.config.os.sched_getaffinity", return_value=set(range(affinity))),
+    ):
+        assert available_cpus() == expected
@@ -0,0 +1,34 @@
+"""Tests for the rolling error rate."""
+
+import pytest
+
+from app.services.error_rate import RollingErrorRate
+
+
+@pytest.mark.unit
+def test_rate_of_recent_runs() -> None:
+    """Test that the rate covers the runs recorded within the window."""
+    window = RollingErrorRate(window_seconds=60, buckets=6)
+    assert window.rate(now=100.0) is None
+
+    window.record(error=False, now=100.0)
+    window.record(error=True, now=105.0)
+    window.record(error=True, now=125.0)
+
+    assert window.counts(now=130.0) == (3, 2)
+    assert window.rate(now=130.0) == pytest.approx(2 / 3)
+
+
+@pytest.mark.unit
+def test_old_runs_leave_the_window() -> None:
+    """Test that buckets older than the window are ignored and then reused."""
+    window = RollingErrorRate(window_seconds=60, buckets=6)
+    window.record(error=True, now=100.0)
+    window.record(error=False, now=150.0)
+
+    assert window.counts(now=165.0) == (1, 0)
+    assert window.counts(now=300.0) == (0, 0)
+
+    # The bucket of the first run is reused without its old counts
+    window.record(error=False, now=160.0)
+    assert window.counts(now=160.0) == (2, 0)
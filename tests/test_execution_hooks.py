@@ -0,0 +1,116 @@
+"""Tests for the Portia execution hooks."""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+from portia.execution_hooks import BeforeStepExecutionOutcome
+
+from app.exceptions import RunCancelledError
+from app.services.execution_hooks import create_execution_hooks
+from app.services.metrics import RUN_STAGE_SECONDS
+from app.services.run_context import RunContext, RunEvent, current_run
+
+
+@pytest.mark.unit
+class TestExecutionHooks:
+    """Test cases for the execution hooks."""
+
+    def test_hooks_report_to_current_run(self) -> None:
+        """Test that hooks emit events to the run bound to the current context."""
+        hooks = create_execution_hooks()
+        events: list[RunEvent] = []
+        step = Mock(task="Add the numbers", tool_id="calculator_tool", output="$sum")
+        plan = Mock(id="plan-1", steps=[step])
+        plan_run = Mock(current_step_index=0)
+
+        token = current_run.set(RunContext(on_event=events.append))
+        try:
+            hooks.before_plan_run(plan, plan_run)
+            outcome = hooks.before_step_execution(plan, plan_run, step)
+            hooks.after_step_execution(plan, plan_run, step, {"value": 4})
+        finally:
+            current_run.reset(token)
+
+        assert outcome == BeforeStepExecutionOutcome.CONTINUE
+        assert events == [
+            RunEvent(
+                event="plan_created",
+                data={
+                    "plan_id": "plan-1",
+                    "steps": [
+                        {"task": "Add the numbers", "tool_id": "calculator_tool", "output": "$sum"}
+                    ],
+                },
+            ),
+            RunEvent(
+                event="step_started",
+                data={"step_index": 0, "task": "Add the numbers", "tool_id": "calculator_tool"},
+            ),
+            RunEvent(
+                event="step_completed",
+                data={
+                    "step_index": 0,
+                    "task": "Add the numbers",
+                    "tool_id": "calculator_tool",
+                    "output": {"value": 4},
+                },
+            ),
+        ]
+
+    def test_hooks_without_run_context(self) -> None:
+        """Test that hooks are no-ops outside of a run."""
+        hooks = create_execution_hooks()
+        step = Mock()
+        plan = Mock(steps=[step])
+
+        hooks.before_plan_run(plan, Mock())
+        outcome = hooks.before_step_execution(plan, Mock(), step)
+        hooks.after_step_execution(plan, Mock(), step, Mock())
+
+        assert outcome == BeforeStepExecutionOutcome.CONTINUE
+
+    def test_hooks_stop_cancelled_runs(self) -> None:
+        """Test that cancelled runs are stopped before their next step or tool call."""
+        hooks = create_execution_hooks()
+        run_context = RunContext()
+        run_context.cancel()
+
+        token = current_run.set(run_context)
+        try:
+            with pytest.raises(RunCancelledError):
+                hooks.before_step_execution(Mock(), Mock(), Mock())
+            with pytest.raises(RunCancelledError):
+                hooks.before_tool_call(Mock(), {}, Mock(), Mock())
+        finally:
+            current_run.reset(token)
+
+    def test_before_tool_call_allows_active_runs(self) -> None:
+        """Test that tool calls of active runs proceed without clarifications."""
+        hooks = create_execution_hooks()
+
+        token = current_run.set(RunContext())
+        try:
+            assert hooks.before_tool_call(Mock(), {}, Mock(), Mock()) is None
+        finally:
+            current_run.reset(token)
+
+    def test_hooks_record_planning_and_step_durations(self) -> None:
+        """Test that planning and step durations are recorded for timed runs."""
+        hooks = create_execution_hooks()
+        step = Mock(task="Add the numbers", tool_id="calculator_tool", output="$sum")
+        plan = Mock(id="plan-1", steps=[step])
+        plan_run = Mock(current_step_index=0)
+        before_planning = RUN_STAGE_SECONDS.count(stage="planning")
+        before_steps = RUN_STAGE_SECONDS.count(stage="step")
+
+        token = current_run.set(RunContext(started_at=time.perf_counter()))
+        try:
+            hooks.before_plan_run(plan, plan_run)
+            hooks.before_step_execution(plan, plan_run, step)
+            hooks.after_step_execution(plan, plan_run, step, {"value": 4})
+        finally:
+            current_run.reset(token)
+
+        assert RUN_STAGE_SECONDS.count(stage="planning") == before_planning + 1
+        assert RUN_STAGE_SECONDS.count(stage="step") == before_steps + 1
@@ -0,0 +1,58 @@
+"""Tests for the import time of the application."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Seconds importing app.main may take in a fresh interpreter, well above the usual
+# few hundred milliseconds so that only regressions like eager SDK imports fail
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+
+# Modules that must only be imported when the Portia service starts
+DEFERRED_MODULES = ("portia", "openai", "anthropic", "langchain_core", "google.genai")
+
+_PROFILE_SCRIPT = f"""
+import json
+import sys
+import time
+
+start_time = time.perf_counter()
+import app.main
+
+print(json.dumps({{
+    "seconds": time.perf_counter() - start_time,
+    "deferred_imported": [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def _profile_import() -> dict:
+    """Import app.main in a fresh interpreter and report its import time."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", _PROFILE_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+def test_app_import_defers_sdk_imports() -> None:
+    """Test that importing the application does not import the Portia SDK."""
+    assert _profile_import()["deferred_imported"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+def test_app_import_time_budget() -> None:
+    """Test that importing the application stays within the import time budget."""
+    # The best of a few runs is less sensitive to a busy machine than a single run
+    seconds = min(_profile_import()["seconds"] for _ in range(3))
+
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS
@@ -0,0 +1,53 @@
+"""Tests for the Portia instance pool."""
+
+import pytest
+
+from app.services.instance_pool import InstancePool, tool_set_key
+
+
+@pytest.mark.unit
+class TestInstancePool:
+    """Test cases for InstancePool."""
+
+    def test_tool_set_key_is_order_independent(self) -> None:
+        """Test that tool set keys ignore order and duplicates."""
+        assert tool_set_key(["a", "b"]) == tool_set_key(["b", "a", "a"])
+
+    def test_get_and_put(self) -> None:
+        """Test storing and retrieving instances."""
+        pool: InstancePool[str] = InstancePool(max_size=2)
+
+        assert pool.get(tool_set_key(["a"])) is None
+        pool.put(tool_set_key(["a"]), "instance-a")
+
+        assert pool.get(tool_set_key(["a"])) == "instance-a"
+        assert tool_set_key(["a"]) in pool
+        assert len(pool) == 1
+        assert pool.hits == 1
+        assert pool.misses == 1
+
+    def test_lru_eviction(self) -> None:
+        """Test that the least recently used entry is evicted first."""
+        pool: InstancePool[str] = InstancePool(max_size=2)
+        pool.put(tool_set_key(["a"]), "instance-a")
+        pool.put(tool_set_key(["b"]), "instance-b")
+        pool.get(tool_set_key(["a"]))
+        pool.put(tool_set_key(["c"]), "instance-c")
+
+        assert tool_set_key(["a"]) in pool
+        assert tool_set_key(["b"]) not in pool
+        assert tool_set_key(["c"]) in pool
+        assert pool.evictions == 1
+
+    def test_clear(self) -> None:
+        """Test clearing the pool."""
+        pool: InstancePool[str] = InstancePool(max_size=2)
+        pool.put(tool_set_key(["a"]), "instance-a")
+        pool.clear()
+
+        assert len(pool) == 0
+
+    def test_invalid_max_size(self) -> None:
+        """Test that a non-positive capacity is rejected."""
+        with pytest.raises(ValueError, match="max_size"):
+            InstancePool(max_size=0)
@@ -0,0 +1,158 @@
+"""Tests for the job store."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.exceptions import JobNotFoundError, JobStoreFullError
+from app.services.job_store import Job, JobStatus, JobStore
+
+
+async def _succeed(_: Job) -> dict[str, Any]:
+    """Job runner returning a successful result."""
+    return {"success": True, "result": {"value": "4.0"}, "execution_time": 0.1}
+
+
+async def _fail(_: Job) -> dict[str, Any]:
+    """Job runner returning a failed result."""
+    return {"success": False, "error": "Test error", "execution_time": 0.1}
+
+
+async def _block(_: Job) -> dict[str, Any]:
+    """Job runner that never finishes on its own."""
+    await asyncio.Event().wait()
+    return {"success": True}
+
+
+async def _wait_until_finished(job: Job) -> None:
+    """Wait for a job to reach a terminal state."""
+    for _ in range(100):
+        if job.status.is_finished:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.unit
+class TestJobStore:
+    """Test cases for JobStore."""
+
+    @pytest.mark.asyncio
+    async def test_successful_job(self) -> None:
+        """Test that a successful run is recorded on the job."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=2)
+
+        job = store.submit("What is 2+2?", ["calculator_tool"], _succeed)
+        assert job.status == JobStatus.PENDING
+        await _wait_until_finished(job)
+
+        assert store.get(job.id) is job
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"value": "4.0"}
+        assert job.started_at is not None
+        assert job.finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_job(self) -> None:
+        """Test that a failed run is recorded on the job."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=2)
+
+        job = store.submit("What is 2+2?", [], _fail)
+        await _wait_until_finished(job)
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Test error"
+
+    @pytest.mark.asyncio
+    async def test_cancel_job(self) -> None:
+        """Test cancelling a running job and that cancelling again is a no-op."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=2)
+
+        job = store.submit("What is 2+2?", [], _block)
+        await asyncio.sleep(0)
+        store.cancel(job.id)
+        await asyncio.sleep(0)
+
+        assert job.status == JobStatus.CANCELLED
+        assert store.cancel(job.id).status == JobStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self) -> None:
+        """Test that jobs beyond the concurrency limit stay pending."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=1)
+
+        first = store.submit("first", [], _block)
+        second = store.submit("second", [], _block)
+        await asyncio.sleep(0.01)
+
+        assert first.status == JobStatus.RUNNING
+        assert second.status == JobStatus.PENDING
+        assert store.stats()["running"] == 1
+        assert store.stats()["pending"] == 1
+
+        store.cancel(first.id)
+        store.cancel(second.id)
+
+    @pytest.mark.asyncio
+    async def test_retention_evicts_oldest_finished_job(self) -> None:
+        """Test that the oldest finished job is dropped when the store is full."""
+        store = JobStore(max_retained=2, retention_seconds=60, max_concurrency=2)
+
+        first = store.submit("first", [], _succeed)
+        await _wait_until_finished(first)
+        second = store.submit("second", [], _succeed)
+        await _wait_until_finished(second)
+        store.submit("third", [], _succeed)
+
+        with pytest.raises(JobNotFoundError):
+            store.get(first.id)
+        assert store.get(second.id) is second
+        assert len(store) == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_jobs_are_pruned(self) -> None:
+        """Test that finished jobs past the retention period are dropped."""
+        store = JobStore(max_retained=10, retention_seconds=0, max_concurrency=2)
+
+        job = store.submit("first", [], _succeed)
+        await _wait_until_finished(job)
+        store.prune()
+
+        assert len(store) == 0
+
+    @pytest.mark.asyncio
+    async def test_store_full_of_unfinished_jobs(self) -> None:
+        """Test that submissions are rejected when every retained job is unfinished."""
+        store = JobStore(max_retained=1, retention_seconds=60, max_concurrency=1)
+        job = store.submit("first", [], _block)
+
+        with pytest.raises(JobStoreFullError):
+            store.submit("second", [], _block)
+
+        store.cancel(job.id)
+
+    @pytest.mark.asyncio
+    async def test_pending_jobs_are_bounded(self) -> None:
+        """Test that submissions are rejected once the maximum of unfinished jobs is reached."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=1, max_pending=2)
+        first = store.submit("first", [], _block)
+        second = store.submit("second", [], _block)
+
+        with pytest.raises(JobStoreFullError) as exc_info:
+            store.submit("third", [], _block)
+        assert exc_info.value.max_jobs == 2
+
+        store.cancel(first.id)
+        third = store.submit("third", [], _block)
+
+        store.cancel(second.id)
+        store.cancel(third.id)
+
+    def test_get_unknown_job(self) -> None:
+        """Test getting a job that does not exist."""
+        store = JobStore(max_retained=10, retention_seconds=60, max_concurrency=1)
+
+        with pytest.raises(JobNotFoundError) as exc_info:
+            store.get("missing")
+
+        assert exc_info.value.job_id == "missing"
@@ -0,0 +1,127 @@
+"""Tests for the logging pipeline."""
+
+import json
+import logging
+import queue
+import sys
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import Settings
+from app.logging_config import (
+    SAMPLED,
+    JsonFormatter,
+    LoggedQuery,
+    NonBlockingQueueHandler,
+    SampleFilter,
+    configure_logging,
+    dropped_records,
+    shutdown_logging,
+)
+
+
+def _record(msg: str = "Run %s finished", *args: object, **extra: object) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args or ("r1",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def restore_root_logger() -> Generator[None, None, None]:
+    """Restore the root logger configuration after a test."""
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    yield
+    shutdown_logging()
+    root.setLevel(level)
+    root.handlers[:] = handlers
+
+
+@pytest.mark.unit
+def test_json_formatter_includes_extra_fields() -> None:
+    """Test that records are formatted as JSON with their extra fields."""
+    entry = json.loads(JsonFormatter().format(_record(execution_time=1.5, sampled=True)))
+
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["message"] == "Run r1 finished"
+    assert entry["execution_time"] == 1.5
+    assert "sampled" not in entry
+
+
+@pytest.mark.unit
+def test_json_formatter_includes_exceptions() -> None:
+    """Test that exception tracebacks are included in JSON records."""
+    try:
+        raise ValueError("boom")  # noqa: TRY301
+    except ValueError:
+        record = _record()
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert "ValueError: boom" in entry["exception"]
+
+
+@pytest.mark.unit
+def test_sample_filter_only_samples_marked_records() -> None:
+    """Test that only records logged with SAMPLED are subject to sampling."""
+    drop_all = SampleFilter(rate=0.0)
+
+    assert drop_all.filter(_record(**SAMPLED)) is False
+    assert drop_all.filter(_record()) is True
+    assert SampleFilter(rate=1.0).filter(_record(**SAMPLED)) is True
+
+
+@pytest.mark.unit
+def test_queue_handler_defers_formatting_and_drops_when_full() -> None:
+    """Test that queued records are not formatted and overflowing records are dropped."""
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    query = MagicMock(spec=LoggedQuery)
+
+    handler.handle(_record("Received %s", query))
+    handler.handle(_record())
+
+    assert log_queue.get_nowait().args == (query,)
+    query.__str__.assert_not_called()
+    assert handler.dropped == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [
+        ("full", "'What is the weather in London?'"),
+        ("truncate", "'What is th'... (30 chars)"),
+        ("hash", "sha256:"),
+    ],
+)
+def test_logged_query(mode: str, expected: str) -> None:
+    """Test that queries are logged in full, truncated or hashed."""
+    with patch(
+        "app.logging_config.settings", Settings(log_query_mode=mode, log_query_max_chars=10)
+    ):
+        rendered = str(LoggedQuery("What is the weather in London?"))
+
+    assert rendered.startswith(expected)
+    if mode == "hash":
+        assert "London" not in rendered
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("restore_root_logger")
+def test_configure_logging_writes_json_from_listener(capsys: pytest.CaptureFixture) -> None:
+    """Test that records are written as JSON by the listener once flushed."""
+    configure_logging(Settings(log_format="json", log_level="DEBUG"))
+
+    logging.getLogger("app.test").debug("Run %s finished", "r1", extra={"queue_time": 0.1})
+    shutdown_logging()
+
+    entry = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert entry["message"] == "Run r1 finished"
+    assert entry["queue_time"] == 0.1
+    assert logging.getLogger().level == logging.DEBUG
+    assert dropped_records() == 0
@@ -0,0 +1,105 @@
+"""Tests for the in-process metrics."""
+
+import threading
+
+import pytest
+
+from app.services.metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    render_metrics,
+    snapshot,
+)
+
+
+@pytest.mark.unit
+class TestCounter:
+    """Test cases for Counter."""
+
+    def test_sums_values_recorded_by_all_threads(self) -> None:
+        """Test that per-thread shards are merged when collected."""
+        counter = Counter("test_runs", "Test runs", labelnames=("outcome",))
+
+        def record() -> None:
+            for _ in range(1000):
+                counter.inc(outcome="success")
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(2, outcome="error")
+
+        assert counter.value(outcome="success") == 4000
+        assert counter.value(outcome="error") == 2
+
+    def test_rejects_unknown_labels(self) -> None:
+        """Test that labels must match the label names of the metric."""
+        counter = Counter("test_runs", "Test runs", labelnames=("outcome",))
+
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.inc(status="success")
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """Test cases for Histogram."""
+
+    def test_collects_cumulative_buckets(self) -> None:
+        """Test that buckets are cumulative and include the +Inf bucket."""
+        histogram = Histogram("test_seconds", "Test latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        samples = {
+            (name, labels.get("le")): value for name, labels, value in histogram.collect().samples
+        }
+
+        assert samples[("test_seconds_bucket", "0.1")] == 2
+        assert samples[("test_seconds_bucket", "1")] == 3
+        assert samples[("test_seconds_bucket", "+Inf")] == 4
+        assert samples[("test_seconds_sum", None)] == pytest.approx(3.65)
+        assert samples[("test_seconds_count", None)] == 4
+        assert histogram.count() == 4
+
+    def test_time(self) -> None:
+        """Test that durations of managed blocks are observed."""
+        histogram = Histogram("test_seconds", "Test latency", labelnames=("stage",))
+
+        with histogram.time(stage="planning"):
+            pass
+
+        assert histogram.count(stage="planning") == 1
+
+
+@pytest.mark.unit
+def test_render_metrics() -> None:
+    """Test rendering in the Prometheus text exposition format."""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("test_runs", "Test runs", labelnames=("tool_set",)))
+    counter.inc(tool_set='say "hi"')
+
+    text = render_metrics(
+        [*registry.collect(), snapshot("test_pool_size", "Pool size", 3)],
+    )
+
+    assert text == (
+        "# HELP test_runs Test runs\n"
+        "# TYPE test_runs counter\n"
+        'test_runs_total{tool_set="say \\"hi\\""} 1\n'
+        "# HELP test_pool_size Pool size\n"
+        "# TYPE test_pool_size gauge\n"
+        "test_pool_size 3\n"
+    )
+
+
+@pytest.mark.unit
+def test_register_rejects_duplicate_names() -> None:
+    """Test that a metric name can only be registered once."""
+    registry = MetricsRegistry()
+    registry.register(Counter("test_runs", "Test runs"))
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(Counter("test_runs", "Test runs"))
@@ -0,0 +1,134 @@
+"""Tests for the shared model and HTTP client registry."""
+
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from app.services.model_clients import DEFAULT_OPENAI_ENDPOINT, ModelClientRegistry
+from app.services.portia_service import _model_client_snapshots
+
+
+class _Models(BaseModel):
+    default_model: Any = None
+    planning_model: Any = None
+    execution_model: Any = None
+    introspection_model: Any = None
+    summarizer_model: Any = None
+
+
+class _Config(BaseModel):
+    """Stand-in for the Portia configuration, resolving models to new objects on each call."""
+
+    models: _Models
+    ollama_base_url: str | None = None
+
+    def get_default_model(self) -> str:
+        return "ollama/llama3"
+
+    def get_generative_model(self, model: str) -> object:
+        if model.endswith("broken"):
+            raise ValueError(model)
+        return object()
+
+
+def _registry() -> ModelClientRegistry:
+    return ModelClientRegistry(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30)
+
+
+@pytest.mark.unit
+def test_share_models_resolves_each_model_once() -> None:
+    """Test that identical models are shared across fields and configurations."""
+    registry = _registry()
+    custom_model = object()
+    config = _Config(
+        models=_Models(
+            planning_model="ollama/llama3",
+            execution_model="ollama/mistral",
+            summarizer_model=custom_model,
+        ),
+        ollama_base_url="http://localhost:11434",
+    )
+
+    shared = registry.share_models(config)
+    shared_again = registry.share_models(config)
+
+    assert shared.models.default_model is shared.models.planning_model
+    assert shared.models.execution_model is shared_again.models.execution_model
+    assert shared.models.summarizer_model is custom_model
+    assert config.models.planning_model == "ollama/llama3"
+    assert registry.stats()["models"] == 2
+    assert registry.stats()["builds"] == 2
+
+
+@pytest.mark.unit
+def test_share_models_leaves_failing_models_to_the_sdk() -> None:
+    """Test that a model that cannot be built stays a model name."""
+    registry = _registry()
+    config = _Config(models=_Models(planning_model="ollama/broken", execution_model="no-provider"))
+
+    shared = registry.share_models(config)
+
+    assert shared.models.planning_model == "ollama/broken"
+    assert shared.models.execution_model == "no-provider"
+    assert not isinstance(shared.models.default_model, str)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_http_clients_are_pooled_per_endpoint() -> None:
+    """Test that models of an endpoint share HTTP clients and report their pools."""
+    registry = _registry()
+
+    clients = registry._http_clients("openai", DEFAULT_OPENAI_ENDPOINT)  # noqa: SLF001
+    assert registry._http_clients("openai", DEFAULT_OPENAI_ENDPOINT) is clients  # noqa: SLF001
+
+    stats = registry.stats()
+    assert stats["max_connections"] == 10
+    assert stats["pools"] == [
+        {"pool": f"openai {DEFAULT_OPENAI_ENDPOINT}", "client": client, "connections": 0, "idle": 0}
+        for client in ("sync", "async")
+    ]
+
+    await registry.aclose()
+    assert clients.sync.is_closed
+    assert clients.async_.is_closed
+    assert registry.stats()["pools"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stats_skip_pools_that_cannot_be_read(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the stats leave out clients without the expected connection pool."""
+    registry = _registry()
+    clients = registry._http_clients("openai", DEFAULT_OPENAI_ENDPOINT)  # noqa: SLF001
+    monkeypatch.setattr(clients.sync, "_transport", object())
+
+    assert [pool["client"] for pool in registry.stats()["pools"]] == ["async"]
+
+    monkeypatch.undo()
+    await registry.aclose()
+
+
+@pytest.mark.unit
+def test_model_client_snapshots() -> None:
+    """Test the pool utilization metrics of the shared HTTP clients."""
+    snapshots = _model_client_snapshots(
+        {
+            "hits": 3,
+            "builds": 1,
+            "max_connections": 10,
+            "pools": [{"pool": "openai url", "client": "sync", "connections": 4, "idle": 1}],
+        }
+    )
+    metrics = {metric.name: metric for metric in snapshots}
+
+    labels = {"pool": "openai url", "client": "sync"}
+    assert metrics["portia_llm_http_connections"].samples == [
+        ("portia_llm_http_connections", {**labels, "state": "active"}, 3),
+        ("portia_llm_http_connections", {**labels, "state": "idle"}, 1),
+    ]
+    assert metrics["portia_llm_http_pool_utilization"].samples == [
+        ("portia_llm_http_pool_utilization", labels, 0.3)
+    ]
+    assert metrics["portia_llm_shared_model_lookups"].samples[0][2] == 3
@@ -0,0 +1,88 @@
+"""Tests for the plan cache."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services.instance_pool import tool_set_key
+from app.services.plan_cache import (
+    PlanCache,
+    PlanCacheStrategy,
+    QueryTemplate,
+    normalize_query,
+)
+
+
+@pytest.mark.unit
+class TestNormalizeQuery:
+    """Test cases for normalize_query."""
+
+    def test_exact_strategy_normalizes_whitespace(self) -> None:
+        """Test that the exact strategy only collapses whitespace."""
+        assert normalize_query("  What is\n2+2? ", PlanCacheStrategy.EXACT) == QueryTemplate(
+            text="What is 2+2?"
+        )
+
+    def test_template_strategy_extracts_parameters(self) -> None:
+        """Test that quoted strings and numbers become parameters."""
+        template = normalize_query(
+            "What's the weather in 'Paris' and \"New York\" for the next 3.5 days?",
+            PlanCacheStrategy.TEMPLATE,
+        )
+
+        assert template.text == (
+            "What's the weather in $param_0 and $param_1 for the next $param_2 days?"
+        )
+        assert template.parameters == {"param_0": "Paris", "param_1": "New York", "param_2": "3.5"}
+
+    def test_template_strategy_keeps_identifiers(self) -> None:
+        """Test that digits inside words are not treated as parameters."""
+        template = normalize_query("Use gpt4 on file_2 then add 5", PlanCacheStrategy.TEMPLATE)
+
+        assert template.text == "Use gpt4 on file_2 then add $param_0"
+        assert template.values == ("5",)
+
+
+@pytest.mark.unit
+class TestPlanCache:
+    """Test cases for PlanCache."""
+
+    def test_get_and_put(self) -> None:
+        """Test that plans are cached per tool set and template."""
+        cache = PlanCache(PlanCacheStrategy.EXACT, max_entries=2, ttl_seconds=60)
+        template = QueryTemplate(text="What is 2+2?")
+        plan = Mock()
+
+        assert cache.get(tool_set_key(["a"]), template) is None
+        cache.put(tool_set_key(["a"]), template, plan, planning_time=1.5)
+
+        assert cache.get(tool_set_key(["a"]), template) is plan
+        assert cache.get(tool_set_key(["b"]), template) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+        assert cache.stats()["planning_time_saved"] == 1.5
+
+    def test_expired_plans_are_dropped(self) -> None:
+        """Test that plans older than the TTL are not reused."""
+        cache = PlanCache(PlanCacheStrategy.EXACT, max_entries=2, ttl_seconds=60)
+        template = QueryTemplate(text="What is 2+2?")
+
+        with patch("app.services.plan_cache.time.time", return_value=100.0):
+            cache.put(tool_set_key(["a"]), template, Mock(), planning_time=1.0)
+        with patch("app.services.plan_cache.time.time", return_value=170.0):
+            assert cache.get(tool_set_key(["a"]), template) is None
+
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the least recently used plan is evicted when the cache is full."""
+        cache = PlanCache(PlanCacheStrategy.EXACT, max_entries=2, ttl_seconds=60)
+        tools = tool_set_key(["a"])
+        for text in ("first", "second"):
+            cache.put(tools, QueryTemplate(text=text), Mock(), planning_time=1.0)
+        cache.get(tools, QueryTemplate(text="first"))
+        cache.put(tools, QueryTemplate(text="third"), Mock(), planning_time=1.0)
+
+        assert cache.get(tools, QueryTemplate(text="second")) is None
+        assert cache.get(tools, QueryTemplate(text="first")) is not None
+        assert cache.stats()["evictions"] == 1
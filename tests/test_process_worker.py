@@ -0,0 +1,59 @@
+"""Tests for Portia execution in worker processes."""
+
+import json
+from collections.abc import Generator
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services import process_worker
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_state() -> Generator[None, None, None]:
+    """Rebuild the worker state in every test."""
+    process_worker._worker_state.cache_clear()  # noqa: SLF001
+    yield
+    process_worker._worker_state.cache_clear()  # noqa: SLF001
+
+
+@pytest.fixture
+def mock_portia() -> Generator[Mock, None, None]:
+    """Patch the settings, tool registry and Portia class used by worker processes."""
+    mock_tool = Mock()
+    mock_tool.id = "calculator_tool"
+    with (
+        patch("app.services.process_worker.settings") as mock_settings,
+        patch("app.services.process_worker.DefaultToolRegistry") as mock_registry,
+        patch("app.services.process_worker.Portia") as mock_portia,
+    ):
+        mock_settings.portia_instance_pool_size = 2
+        mock_settings.llm_shared_clients = False
+        mock_settings.warmup_tool_sets = [["calculator_tool"], ["missing_tool"]]
+        mock_registry.return_value.get_tools.return_value = [mock_tool]
+        yield mock_portia
+
+
+@pytest.mark.unit
+class TestProcessWorker:
+    """Test cases for the process worker functions."""
+
+    def test_run_query_returns_json_output(self, mock_portia: Mock) -> None:
+        """Test that the final output is returned as JSON and instances are reused."""
+        mock_portia.return_value.run.return_value.outputs.final_output = {"value": "4.0"}
+        process_worker.initialize_worker()
+
+        first = process_worker.run_query("What is 2+2?", ["calculator_tool"])
+        second = process_worker.run_query("What is 3+3?", ["calculator_tool"])
+
+        assert json.loads(first) == {"value": "4.0"}
+        assert json.loads(second) == {"value": "4.0"}
+        # The instance was built by the warm-up when the worker started
+        mock_portia.assert_called_once()
+
+    def test_run_query_errors_are_picklable(self, mock_portia: Mock) -> None:
+        """Test that SDK errors are sent back as runtime errors with their message."""
+        mock_portia.return_value.run.side_effect = ValueError("planning failed")
+
+        with pytest.raises(RuntimeError, match="planning failed"):
+            process_worker.run_query("What is 2+2?", ["calculator_tool"])
@@ -0,0 +1,57 @@
+"""Tests for the fast JSON responses."""
+
+import datetime as dt
+import json
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel
+
+from app.responses import FastJSONResponse, dumps, run_response_content
+from app.schemas.run import RunResponse
+
+
+class _Output(BaseModel):
+    value: str
+    created: dt.date
+
+
+@pytest.mark.unit
+def test_dumps_encodes_models_and_fallback_types() -> None:
+    """Test that pydantic models and types orjson does not support are encoded."""
+    content = {
+        "output": _Output(value="4.0", created=dt.date(2024, 1, 2)),
+        "amount": Decimal("1.5"),
+        1: {"tags"},
+    }
+
+    assert json.loads(dumps(content)) == {
+        "output": {"value": "4.0", "created": "2024-01-02"},
+        "amount": 1.5,
+        "1": ["tags"],
+    }
+
+
+@pytest.mark.unit
+def test_fast_json_response_renders_with_orjson() -> None:
+    """Test that the response body is compact JSON."""
+    response = FastJSONResponse({"success": True, "result": [1, 2]})
+
+    assert response.body == b'{"success":true,"result":[1,2]}'
+    assert response.media_type == "application/json"
+
+
+@pytest.mark.unit
+def test_run_response_content_matches_run_response() -> None:
+    """Test that the unvalidated content has the fields of a validated RunResponse."""
+    result = {
+        "success": True,
+        "result": {"value": "4.0"},
+        "execution_time": 2.5,
+        "cache_status": "HIT",
+    }
+
+    content = run_response_content(result)
+
+    assert content == RunResponse.model_validate(content).model_dump()
+    assert "cache_status" not in content
@@ -0,0 +1,206 @@
+"""Tests for the run result cache."""
+
+import sys
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import Mock, patch
+
+import orjson
+import pytest
+from pydantic import BaseModel
+
+from app.responses import dumps, run_response_content
+from app.services.result_cache import (
+    CachePolicy,
+    MemoryResultCache,
+    RedisResultCache,
+    create_result_cache,
+    result_cache_key,
+)
+
+
+@pytest.mark.unit
+class TestResultCacheKey:
+    """Test cases for result_cache_key."""
+
+    def test_equivalent_requests_share_a_key(self) -> None:
+        """Test that whitespace, tool order and duplicates do not change the key."""
+        config = {"default_model": "openai/gpt-4.1"}
+
+        assert result_cache_key("What is  2+2? ", ["b", "a"], config) == result_cache_key(
+            "What is 2+2?", ["a", "b", "a"], config
+        )
+
+    def test_key_depends_on_query_tools_and_config(self) -> None:
+        """Test that the query, tools and model configuration are part of the key."""
+        key = result_cache_key("What is 2+2?", ["a"], {"default_model": "openai/gpt-4.1"})
+
+        assert key != result_cache_key("What is 3+3?", ["a"], {"default_model": "openai/gpt-4.1"})
+        assert key != result_cache_key("What is 2+2?", ["b"], {"default_model": "openai/gpt-4.1"})
+        assert key != result_cache_key("What is 2+2?", ["a"], {"default_model": "openai/o3"})
+
+
+@pytest.mark.unit
+class TestCachePolicy:
+    """Test cases for CachePolicy."""
+
+    def test_default_policy(self) -> None:
+        """Test that a missing header allows using and storing cached results."""
+        assert CachePolicy.from_header(None) == CachePolicy(use_cached=True, store=True)
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("no-cache", CachePolicy(use_cached=False, store=True)),
+            ("no-store", CachePolicy(use_cached=False, store=False)),
+            ("max-age=30", CachePolicy(max_age=30)),
+            ("No-Cache, max-age=5", CachePolicy(use_cached=False, max_age=5)),
+            ("max-age=soon, private", CachePolicy()),
+        ],
+    )
+    def test_parses_directives(self, header: str, expected: CachePolicy) -> None:
+        """Test parsing of supported Cache-Control directives."""
+        assert CachePolicy.from_header(header) == expected
+
+
+@pytest.mark.unit
+class TestMemoryResultCache:
+    """Test cases for MemoryResultCache."""
+
+    @pytest.mark.asyncio
+    async def test_get_and_set(self) -> None:
+        """Test that stored results are returned and counted."""
+        cache = MemoryResultCache(ttl_seconds=60, max_entries=2)
+
+        assert await cache.get("key") is None
+        await cache.set("key", {"success": True, "result": "4"})
+        cached = await cache.get("key")
+
+        assert cached is not None
+        assert cached.result == {"success": True, "result": "4"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_dropped(self) -> None:
+        """Test that entries older than the TTL or max_age are not returned."""
+        cache = MemoryResultCache(ttl_seconds=60, max_entries=2)
+
+        with patch("app.services.result_cache.time.time", return_value=100.0):
+            await cache.set("key", {"success": True})
+        with patch("app.services.result_cache.time.time", return_value=130.0):
+            assert await cache.get("key", max_age=10) is None
+            assert await cache.get("key") is not None
+        with patch("app.services.result_cache.time.time", return_value=160.0):
+            assert await cache.get("key") is None
+
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self) -> None:
+        """Test that the least recently used entry is evicted when the cache is full."""
+        cache = MemoryResultCache(ttl_seconds=60, max_entries=2)
+        await cache.set("a", {"success": True})
+        await cache.set("b", {"success": True})
+        await cache.get("a")
+        await cache.set("c", {"success": True})
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+
+class _FakeRedis:
+    """In-memory stand-in for the ``redis.asyncio.Redis`` client."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    @classmethod
+    def from_url(cls, _: str) -> "_FakeRedis":
+        return cls()
+
+    async def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: bytes, px: int) -> None:  # noqa: ARG002
+        self.values[key] = value
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _Output(BaseModel):
+    """Run output model, standing in for the Portia ``Output``."""
+
+    value: str
+    summary: str | None = None
+
+
+@pytest.mark.unit
+class TestRedisResultCache:
+    """Test cases for RedisResultCache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_has_the_response_of_the_miss(self) -> None:
+        """Test that a cached output model is served with the response body of the run."""
+        redis = SimpleNamespace(asyncio=SimpleNamespace(Redis=_FakeRedis))
+        with patch.dict(sys.modules, {"redis": redis, "redis.asyncio": redis.asyncio}):
+            cache = RedisResultCache(url="redis://localhost:6379", ttl_seconds=60)
+        result: dict[str, Any] = {
+            "success": True,
+            "result": _Output(value="4", summary="The answer"),
+            "error": None,
+            "execution_time": 1.5,
+        }
+
+        await cache.set("key", result)
+        cached = await cache.get("key")
+
+        assert cached is not None
+        assert orjson.loads(dumps(run_response_content(cached.result))) == orjson.loads(
+            dumps(run_response_content(result))
+        )
+        assert cached.result["result"] == {"value": "4", "summary": "The answer"}
+
+
+@pytest.mark.unit
+class TestCreateResultCache:
+    """Test cases for create_result_cache."""
+
+    def test_disabled(self) -> None:
+        """Test that no cache is created when result caching is disabled."""
+        assert create_result_cache(Mock(result_cache_enabled=False)) is None
+
+    def test_memory_backend(self) -> None:
+        """Test that the memory backend is created with the configured limits."""
+        cache = create_result_cache(
+            Mock(
+                result_cache_enabled=True,
+                result_cache_backend="memory",
+                result_cache_ttl_seconds=30,
+                result_cache_max_entries=5,
+            )
+        )
+
+        assert isinstance(cache, MemoryResultCache)
+        assert cache.stats()["max_entries"] == 5
+
+    def test_redis_backend_requires_url(self) -> None:
+        """Test that the redis backend needs the LLM Redis cache URL."""
+        app_settings = Mock(result_cache_enabled=True, result_cache_backend="redis")
+        app_settings.portia_config.llm_redis_cache_url = None
+
+        with pytest.raises(ValueError, match="LLM_REDIS_CACHE_URL"):
+            create_result_cache(app_settings)
+
+    def test_redis_backend_requires_redis_package(self) -> None:
+        """Test that the redis backend explains how to install a missing redis package."""
+        app_settings = Mock(result_cache_enabled=True, result_cache_backend="redis")
+        app_settings.portia_config.llm_redis_cache_url = "redis://localhost:6379"
+
+        with (
+            patch.dict(sys.modules, {"redis": None, "redis.asyncio": None}),
+            pytest.raises(ImportError, match="redis extra"),
+        ):
+            create_result_cache(app_settings)
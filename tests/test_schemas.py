@@ -75,6 +75,14 @@ class TestRunRequest:
         assert "calculator_tool" in request.tools
         assert "weather_tool" in request.tools
 
+    def test_run_request_timeout(self) -> None:
+        """Test RunRequest with and without a timeout."""
+        assert RunRequest(query="What is 2+2?", tools=[]).timeout is None
+        assert RunRequest(query="What is 2+2?", tools=[], timeout=2.5).timeout == 2.5
+
+        with pytest.raises(ValidationError):
+            RunRequest(query="What is 2+2?", tools=[], timeout=-1)
+
     def test_run_request_empty_tools_list(self) -> None:
         """Test RunRequest with empty tools list."""
         request = RunRequest(query="What is 2+2?", tools=[])
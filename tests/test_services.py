@@ -1,11 +1,21 @@
 """Tests for the services layer."""
 
-from unittest.mock import Mock, patch
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import ANY, AsyncMock, Mock, patch
 
 import pytest
 
-from app.exceptions import InvalidToolsError
-from app.services.portia_service import PortiaService
+from app.config import TenantSettings
+from app.exceptions import InvalidToolsError, RunTimeoutError, ServiceOverloadedError
+from app.services.metrics import RUN_STAGE_SECONDS, RUNS
+from app.services.plan_cache import PlanCacheStrategy
+from app.services.portia_service import BatchItem, PortiaService
+from app.services.result_cache import CachePolicy, CacheStatus
 
 
 @pytest.mark.unit
@@ -26,6 +36,41 @@ class TestPortiaService:
         mock_config.get.return_value = "https://api.portialabs.ai"
         return mock_config
 
+    def _configure_settings(self, mock_settings: Mock) -> Mock:
+        """Configure the patched settings and return the mock Portia config."""
+        mock_config_instance = self._create_mock_config()
+        mock_settings.get_portia_config.return_value = mock_config_instance
+        mock_settings.max_workers = 4
+        mock_settings.portia_instance_pool_size = 2
+        mock_settings.tool_index_ttl_seconds = 0
+        mock_settings.job_max_retained = 10
+        mock_settings.job_retention_seconds = 60
+        mock_settings.job_max_concurrency = 2
+        mock_settings.job_max_pending = 10
+        mock_settings.batch_max_concurrency = 2
+        mock_settings.max_in_flight_runs = None
+        mock_settings.max_queued_runs = 10
+        mock_settings.overload_retry_after_seconds = 5
+        mock_settings.run_timeout_max_seconds = 30
+        mock_settings.result_cache_enabled = False
+        mock_settings.plan_cache_enabled = False
+        mock_settings.execution_backend = "thread"
+        mock_settings.readiness_max_queued_runs = None
+        mock_settings.readiness_max_error_rate = 0.5
+        mock_settings.readiness_error_window_seconds = 60
+        mock_settings.readiness_min_runs = 2
+        mock_settings.warmup_tool_sets = []
+        mock_settings.warmup_timeout_seconds = 5
+        mock_settings.warmup_dry_run = False
+        mock_settings.llm_shared_clients = False
+        mock_settings.coalesce_runs = True
+        mock_settings.tenants = {}
+        mock_settings.high_priority_reserved_runs = 0
+        mock_settings.low_priority_borrowing = True
+        mock_settings.tenant_defaults = TenantSettings()
+        mock_settings.portia_config.model_dump.return_value = {}
+        return mock_config_instance
+
     @patch("app.services.portia_service.settings")
     @patch("app.services.portia_service.DefaultToolRegistry")
     def test_singleton_behavior(
@@ -35,9 +80,7 @@ class TestPortiaService:
     ) -> None:
         """Test that PortiaService follows singleton pattern."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -60,9 +103,7 @@ class TestPortiaService:
     ) -> None:
         """Test PortiaService initialization."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        mock_config_instance = self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -83,9 +124,7 @@ class TestPortiaService:
     ) -> None:
         """Test getting available tool IDs."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool1 = Mock()
         mock_tool1.id = "tool1"
@@ -111,9 +150,7 @@ class TestPortiaService:
     ) -> None:
         """Test getting Portia instance with valid tools."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        mock_config_instance = self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -129,7 +166,9 @@ class TestPortiaService:
 
         assert result == mock_portia_instance
         mock_portia.assert_called_once_with(
-            config=mock_config_instance, tools=[mock_tool], execution_hooks=None
+            config=mock_config_instance,
+            tools=[mock_tool],
+            execution_hooks=service._execution_hooks,  # noqa: SLF001
         )
 
     @patch("app.services.portia_service.settings")
@@ -141,9 +180,7 @@ class TestPortiaService:
     ) -> None:
         """Test getting Portia instance with invalid tools."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "valid_tool"
@@ -170,9 +207,7 @@ class TestPortiaService:
     ) -> None:
         """Test successful query execution."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -186,7 +221,7 @@ class TestPortiaService:
 
         service = PortiaService()
 
-        with patch("time.time", side_effect=[0.0, 2.5, 2.5, 2.5, 2.5]):
+        with patch("time.time", side_effect=[0.0, *[2.5] * 8]):
             result = await service.run_query("test query", ["test_tool"])
 
         assert result["success"] is True
@@ -205,9 +240,7 @@ class TestPortiaService:
     ) -> None:
         """Test query execution failure."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -219,7 +252,7 @@ class TestPortiaService:
 
         service = PortiaService()
 
-        with patch("time.time", side_effect=[0.0, 1.5, 1.5, 1.5, 1.5]):
+        with patch("time.time", side_effect=[0.0, *[1.5] * 8]):
             result = await service.run_query("test query", ["test_tool"])
 
         assert result["success"] is False
@@ -236,9 +269,7 @@ class TestPortiaService:
     ) -> None:
         """Test query execution with invalid tools."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "valid_tool"
@@ -260,9 +291,7 @@ class TestPortiaService:
     ) -> None:
         """Test that Portia instances are reused for the same tool set."""
         # Setup mocks
-        mock_config_instance = self._create_mock_config()
-        mock_settings.get_portia_config.return_value = mock_config_instance
-        mock_settings.max_workers = 4
+        self._configure_settings(mock_settings)
 
         mock_tool = Mock()
         mock_tool.id = "test_tool"
@@ -282,3 +311,1224 @@ class TestPortiaService:
         assert result1 is result2
         # Portia should only be called once
         mock_portia.assert_called_once()
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    def test_instance_pool_keeps_multiple_tool_sets(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that alternating tool sets reuse their pooled instances."""
+        self._configure_settings(mock_settings)
+
+        mock_tool1 = Mock()
+        mock_tool1.id = "tool1"
+        mock_tool2 = Mock()
+        mock_tool2.id = "tool2"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool1, mock_tool2]
+        mock_portia.side_effect = lambda **_: Mock()
+
+        service = PortiaService()
+
+        first = service._get_portia_instance({"tool1"})  # noqa: SLF001
+        second = service._get_portia_instance({"tool1", "tool2"})  # noqa: SLF001
+
+        assert service._get_portia_instance({"tool1"}) is first  # noqa: SLF001
+        assert service._get_portia_instance({"tool2", "tool1"}) is second  # noqa: SLF001
+        assert mock_portia.call_count == 2
+        assert service.instance_pool_stats() == {
+            "size": 2,
+            "max_size": 2,
+            "hits": 2,
+            "misses": 2,
+            "evictions": 0,
+        }
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    def test_instance_pool_evicts_least_recently_used(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that the least recently used instance is evicted when the pool is full."""
+        self._configure_settings(mock_settings)
+
+        tools = []
+        for tool_id in ("tool1", "tool2", "tool3"):
+            tool = Mock()
+            tool.id = tool_id
+            tools.append(tool)
+        mock_default_registry.return_value.get_tools.return_value = tools
+        mock_portia.side_effect = lambda **_: Mock()
+
+        service = PortiaService()
+
+        first = service._get_portia_instance({"tool1"})  # noqa: SLF001
+        service._get_portia_instance({"tool2"})  # noqa: SLF001
+        # Touch tool1 so tool2 becomes the least recently used entry
+        service._get_portia_instance({"tool1"})  # noqa: SLF001
+        service._get_portia_instance({"tool3"})  # noqa: SLF001
+
+        stats = service.instance_pool_stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert service._get_portia_instance({"tool1"}) is first  # noqa: SLF001
+
+        service._get_portia_instance({"tool2"})  # noqa: SLF001
+        assert mock_portia.call_count == 4
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_concurrent_builds_are_deduplicated(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that concurrent requests for one tool set share a single build."""
+        self._configure_settings(mock_settings)
+
+        mock_tool1 = Mock()
+        mock_tool1.id = "tool1"
+        mock_tool2 = Mock()
+        mock_tool2.id = "tool2"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool1, mock_tool2]
+
+        def slow_build(**_: object) -> Mock:
+            time.sleep(0.05)
+            return Mock()
+
+        mock_portia.side_effect = slow_build
+
+        service = PortiaService()
+
+        same = await asyncio.gather(
+            *(service._aget_portia_instance({"tool1"}) for _ in range(5))  # noqa: SLF001
+        )
+        different = await asyncio.gather(
+            service._aget_portia_instance({"tool1"}),  # noqa: SLF001
+            service._aget_portia_instance({"tool2"}),  # noqa: SLF001
+        )
+
+        assert all(instance is same[0] for instance in same)
+        assert different[0] is same[0]
+        assert different[1] is not same[0]
+        assert mock_portia.call_count == 2
+        assert service._pending_builds == {}  # noqa: SLF001
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @pytest.mark.asyncio
+    async def test_failed_build_is_not_cached(
+        self,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that a failed build is reported to every waiter and not remembered."""
+        self._configure_settings(mock_settings)
+        mock_default_registry.return_value.get_tools.return_value = []
+
+        service = PortiaService()
+
+        results = await asyncio.gather(
+            service._aget_portia_instance({"missing"}),  # noqa: SLF001
+            service._aget_portia_instance({"missing"}),  # noqa: SLF001
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, InvalidToolsError) for result in results)
+        assert service._pending_builds == {}  # noqa: SLF001
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    def test_tool_registry_is_scanned_once(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that tool lookups and instance builds share the cached tool index."""
+        self._configure_settings(mock_settings)
+
+        mock_tool1 = Mock()
+        mock_tool1.id = "tool1"
+        mock_tool2 = Mock()
+        mock_tool2.id = "tool2"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool1, mock_tool2]
+        mock_portia.side_effect = lambda **_: Mock()
+
+        service = PortiaService()
+        service.available_tool_ids()
+        service._get_portia_instance({"tool1"})  # noqa: SLF001
+        service._get_portia_instance({"tool2"})  # noqa: SLF001
+        service.available_tool_ids()
+
+        mock_default_registry.return_value.get_tools.assert_called_once()
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @pytest.mark.asyncio
+    async def test_refresh_tool_index(
+        self,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that refreshing the tool index picks up registry changes."""
+        self._configure_settings(mock_settings)
+
+        mock_tool1 = Mock()
+        mock_tool1.id = "tool1"
+        mock_tool2 = Mock()
+        mock_tool2.id = "tool2"
+        mock_default_registry.return_value.get_tools.side_effect = [
+            [mock_tool1],
+            [mock_tool1, mock_tool2],
+        ]
+
+        service = PortiaService()
+        assert service.available_tool_ids() == ["tool1"]
+
+        stats = await service.refresh_tool_index()
+
+        assert stats["tool_count"] == 2
+        assert stats["refresh_count"] == 2
+        assert service.available_tool_ids() == ["tool1", "tool2"]
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @pytest.mark.asyncio
+    async def test_start_and_stop(
+        self,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that start builds the tool index and schedules its refresh."""
+        self._configure_settings(mock_settings)
+        mock_settings.tool_index_ttl_seconds = 60
+
+        mock_tool = Mock()
+        mock_tool.id = "tool1"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        service = PortiaService()
+        await service.start()
+
+        assert service.tool_index.is_built is True
+        assert len(service._background_tasks) == 1  # noqa: SLF001
+
+        await service.stop()
+
+        assert service._background_tasks == set()  # noqa: SLF001
+
+    @patch("app.services.portia_service.get_model_client_registry")
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_stop_drops_instances_of_closed_clients(
+        self,
+        mock_portia_class: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+        mock_get_registry: Mock,
+    ) -> None:
+        """Test that stop drops the models and instances using the closed shared clients."""
+        self._configure_settings(mock_settings)
+        mock_settings.llm_shared_clients = True
+        registry = mock_get_registry.return_value
+        registry.aclose = AsyncMock()
+        first_config, second_config = Mock(), Mock()
+        registry.share_models.side_effect = [first_config, second_config]
+        mock_tool = Mock()
+        mock_tool.id = "tool1"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        service = PortiaService()
+        service._get_portia_instance({"tool1"})  # noqa: SLF001
+        await service.stop()
+
+        registry.aclose.assert_awaited_once()
+        assert service.instance_pool_stats()["size"] == 0
+        assert mock_portia_class.call_args.kwargs["config"] is first_config
+        assert service._config is second_config  # noqa: SLF001
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_start_warms_up_hot_tool_sets(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that hot tool sets are built at startup and readiness waits for them."""
+        self._configure_settings(mock_settings)
+        mock_settings.warmup_tool_sets = [["tool1"], ["tool1", "tool2"], ["missing_tool"]]
+        mock_settings.warmup_dry_run = True
+
+        tools = []
+        for tool_id in ("tool1", "tool2"):
+            mock_tool = Mock()
+            mock_tool.id = tool_id
+            tools.append(mock_tool)
+        mock_default_registry.return_value.get_tools.return_value = tools
+
+        service = PortiaService()
+        await service.start()
+        assert service.readiness()["checks"]["warm"] is False
+
+        await asyncio.gather(*service._background_tasks)  # noqa: SLF001
+
+        assert service.readiness()["ready"] is True
+        # The invalid tool set is skipped without failing the warm-up
+        assert service.instance_pool_stats()["size"] == 2
+        assert mock_portia.return_value.plan.call_count == 2
+
+        await service._aget_portia_instance({"tool2", "tool1"})  # noqa: SLF001
+        assert mock_portia.call_count == 2
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_warm_up_deadline(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that the service becomes ready when the warm-up misses its deadline."""
+        self._configure_settings(mock_settings)
+        mock_settings.warmup_tool_sets = [["tool1"]]
+        mock_settings.warmup_timeout_seconds = 0.05
+
+        mock_tool = Mock()
+        mock_tool.id = "tool1"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        release = threading.Event()
+        mock_portia.side_effect = lambda **_: release.wait(timeout=5)
+
+        service = PortiaService()
+        await service.start()
+        await asyncio.gather(*service._background_tasks)  # noqa: SLF001
+
+        assert service.readiness()["checks"]["warm"] is True
+        assert service.instance_pool_stats()["size"] == 0
+        release.set()
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_submit_job(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that submitted jobs run the query in the background."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        mock_plan_run = Mock()
+        mock_plan_run.outputs.final_output = {"result": "success"}
+        mock_portia.return_value.run.return_value = mock_plan_run
+
+        service = PortiaService()
+        job = await service.submit_job("test query", ["test_tool"])
+
+        assert service.get_job(job.id) is job
+        for _ in range(100):
+            if job.status.is_finished:
+                break
+            await asyncio.sleep(0.01)
+
+        assert job.status == "succeeded"
+        assert job.result == {"result": "success"}
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_submit_job_deadline(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that a job fails once its run passes the requested deadline."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        release = threading.Event()
+        mock_portia.return_value.run.side_effect = lambda *_: release.wait(timeout=5)
+
+        service = PortiaService()
+        job = await service.submit_job("test query", ["test_tool"], deadline=0.05)
+
+        for _ in range(100):
+            if job.status.is_finished:
+                break
+            await asyncio.sleep(0.01)
+        release.set()
+
+        assert job.status == "failed"
+        assert job.error == "Query execution did not finish within 0.05s"
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @pytest.mark.asyncio
+    async def test_submit_job_invalid_tools(
+        self,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that jobs with unavailable tools are rejected at submission.
+
+        The tool index was not built at startup, so it is built in a worker thread.
+        """
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "valid_tool"
+        loader_threads = []
+
+        def get_tools() -> list[Mock]:
+            loader_threads.append(threading.current_thread())
+            return [mock_tool]
+
+        mock_default_registry.return_value.get_tools.side_effect = get_tools
+
+        service = PortiaService()
+
+        with pytest.raises(InvalidToolsError) as exc_info:
+            await service.submit_job("test query", ["valid_tool", "invalid_tool"])
+
+        assert exc_info.value.invalid_tools == ["invalid_tool"]
+        assert exc_info.value.available_tools == ["valid_tool"]
+        assert loader_threads
+        assert threading.main_thread() not in loader_threads
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_stream_query(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that plan progress reported by execution hooks is streamed in order."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        service = PortiaService()
+        hooks = service._execution_hooks  # noqa: SLF001
+
+        step = Mock(task="Add the numbers", tool_id="test_tool", output="$sum")
+        plan = Mock(id="plan-1", steps=[step])
+        mock_plan_run = Mock(current_step_index=0)
+        mock_plan_run.outputs.final_output = {"result": "success"}
+
+        def run(*_: object) -> Mock:
+            hooks.before_plan_run(plan, mock_plan_run)
+            hooks.before_step_execution(plan, mock_plan_run, step)
+            hooks.after_step_execution(plan, mock_plan_run, step, {"value": 4})
+            return mock_plan_run
+
+        mock_portia.return_value.run.side_effect = run
+
+        events = await service.stream_query("test query", ["test_tool"])
+        received = [event async for event in events]
+
+        assert [event.event for event in received] == [
+            "plan_created",
+            "step_started",
+            "step_completed",
+            "result",
+        ]
+        assert received[0].data["steps"] == [
+            {"task": "Add the numbers", "tool_id": "test_tool", "output": "$sum"}
+        ]
+        assert received[2].data["output"] == {"value": 4}
+        assert received[3].data["success"] is True
+        assert received[3].data["result"] == {"result": "success"}
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @pytest.mark.asyncio
+    async def test_stream_query_invalid_tools(
+        self,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that invalid tools are reported before streaming starts."""
+        self._configure_settings(mock_settings)
+        mock_default_registry.return_value.get_tools.return_value = []
+
+        service = PortiaService()
+
+        with pytest.raises(InvalidToolsError):
+            await service.stream_query("test query", ["invalid_tool"])
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_batch(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that a batch shares instances per tool set and respects the concurrency cap."""
+        self._configure_settings(mock_settings)
+
+        mock_tool1 = Mock()
+        mock_tool1.id = "tool1"
+        mock_tool2 = Mock()
+        mock_tool2.id = "tool2"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool1, mock_tool2]
+
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def run(query: str, _: list[str]) -> Mock:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            plan_run = Mock()
+            plan_run.outputs.final_output = query
+            return plan_run
+
+        def build(**_: object) -> Mock:
+            instance = Mock()
+            instance.run.side_effect = run
+            return instance
+
+        mock_portia.side_effect = build
+
+        service = PortiaService()
+        items = [
+            BatchItem("query 0", ["tool1"]),
+            BatchItem("query 1", ["tool2"]),
+            BatchItem("query 2", ["tool1"]),
+            BatchItem("query 3", ["missing"]),
+            BatchItem("query 4", ["tool2"]),
+        ]
+
+        results = dict([result async for result in service.run_batch(items, max_concurrency=10)])
+
+        assert sorted(results) == [0, 1, 2, 3, 4]
+        assert results[0] == {
+            "success": True,
+            "result": "query 0",
+            "execution_time": ANY,
+            "queue_time": ANY,
+        }
+        assert results[4]["result"] == "query 4"
+        assert results[3]["success"] is False
+        assert "missing" in results[3]["error"]
+        assert mock_portia.call_count == 2
+        assert max_running <= 2
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_rejected_when_queue_is_full(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that runs over the in-flight and queue limits are rejected immediately."""
+        self._configure_settings(mock_settings)
+        mock_settings.max_in_flight_runs = 1
+        mock_settings.max_queued_runs = 1
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            plan_run = Mock()
+            plan_run.outputs.final_output = "done"
+            return plan_run
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        await service._aget_portia_instance({"test_tool"})  # noqa: SLF001
+
+        running = asyncio.create_task(service.run_query("first", ["test_tool"]))
+        queued = asyncio.create_task(service.run_query("second", ["test_tool"]))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(ServiceOverloadedError):
+            await service.run_query("third", ["test_tool"])
+
+        release.set()
+        first, second = await asyncio.gather(running, queued)
+
+        assert first["queue_time"] == 0.0
+        assert second["queue_time"] > 0
+        assert service.admission_stats()["rejected"] == 1
+        assert service.admission_stats()["in_flight"] == 0
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_readiness_reflects_warm_state_and_error_rate(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that the service is ready after startup and not ready when most runs fail."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        mock_portia.return_value.run.side_effect = Exception("LLM unavailable")
+
+        service = PortiaService()
+        readiness = service.readiness()
+        assert readiness["ready"] is False
+        assert readiness["checks"]["warm"] is False
+        assert readiness["checks"]["tool_index"] is False
+
+        await service.start()
+        readiness = service.readiness()
+        assert readiness["ready"] is True
+        assert readiness["error_rate"] is None
+        assert readiness["queue_threshold"] == 5
+
+        # A single failure is below the minimum number of runs
+        await service.run_query("first", ["test_tool"])
+        assert service.readiness()["ready"] is True
+
+        await service.run_query("second", ["test_tool"])
+        readiness = service.readiness()
+        assert readiness["ready"] is False
+        assert readiness["checks"]["error_rate"] is False
+        assert readiness["recent_runs"] == 2
+        assert readiness["error_rate"] == 1.0
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_readiness_reflects_queue_depth(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that the service is not ready while the run queue is at its threshold."""
+        self._configure_settings(mock_settings)
+        mock_settings.max_in_flight_runs = 1
+        mock_settings.readiness_max_queued_runs = 1
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            plan_run = Mock()
+            plan_run.outputs.final_output = "done"
+            return plan_run
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        await service.start()
+        await service._aget_portia_instance({"test_tool"})  # noqa: SLF001
+
+        running = asyncio.create_task(service.run_query("first", ["test_tool"]))
+        await asyncio.sleep(0.01)
+        assert service.readiness()["ready"] is True
+
+        queued = asyncio.create_task(service.run_query("second", ["test_tool"]))
+        await asyncio.sleep(0.01)
+        readiness = service.readiness()
+        assert readiness["ready"] is False
+        assert readiness["checks"]["queue"] is False
+        assert readiness["in_flight_runs"] == 1
+        assert readiness["queued_runs"] == 1
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert service.readiness()["ready"] is True
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_timeout_cancels_run(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that a run past its deadline is cancelled and frees its slot once stopped."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        service = PortiaService()
+        hooks = service._execution_hooks  # noqa: SLF001
+        step_finished = threading.Event()
+        steps_started = 0
+
+        def run(*_: object) -> Mock:
+            nonlocal steps_started
+            for _step in range(3):
+                hooks.before_step_execution(Mock(), Mock(), Mock())
+                steps_started += 1
+                step_finished.wait(timeout=5)
+            return Mock()
+
+        mock_portia.return_value.run.side_effect = run
+
+        with pytest.raises(RunTimeoutError):
+            await service.run_query("test query", ["test_tool"], deadline=0.05)
+
+        assert service.run_stats()["timed_out"] == 1
+        # The worker thread is still finishing its current step, so it keeps its slot
+        assert service.admission_stats()["in_flight"] == 1
+
+        step_finished.set()
+        for _ in range(100):
+            if service.admission_stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        assert service.admission_stats()["in_flight"] == 0
+        assert steps_started == 1
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_abandoned(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that runs whose caller goes away are counted as abandoned."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        release = threading.Event()
+        mock_portia.return_value.run.side_effect = lambda *_: release.wait(timeout=5)
+
+        service = PortiaService()
+        await service._aget_portia_instance({"test_tool"})  # noqa: SLF001
+
+        task = asyncio.create_task(service.run_query("test query", ["test_tool"]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        release.set()
+
+        assert service.run_stats()["abandoned"] == 1
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_result_cache(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that repeated queries are served from the result cache."""
+        self._configure_settings(mock_settings)
+        mock_settings.result_cache_enabled = True
+        mock_settings.result_cache_backend = "memory"
+        mock_settings.result_cache_ttl_seconds = 60
+        mock_settings.result_cache_max_entries = 10
+        mock_settings.portia_config.model_dump.return_value = {"default_model": "openai/gpt-4.1"}
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        mock_plan_run = Mock()
+        mock_plan_run.outputs.final_output = "4"
+        mock_portia.return_value.run.return_value = mock_plan_run
+
+        service = PortiaService()
+
+        first = await service.run_query("What is 2+2?", ["test_tool"])
+        second = await service.run_query("What is  2+2?", ["test_tool"])
+        refreshed = await service.run_query(
+            "What is 2+2?", ["test_tool"], cache_policy=CachePolicy(use_cached=False)
+        )
+        bypassed = await service.run_query(
+            "What is 2+2?", ["test_tool"], cache_policy=CachePolicy(use_cached=False, store=False)
+        )
+
+        assert first["cache_status"] == CacheStatus.MISS
+        assert second["cache_status"] == CacheStatus.HIT
+        assert second["result"] == "4"
+        assert "cache_age" in second
+        assert refreshed["cache_status"] == CacheStatus.MISS
+        assert bypassed["cache_status"] == CacheStatus.BYPASS
+        assert mock_portia.return_value.run.call_count == 3
+        assert service.result_cache_stats()["hits"] == 1
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_reuses_cached_plans(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that queries from the same template skip planning and pass plan inputs."""
+        self._configure_settings(mock_settings)
+        mock_settings.plan_cache_enabled = True
+        mock_settings.plan_cache_strategy = PlanCacheStrategy.TEMPLATE
+        mock_settings.plan_cache_max_entries = 10
+        mock_settings.plan_cache_ttl_seconds = 60
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        mock_plan = Mock()
+        mock_plan.id = "plan-1"
+        mock_instance = mock_portia.return_value
+        mock_instance.plan.return_value = mock_plan
+        mock_instance.run_plan.return_value.outputs.final_output = "done"
+
+        service = PortiaService()
+
+        first = await service.run_query("What is 2 + 2?", ["test_tool"])
+        second = await service.run_query("What is 3 + 7?", ["test_tool"])
+
+        assert first["success"] is True
+        assert second["success"] is True
+        mock_instance.run.assert_not_called()
+        mock_instance.plan.assert_called_once()
+        assert mock_instance.plan.call_args.args[0] == "What is $param_0 + $param_1?"
+        assert [
+            plan_input.name for plan_input in mock_instance.plan.call_args.kwargs["plan_inputs"]
+        ] == [
+            "param_0",
+            "param_1",
+        ]
+        plan_run_inputs = mock_instance.run_plan.call_args.kwargs["plan_run_inputs"]
+        assert [plan_input.value for plan_input in plan_run_inputs] == ["3", "7"]
+        assert mock_instance.run_plan.call_args.args[0] is mock_plan
+        assert service.plan_cache_stats()["hits"] == 1
+        assert service.plan_cache_stats()["misses"] == 1
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_records_metrics(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that runs are counted by tool set and outcome and their stages are timed."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "metrics_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        mock_portia.return_value.run.return_value.outputs.final_output = "done"
+
+        before_runs = RUNS.value(tool_set="metrics_tool", outcome="success")
+        before_queue = RUN_STAGE_SECONDS.count(stage="queue")
+        before_builds = RUN_STAGE_SECONDS.count(stage="instance_build")
+
+        service = PortiaService()
+        await service.run_query("test query", ["metrics_tool"])
+
+        assert RUNS.value(tool_set="metrics_tool", outcome="success") == before_runs + 1
+        assert RUN_STAGE_SECONDS.count(stage="queue") == before_queue + 1
+        assert RUN_STAGE_SECONDS.count(stage="instance_build") == before_builds + 1
+
+        metrics = {metric.name: metric for metric in service.collect_metrics()}
+        assert metrics["portia_instance_pool_size"].samples == [
+            ("portia_instance_pool_size", {}, 1)
+        ]
+        assert metrics["portia_executor_in_flight_runs"].samples[0][2] == 0
+
+    @patch("app.services.process_worker.run_query")
+    @patch.object(PortiaService, "_create_process_executor")
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_hybrid_backend(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+        mock_create_process_executor: Mock,
+        mock_process_run_query: Mock,
+    ) -> None:
+        """Test that the hybrid backend runs queries in processes and streams on threads."""
+        self._configure_settings(mock_settings)
+        mock_settings.execution_backend = "hybrid"
+        mock_settings.process_pool_size = 2
+        # Stand in for the process pool, the worker function itself is tested separately
+        mock_create_process_executor.return_value = ThreadPoolExecutor(max_workers=2)
+        mock_process_run_query.return_value = b'{"value": "4.0"}'
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        mock_portia.return_value.run.return_value.outputs.final_output = "streamed"
+
+        service = PortiaService()
+
+        result = await service.run_query("What is 2+2?", ["test_tool"])
+        events = [event async for event in await service.stream_query("query", ["test_tool"])]
+
+        assert result["success"] is True
+        assert result["result"] == {"value": "4.0"}
+        mock_process_run_query.assert_called_once_with("What is 2+2?", ["test_tool"])
+        assert events[-1].data["result"] == "streamed"
+        mock_portia.return_value.run.assert_called_once_with("query", ["test_tool"])
+        assert service.admission_stats()["max_in_flight"] == 2 + 4
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_query_coalesces_identical_runs(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that identical runs in flight share one execution unless opted out."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            return Mock(outputs=Mock(final_output="4"))
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        runs = [
+            asyncio.create_task(service.run_query("What is  2+2?", ["test_tool"])),
+            asyncio.create_task(service.run_query("What is 2+2?", ["test_tool"])),
+            asyncio.create_task(service.run_query("What is 2+2?", ["test_tool"], coalesce=False)),
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*runs)
+
+        assert [result["result"] for result in results] == ["4", "4", "4"]
+        assert results[0] is not results[1]
+        assert mock_portia.return_value.run.call_count == 2
+        metrics = {metric.name: metric for metric in service.collect_metrics()}
+        assert metrics["portia_coalesced_runs"].samples[0][2] == 1
+
+    @patch("app.services.process_worker.run_query")
+    @patch.object(PortiaService, "_create_process_executor")
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_broken_process_pool_is_replaced_once(
+        self,
+        mock_portia: Mock,  # noqa: ARG002
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+        mock_create_process_executor: Mock,
+        mock_process_run_query: Mock,
+    ) -> None:
+        """Test that runs failing together with a broken pool replace it only once."""
+        self._configure_settings(mock_settings)
+        mock_settings.execution_backend = "process"
+        mock_settings.process_pool_size = 3
+        broken = Mock(wraps=ThreadPoolExecutor(max_workers=3))
+        mock_create_process_executor.side_effect = [broken, ThreadPoolExecutor(max_workers=3)]
+        # Every run in flight fails once the pool breaks
+        barrier = threading.Barrier(3, timeout=5)
+
+        def run_query(*_: object) -> bytes:
+            barrier.wait()
+            raise BrokenProcessPool("A worker process died")
+
+        mock_process_run_query.side_effect = run_query
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+
+        service = PortiaService()
+        results = await asyncio.gather(
+            *(service.run_query(f"query {index}", ["test_tool"]) for index in range(3))
+        )
+
+        assert [result["success"] for result in results] == [False, False, False]
+        assert mock_create_process_executor.call_count == 2
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        assert service._process_executor is not broken  # noqa: SLF001
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_batch_coalesces_identical_items(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that identical batch items share one execution unless they opt out."""
+        self._configure_settings(mock_settings)
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            return Mock(outputs=Mock(final_output="4"))
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        items = [
+            BatchItem("What is 2+2?", ["test_tool"]),
+            BatchItem("What is 2+2?", ["test_tool"]),
+            BatchItem("What is 2+2?", ["test_tool"], coalesce=False),
+        ]
+        batch = asyncio.create_task(_collect(service.run_batch(items)))
+        await asyncio.sleep(0.05)
+        release.set()
+        results = dict(await batch)
+
+        assert [results[index]["result"] for index in range(3)] == ["4", "4", "4"]
+        assert mock_portia.return_value.run.call_count == 2
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_run_batch_items_rejected_when_queue_is_full(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that batch items are admitted through the bounded run queue."""
+        self._configure_settings(mock_settings)
+        mock_settings.max_in_flight_runs = 1
+        mock_settings.max_queued_runs = 1
+        mock_settings.batch_max_concurrency = 3
+
+        mock_tool = Mock()
+        mock_tool.id = "test_tool"
+        mock_default_registry.return_value.get_tools.return_value = [mock_tool]
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            return Mock(outputs=Mock(final_output="done"))
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        items = [BatchItem(f"query {index}", ["test_tool"]) for index in range(3)]
+        batch = asyncio.create_task(_collect(service.run_batch(items)))
+        await asyncio.sleep(0.05)
+        release.set()
+        results = dict(await batch)
+
+        assert sorted(result["success"] for result in results.values()) == [False, True, True]
+        assert service.admission_stats()["rejected"] == 1
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_async_backend(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that the async backend awaits async-capable runs and falls back to threads."""
+        self._configure_settings(mock_settings)
+        mock_settings.execution_backend = "async"
+        mock_settings.async_max_concurrent_runs = 100
+
+        class AsyncTool:
+            id = "async_tool"
+
+            async def arun(self, *_: object) -> str:
+                return "done"
+
+        sync_tool = Mock()
+        sync_tool.id = "sync_tool"
+        mock_default_registry.return_value.get_tools.return_value = [AsyncTool(), sync_tool]
+        mock_portia.return_value.arun = AsyncMock(
+            return_value=Mock(outputs=Mock(final_output="on the event loop"))
+        )
+        mock_portia.return_value.run.return_value.outputs.final_output = "on a thread"
+
+        service = PortiaService()
+
+        async_result = await service.run_query("query", ["async_tool"])
+        sync_result = await service.run_query("query", ["async_tool", "sync_tool"])
+
+        assert async_result["result"] == "on the event loop"
+        mock_portia.return_value.arun.assert_awaited_once_with("query", ["async_tool"])
+        assert sync_result["result"] == "on a thread"
+        mock_portia.return_value.run.assert_called_once_with("query", ["async_tool", "sync_tool"])
+        assert service.admission_stats()["max_in_flight"] == 100 + 4
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_async_backend_bounds_thread_fallbacks(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that sync runs under the async backend queue for the worker threads."""
+        self._configure_settings(mock_settings)
+        mock_settings.execution_backend = "async"
+        mock_settings.async_max_concurrent_runs = 100
+        mock_settings.max_workers = 1
+        mock_settings.max_queued_runs = 1
+
+        sync_tool = Mock()
+        sync_tool.id = "sync_tool"
+        mock_default_registry.return_value.get_tools.return_value = [sync_tool]
+        release = threading.Event()
+
+        def run(*_: object) -> Mock:
+            release.wait(timeout=5)
+            return Mock(outputs=Mock(final_output="on a thread"))
+
+        mock_portia.return_value.run.side_effect = run
+
+        service = PortiaService()
+        runs = [
+            asyncio.create_task(service.run_query("query", ["sync_tool"], coalesce=False))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ServiceOverloadedError):
+            await service.run_query("query", ["sync_tool"], coalesce=False)
+        assert service.readiness()["queued_runs"] == 1
+
+        release.set()
+        results = await asyncio.gather(*runs)
+
+        assert [result["result"] for result in results] == ["on a thread", "on a thread"]
+        assert max(result["queue_time"] for result in results) > 0
+        assert service.admission_stats()["in_flight"] == 0
+
+    @patch("app.services.portia_service.settings")
+    @patch("app.services.portia_service.DefaultToolRegistry")
+    @patch("app.services.portia_service.Portia")
+    @pytest.mark.asyncio
+    async def test_async_backend_timeout_cancels_run(
+        self,
+        mock_portia: Mock,
+        mock_default_registry: Mock,
+        mock_settings: Mock,
+    ) -> None:
+        """Test that a run on the event loop past its deadline is cancelled right away."""
+        self._configure_settings(mock_settings)
+        mock_settings.execution_backend = "async"
+        mock_settings.async_max_concurrent_runs = 100
+
+        class AsyncTool:
+            id = "async_tool"
+
+            async def arun(self, *_: object) -> str:
+                return "done"
+
+        mock_default_registry.return_value.get_tools.return_value = [AsyncTool()]
+        cancelled = asyncio.Event()
+
+        async def arun(*_: object) -> Mock:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return Mock()
+
+        mock_portia.return_value.arun = arun
+
+        service = PortiaService()
+
+        with pytest.raises(RunTimeoutError):
+            await service.run_query("query", ["async_tool"], deadline=0.05)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+
+        assert service.admission_stats()["in_flight"] == 0
+
+
+async def _collect(results: AsyncIterator[tuple[int, dict]]) -> list[tuple[int, dict]]:
+    """Collect the results of a batch."""
+    return [result async for result in results]
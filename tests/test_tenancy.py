@@ -0,0 +1,68 @@
+"""Tests for the identification of tenants."""
+
+from collections.abc import Generator
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import Settings, TenantSettings
+from app.middleware import TenantMiddleware
+from app.services.admission import TenantLimits
+from app.services.tenancy import get_tenant, resolve_tenant, tenant_limits
+
+
+@pytest.fixture
+def tenant_settings() -> Generator[Settings, None, None]:
+    """Patch the settings with a tenant identified by an API key."""
+    app_settings = Settings(
+        tenants={"acme": TenantSettings(weight=2, max_in_flight_runs=3, api_keys=["acme-key"])}
+    )
+    with patch("app.services.tenancy.settings", app_settings):
+        yield app_settings
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("headers", "tenant"),
+    [
+        ({"x-api-key": "acme-key", "x-tenant-id": "other"}, "acme"),
+        ({"x-api-key": "unknown-key", "x-tenant-id": " acme "}, "acme"),
+        ({"x-tenant-id": "other"}, "default"),
+        ({}, "default"),
+    ],
+)
+def test_resolve_tenant(
+    tenant_settings: Settings,  # noqa: ARG001
+    headers: dict[str, str],
+    tenant: str,
+) -> None:
+    """Test that API keys take precedence over the tenant header."""
+    assert resolve_tenant(headers) == tenant
+
+
+@pytest.mark.unit
+def test_tenant_limits(tenant_settings: Settings) -> None:
+    """Test that the tenant settings are converted to admission limits."""
+    assert tenant_limits(tenant_settings) == {
+        "acme": TenantLimits(weight=2, max_in_flight=3, max_queued=None)
+    }
+
+
+@pytest.mark.unit
+def test_tenant_middleware_binds_tenant(tenant_settings: Settings) -> None:  # noqa: ARG001
+    """Test that the tenant of a request is bound while it is handled."""
+    app = FastAPI()
+    app.add_middleware(TenantMiddleware)
+    observed = Mock()
+
+    @app.get("/tenant")
+    async def tenant() -> None:
+        observed(get_tenant())
+
+    client = TestClient(app)
+    client.get("/tenant", headers={"X-API-Key": "acme-key"})
+    client.get("/tenant")
+
+    assert [call.args[0] for call in observed.call_args_list] == ["acme", "default"]
@@ -0,0 +1,88 @@
+"""Tests for the tool index."""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from app.services.metrics import TOOL_INDEX_REFRESH_SECONDS
+from app.services.tool_index import ToolIndex
+
+
+def _make_tool(tool_id: str) -> Mock:
+    """Create a mock tool with the given ID."""
+    tool = Mock()
+    tool.id = tool_id
+    return tool
+
+
+@pytest.mark.unit
+class TestToolIndex:
+    """Test cases for ToolIndex."""
+
+    def test_builds_lazily_once(self) -> None:
+        """Test that the index is built on first use and then served from memory."""
+        loader = Mock(return_value=[_make_tool("tool1"), _make_tool("tool2")])
+        index = ToolIndex(loader=loader)
+
+        assert index.is_built is False
+        assert index.ids() == ["tool1", "tool2"]
+        assert index.get("tool1") is not None
+        assert index.get("missing") is None
+        assert index.is_built is True
+        loader.assert_called_once()
+
+    def test_invalid_ids(self) -> None:
+        """Test validating tool IDs against the index."""
+        index = ToolIndex(loader=lambda: [_make_tool("tool1")])
+
+        assert index.invalid_ids(["tool1", "missing"]) == ["missing"]
+        assert index.invalid_ids(["tool1"]) == []
+
+    def test_refresh_swaps_snapshot_and_records_metrics(self) -> None:
+        """Test that a refresh replaces the index and records its duration."""
+        loader = Mock(side_effect=[[_make_tool("tool1")], [_make_tool("tool2")]])
+        index = ToolIndex(loader=loader)
+
+        index.refresh()
+        index.refresh()
+
+        assert index.ids() == ["tool2"]
+        stats = index.stats()
+        assert stats["tool_count"] == 1
+        assert stats["refresh_count"] == 2
+        assert stats["refresh_failures"] == 0
+        assert stats["last_refresh_duration"] is not None
+        assert stats["last_refreshed_at"] is not None
+
+    def test_failed_refresh_keeps_previous_snapshot(self) -> None:
+        """Test that a failed refresh keeps serving the previous index."""
+        loader = Mock(side_effect=[[_make_tool("tool1")], Exception("Registry error")])
+        index = ToolIndex(loader=loader)
+        successes = TOOL_INDEX_REFRESH_SECONDS.count(result="success")
+        failures = TOOL_INDEX_REFRESH_SECONDS.count(result="failure")
+        index.refresh()
+
+        with pytest.raises(Exception, match="Registry error"):
+            index.refresh()
+
+        assert index.ids() == ["tool1"]
+        assert index.stats()["refresh_failures"] == 1
+        assert TOOL_INDEX_REFRESH_SECONDS.count(result="success") == successes + 1
+        assert TOOL_INDEX_REFRESH_SECONDS.count(result="failure") == failures + 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_loop(self) -> None:
+        """Test that the background loop refreshes the index and survives failures."""
+        loader = Mock(side_effect=[Exception("Registry error"), [_make_tool("tool1")]])
+        index = ToolIndex(loader=loader)
+
+        task = asyncio.create_task(index.run_refresh_loop(0.01))
+        for _ in range(100):
+            if index.is_built:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        assert index.ids() == ["tool1"]
+        assert index.stats()["refresh_failures"] == 1
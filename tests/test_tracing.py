@@ -0,0 +1,160 @@
+"""Tests for request tracing."""
+
+import contextvars
+import json
+import threading
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.tracing import (
+    SPAN_KIND_SERVER,
+    STATUS_CODE_ERROR,
+    Trace,
+    TraceExporter,
+    current_request_id,
+    current_trace,
+    record_span,
+    span,
+    to_otlp,
+)
+
+
+@pytest.fixture
+def trace() -> Generator[Trace, None, None]:
+    """Bind a new trace to the context of the test."""
+    trace = Trace.start("request-1", "POST")
+    token = current_trace.set(trace)
+    yield trace
+    current_trace.reset(token)
+
+
+@pytest.mark.unit
+def test_spans_are_nested(trace: Trace) -> None:
+    """Test that spans are children of the span that was current when they started."""
+    with span("execute") as execute:
+        record_span("planning", 0.25)
+        with span("step", step_index=0):
+            pass
+
+    planning, step, _ = trace.spans
+    assert execute.parent_id == trace.root.span_id
+    assert planning.parent_id == execute.span_id
+    assert step.parent_id == execute.span_id
+    assert step.attributes == {"step_index": 0}
+    assert planning.duration_ms == pytest.approx(250, abs=1)
+    assert current_request_id() == "request-1"
+
+
+@pytest.mark.unit
+def test_spans_follow_the_context_into_threads(trace: Trace) -> None:
+    """Test that spans recorded in an executor thread join the request's trace."""
+    with span("execute"):
+        context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(record_span, "step", 0.1))
+    thread.start()
+    thread.join()
+
+    execute, step = trace.spans
+    assert step.parent_id == execute.span_id
+
+
+@pytest.mark.unit
+def test_span_records_errors(trace: Trace) -> None:
+    """Test that a span ended by an exception is marked as failed."""
+    with pytest.raises(TimeoutError), span("queue"):
+        raise TimeoutError
+
+    assert trace.spans[0].error == "TimeoutError"
+
+
+@pytest.mark.unit
+def test_spans_outside_a_trace_are_ignored() -> None:
+    """Test that spans are no-ops outside of a traced request."""
+    with span("execute") as execute:
+        record_span("planning", 0.1)
+
+    assert execute is None
+    assert current_request_id() is None
+
+
+@pytest.mark.unit
+def test_server_timing_adds_up_spans_by_name(trace: Trace) -> None:
+    """Test that the Server-Timing header sums spans with the same name."""
+    record_span("step", 0.1)
+    record_span("step", 0.2)
+    trace.end()
+
+    metrics = dict(item.split(";dur=") for item in trace.server_timing().split(", "))
+
+    assert float(metrics["step"]) == pytest.approx(300, abs=1)
+    assert "total" in metrics
+
+
+@pytest.mark.unit
+def test_request_id_is_used_as_trace_id() -> None:
+    """Test that request IDs that are valid trace IDs are used as such."""
+    request_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    assert Trace.start(request_id, "GET").trace_id == request_id
+    assert len(Trace.start("not-a-trace-id", "GET").trace_id) == 32
+
+
+@pytest.mark.unit
+def test_to_otlp(trace: Trace) -> None:
+    """Test the conversion of a trace to OTLP/JSON."""
+    with pytest.raises(RuntimeError, match="failed"), span("execute", backend="thread"):
+        raise RuntimeError("failed")
+    trace.end()
+
+    resource_spans = to_otlp([trace], "portia-test")["resourceSpans"][0]
+    root, execute = resource_spans["scopeSpans"][0]["spans"]
+
+    assert resource_spans["resource"]["attributes"][0]["value"]["stringValue"] == "portia-test"
+    assert root["kind"] == SPAN_KIND_SERVER
+    assert "parentSpanId" not in root
+    assert execute["traceId"] == trace.trace_id
+    assert execute["parentSpanId"] == root["spanId"]
+    assert execute["attributes"] == [{"key": "backend", "value": {"stringValue": "thread"}}]
+    assert execute["status"]["code"] == STATUS_CODE_ERROR
+
+
+@pytest.mark.unit
+def test_exporter_appends_traces_to_file(tmp_path: Path, trace: Trace) -> None:
+    """Test that exported traces are written as OTLP/JSON lines."""
+    path = tmp_path / "traces.jsonl"
+    exporter = TraceExporter(service_name="portia-test", path=str(path))
+    trace.end()
+
+    exporter.export(trace)
+    exporter.export(trace)
+    exporter.shutdown()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["traceId"] == (
+        trace.trace_id
+    )
+    assert exporter.exported == 2
+
+
+@pytest.mark.unit
+def test_middleware_reports_request_id_and_server_timing(
+    client: TestClient, mock_portia_service: Mock
+) -> None:
+    """Test that responses carry the request ID and a Server-Timing summary."""
+    mock_portia_service.run_query_sync.return_value = {"success": True, "result": "4"}
+
+    response = client.post(
+        "/run",
+        json={"query": "What is 2+2?", "tools": ["calculator_tool"]},
+        headers={"X-Request-ID": "client-request-1"},
+    )
+    generated = client.get("/health")
+
+    assert response.headers["X-Request-ID"] == "client-request-1"
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert len(generated.headers["X-Request-ID"]) == 32